@@ -69,8 +69,16 @@ def read_query_suite_data():
     return data_df
 
 
+def select_cache_mode(df: pd.DataFrame, mode: str = "cold") -> pd.DataFrame:
+    # tracequery.bench emits both cold- and warm-cache rows; older CSVs have neither
+    if "mode" not in df.columns:
+        return df
+    return df[df["mode"] == mode].reset_index(drop=True)
+
+
 def prep_query_suite_data(df: pd.DataFrame):
     # Cols: ['query_name', 'trace_dir', 'run_type', 'data', 'total_us']
+    df = select_cache_mode(df)
     all_params = [infer_run_params(Path(trace_dir)) for trace_dir in df["trace_dir"]]
     all_pdf = pd.DataFrame(all_params)
     mdf = df.merge(all_pdf, left_index=True, right_index=True)
@@ -93,6 +101,7 @@ def read_query_suite():
     df = pd.concat(all_dfs, ignore_index=True)
 
     # Cols: ['query_name', 'trace_dir', 'run_type', 'data', 'total_us']
+    df = select_cache_mode(df)
     all_params = [infer_run_params(Path(trace_dir)) for trace_dir in df["trace_dir"]]
     all_pdf = pd.DataFrame(all_params)
     mdf = df.merge(all_pdf, left_index=True, right_index=True)
@@ -1,43 +1,475 @@
-import random
-import pandas as pd
-
-
-def gen_evtimes(n: int, target: float, min_size: float = 1.0) -> list[float]:
-    times = [random.uniform(min_size, target / n * 2) for _ in range(n)]
-    scale = target / sum(times)
-    return [t * scale for t in times]
-
-
-def gen_trace(r: int, t: int, n: int, target_time: float) -> pd.DataFrame:
-    data = []
-    for rank in range(r):
-        for ts in range(t):
-            evtimes = gen_evtimes(n, target_time)
-            evnames = [f"Event{chr(65 + i)}"
-                       for i in range(n - 1)] + ["Barrier"]
-            start = 0.0
-            for evname, evtime in zip(evnames, evtimes):
-                data.append({
-                    "Rank": rank,
-                    "Timestep": ts,
-                    "Event": evname,
-                    "Time": evtime,
-                    "Start": start
-                })
-                start += evtime
-    df = pd.DataFrame(data)
-    df = df.astype({"Time": int, "Start": int})
-    return df
+"""Generate synthetic ORCA trace roots for local query benchmarks.
 
+Writes the same layout and schemas as an ORCA run:
 
-def run():
-    nranks = 4
-    ntimesteps = 2
-    nevents = 3
-    target_time = 100.0
+    <out>/parquet/{mpi_collectives,mpi_messages,kokkos_events}/ts=A_B/ranks=L_H.parquet
+    <out>/parquet/orca_events/R{rank}.parquet
+
+ts=A_B holds timesteps [A, B) (one flush interval), ranks=L_H holds the ranks
+[L, H) owned by one aggregator. Each step on each rank runs a sequence of
+kernels, then point-to-point messages, then collectives. The first collective
+absorbs the wait for the slowest rank, so injected stragglers show up exactly
+as they do in real traces (long MPI_Allreduce on everyone else).
+
+Rows are generated with NumPy per (flush interval, aggregator) chunk and
+chunks are written by a process pool, so 4096 ranks x 2000 steps is feasible
+on a workstation. Output is deterministic for a given config and seed.
+
+Usage:
+    python gentrace.py -o /tmp/synth/amr-agg4-r4096-n2000-run1/00_synth \\
+        --ranks 4096 --steps 2000 --aggs 4 --flush-steps 2 -n 16
+"""
+
+import argparse
+import hashlib
+import io
+import multiprocessing
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+KERNELS = [
+    ("region::TaskRegion::CheckAndUpdate", 0),
+    ("Mesh::Initialize::BuildAndPost", 1),
+    ("SerializeTsData::GetForwards", 1),
+    ("Kokkos::parallel_for CalculateFluxes", 2),
+    ("Kokkos::parallel_for FluxDivergence", 2),
+    ("Kokkos::parallel_reduce EstimateTimestep", 2),
+    ("Kokkos::parallel_for SendBoundBufs", 2),
+    ("Kokkos::parallel_for SetBounds", 2),
+]
+MESSAGES = ["MPI_Irecv", "MPI_Isend", "MPI_Wait"]
+COLLECTIVES = ["MPI_Allreduce", "MPI_Allgather", "MPI_Allreduce", "MPI_Barrier"]
+ORCA_PROBES = [
+    ("PostTimestepAdvance", "X"),
+    ("SerializeTsData::GetForwards", "X"),
+    ("orca_events_buffered", "C"),
+]
+
+TRACE_TABLES = ["mpi_collectives", "mpi_messages", "kokkos_events"]
+
+SCHEMAS = {
+    "mpi_collectives": pa.schema([
+        ("probe_name", pa.dictionary(pa.int32(), pa.string())),
+        ("probe_hash", pa.uint64()),
+        ("timestep", pa.int32()),
+        ("swid", pa.uint64()),
+        ("rank", pa.int32()),
+        ("ts_ns", pa.uint64()),
+        ("dura_ns", pa.uint64()),
+    ]),
+    "kokkos_events": pa.schema([
+        ("probe_name", pa.dictionary(pa.int32(), pa.string())),
+        ("probe_hash", pa.uint64()),
+        ("timestep", pa.int32()),
+        ("swid", pa.uint64()),
+        ("rank", pa.int32()),
+        ("depth", pa.int32()),
+        ("ts_ns", pa.uint64()),
+        ("dura_ns", pa.uint64()),
+    ]),
+    "mpi_messages": pa.schema([
+        ("probe_name", pa.dictionary(pa.int32(), pa.string())),
+        ("probe_hash", pa.uint64()),
+        ("timestep", pa.int32()),
+        ("swid", pa.uint64()),
+        ("rank", pa.int32()),
+        ("ts_ns", pa.uint64()),
+        ("src_rank", pa.int32()),
+        ("dst_rank", pa.int32()),
+        ("tag", pa.int32()),
+        ("msg_bytes", pa.uint64()),
+        ("req_handle", pa.uint64()),
+        ("dura_ns", pa.uint64()),
+    ]),
+    "orca_events": pa.schema([
+        ("probe_name", pa.dictionary(pa.int32(), pa.string())),
+        ("op_type", pa.string()),
+        ("ts_ns", pa.uint64()),
+        ("timestep", pa.int32()),
+        ("swid", pa.uint64()),
+        ("rank", pa.int32()),
+        ("val", pa.uint64()),
+    ]),
+}
+
+STATE_FNAME = ".gentrace_compute.npy"
+
+
+@dataclass
+class GenConfig:
+    nranks: int = 64
+    nsteps: int = 100
+    naggs: int = 1
+    flush_steps: int = 2  # timesteps per ts=A_B directory
+    kernels_per_step: int = 16
+    msgs_per_step: int = 6
+    colls_per_step: int = 4
+    compute_ns: float = 40e6  # mean per-rank compute per step
+    comm_ns: float = 2e6  # budget for point-to-point per step
+    coll_ns: float = 50e3  # base collective latency
+    wait_ns: float = 200e3  # mean MPI_Wait duration
+    jitter: float = 0.1  # lognormal sigma of per-rank compute
+    straggler_prob: float = 1e-3  # per (rank, step) transient slowdown
+    straggler_factor: float = 5.0
+    slow_ranks: int = 0  # persistently slow ranks
+    slow_factor: float = 1.5
+    row_group_size: int = 1 << 20
+    compression: str = "zstd"
+    seed: int = 42
+
+    @property
+    def ranks_per_agg(self) -> int:
+        return -(-self.nranks // self.naggs)
+
+    def agg_ranks(self, agg: int) -> tuple[int, int]:
+        lo = agg * self.ranks_per_agg
+        return lo, min(lo + self.ranks_per_agg, self.nranks)
+
+    def flush_intervals(self) -> list[tuple[int, int]]:
+        return [
+            (a, min(a + self.flush_steps, self.nsteps))
+            for a in range(0, self.nsteps, self.flush_steps)
+        ]
+
+
+# -----------------------------------------------------------------------------
+# Global timeline (computed once, shared with workers through an .npy memmap)
+# -----------------------------------------------------------------------------
+
+
+def gen_compute(cfg: GenConfig) -> np.ndarray:
+    """Per-(step, rank) compute time in ns, including injected stragglers."""
+    rng = np.random.default_rng([cfg.seed, 0])
+    shape = (cfg.nsteps, cfg.nranks)
+    compute = cfg.compute_ns * rng.lognormal(0.0, cfg.jitter, size=shape)
+
+    if cfg.slow_ranks > 0:
+        slow = rng.choice(cfg.nranks, size=cfg.slow_ranks, replace=False)
+        compute[:, slow] *= cfg.slow_factor
+
+    if cfg.straggler_prob > 0:
+        compute[rng.random(shape) < cfg.straggler_prob] *= cfg.straggler_factor
+
+    return compute.astype(np.float32)
+
+
+def step_bounds(cfg: GenConfig, compute: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(step_start_ns, slowest arrival at the first collective) per step."""
+    max_arrival = compute.max(axis=1).astype(np.float64) + cfg.comm_ns
+    step_len = max_arrival + cfg.colls_per_step * 2 * cfg.coll_ns
+    step_start = np.concatenate([[0.0], np.cumsum(step_len)[:-1]])
+    return step_start, max_arrival
+
+
+# -----------------------------------------------------------------------------
+# Table builders
+# -----------------------------------------------------------------------------
+
+
+def _probe_hash(name: str) -> int:
+    return int.from_bytes(hashlib.blake2b(name.encode(), digest_size=8).digest(), "little")
+
+
+def _probe_cols(names: list[str], idx: np.ndarray) -> dict[str, pa.Array]:
+    """probe_name as dictionary(int32) plus the matching probe_hash column."""
+    uniq, inv = np.unique(np.asarray(names), return_inverse=True)
+    codes = inv[idx].astype(np.int32)
+    hashes = np.array([_probe_hash(n) for n in uniq], dtype=np.uint64)
+    return {
+        "probe_name": pa.DictionaryArray.from_arrays(codes, pa.array(uniq.tolist())),
+        "probe_hash": pa.array(hashes[codes]),
+    }
+
+
+def _table(name: str, cols: dict) -> pa.Table:
+    schema = SCHEMAS[name]
+    arrays = [
+        cols[f.name] if pa.types.is_dictionary(f.type)
+        else pa.array(np.asarray(cols[f.name]).astype(f.type.to_pandas_dtype()), type=f.type)
+        for f in schema
+    ]
+    return pa.table(arrays, schema=schema)
+
+
+def _excl_cumsum(x: np.ndarray) -> np.ndarray:
+    out = np.zeros_like(x)
+    np.cumsum(x[:, :-1], axis=1, out=out[:, 1:])
+    return out
+
+
+def gen_chunk(
+    cfg: GenConfig,
+    compute: np.ndarray,
+    step_start: np.ndarray,
+    max_arrival: np.ndarray,
+    steps: tuple[int, int],
+    ranks: tuple[int, int],
+) -> dict[str, pa.Table]:
+    """All trace-table rows for steps x ranks, ordered by (step, rank, event)."""
+    (a, b), (lo, hi) = steps, ranks
+    nr = hi - lo
+    rng = np.random.default_rng([cfg.seed, 1, a, lo])
+
+    step = np.repeat(np.arange(a, b), nr)
+    rank = np.tile(np.arange(lo, hi), b - a)
+    comp = compute[a:b, lo:hi].reshape(-1).astype(np.float64)
+    t0 = step_start[step]
+    n = len(step)
+    C = cfg.colls_per_step
+    swid0 = step.astype(np.uint64) * C
+
+    # kernels: split each rank's compute time into consecutive kernels
+    K = cfg.kernels_per_step
+    frac = rng.random((n, K)) + 0.1
+    kdur = comp[:, None] * frac / frac.sum(axis=1, keepdims=True)
+    kts = t0[:, None] + _excl_cumsum(kdur)
+    kidx = np.broadcast_to(np.arange(K) % len(KERNELS), (n, K)).reshape(-1)
+    depths = np.array([d for _, d in KERNELS], dtype=np.int32)
+    kokkos = _table("kokkos_events", {
+        **_probe_cols([k for k, _ in KERNELS], kidx),
+        "timestep": np.repeat(step, K),
+        "swid": np.repeat(swid0, K),
+        "rank": np.repeat(rank, K),
+        "depth": depths[kidx],
+        "ts_ns": kts.reshape(-1),
+        "dura_ns": kdur.reshape(-1),
+    })
 
-    df = gen_trace(nranks, ntimesteps, nevents, target_time)
-    print(df.to_string(index=False))
+    # messages: Irecv/Isend/Wait triples inside the comm budget after compute
+    M = cfg.msgs_per_step
+    midx = np.broadcast_to(np.arange(M) % len(MESSAGES), (n, M))
+    is_wait = midx == MESSAGES.index("MPI_Wait")
+    mdur = np.where(
+        is_wait,
+        rng.exponential(cfg.wait_ns, size=(n, M)),
+        rng.exponential(2e3, size=(n, M)),
+    )
+    mdur *= np.minimum(1.0, cfg.comm_ns / mdur.sum(axis=1, keepdims=True))
+    mts = (t0 + comp)[:, None] + _excl_cumsum(mdur)
+    peer = (rank[:, None] + 1 + np.arange(M) // len(MESSAGES)) % cfg.nranks
+    is_send = midx == MESSAGES.index("MPI_Isend")
+    nbytes = np.where(is_wait, 0, rng.lognormal(10.0, 1.5, size=(n, M)))
+    msgs = _table("mpi_messages", {
+        **_probe_cols(MESSAGES, midx.reshape(-1)),
+        "timestep": np.repeat(step, M),
+        "swid": np.repeat(swid0, M),
+        "rank": np.repeat(rank, M),
+        "ts_ns": mts.reshape(-1),
+        "src_rank": np.where(is_send, rank[:, None], peer).reshape(-1),
+        "dst_rank": np.where(is_send, peer, rank[:, None]).reshape(-1),
+        "tag": np.broadcast_to(np.arange(M) // len(MESSAGES), (n, M)).reshape(-1),
+        "msg_bytes": nbytes.reshape(-1),
+        "req_handle": ((rank.astype(np.uint64) << np.uint64(32))[:, None]
+                       + (step.astype(np.uint64) * M)[:, None]
+                       + np.arange(M, dtype=np.uint64)).reshape(-1),
+        "dura_ns": mdur.reshape(-1),
+    })
+
+    # collectives: the first one waits for the slowest rank of the step
+    arrival = comp + cfg.comm_ns
+    cdur = cfg.coll_ns * rng.lognormal(0.0, 0.2, size=(n, C))
+    cdur[:, 0] += max_arrival[step] - arrival
+    cts = np.empty((n, C))
+    cts[:, 0] = t0 + arrival
+    cts[:, 1:] = (t0 + max_arrival[step])[:, None] + 2 * cfg.coll_ns * np.arange(1, C)
+    cidx = np.broadcast_to(np.arange(C) % len(COLLECTIVES), (n, C)).reshape(-1)
+    colls = _table("mpi_collectives", {
+        **_probe_cols(COLLECTIVES, cidx),
+        "timestep": np.repeat(step, C),
+        "swid": (swid0[:, None] + np.arange(C, dtype=np.uint64)).reshape(-1),
+        "rank": np.repeat(rank, C),
+        "ts_ns": cts.reshape(-1),
+        "dura_ns": cdur.reshape(-1),
+    })
+
+    return {"mpi_collectives": colls, "mpi_messages": msgs, "kokkos_events": kokkos}
+
+
+def gen_orca_events(
+    cfg: GenConfig, compute: np.ndarray, step_start: np.ndarray, rank: int
+) -> pa.Table:
+    """ORCA's own per-step probes for one rank (one row per probe per step)."""
+    rng = np.random.default_rng([cfg.seed, 2, rank])
+    P = len(ORCA_PROBES)
+    step = np.repeat(np.arange(cfg.nsteps), P)
+    pidx = np.tile(np.arange(P), cfg.nsteps)
+    is_cntr = np.array([op == "C" for _, op in ORCA_PROBES])[pidx]
+
+    nevents = cfg.kernels_per_step + cfg.msgs_per_step + cfg.colls_per_step
+    dura = np.repeat(compute[:, rank].astype(np.float64), P) * rng.uniform(0.01, 0.05, len(step))
+    return _table("orca_events", {
+        "probe_name": _probe_cols([p for p, _ in ORCA_PROBES], pidx)["probe_name"],
+        "op_type": np.array([op for _, op in ORCA_PROBES])[pidx],
+        "ts_ns": step_start[step] + np.repeat(compute[:, rank], P),
+        "timestep": step,
+        "swid": step.astype(np.uint64) * cfg.colls_per_step,
+        "rank": np.full(len(step), rank),
+        "val": np.where(is_cntr, nevents, dura),
+    })
+
+
+# -----------------------------------------------------------------------------
+# Module-level workers for multiprocessing (must be picklable)
+# -----------------------------------------------------------------------------
+
+
+def _load_state(cfg: GenConfig, state_path: Path):
+    compute = np.load(state_path, mmap_mode="r")
+    return (compute, *step_bounds(cfg, compute))
+
+
+def _write(table: pa.Table, path: Path, cfg: GenConfig) -> int:
+    tmp = path.with_name(f".{path.name}.tmp")
+    pq.write_table(table, tmp, row_group_size=cfg.row_group_size, compression=cfg.compression)
+    os.replace(tmp, path)
+    return path.stat().st_size
+
+
+def _trace_worker(args: tuple[GenConfig, Path, Path, tuple[int, int], int]) -> tuple[int, int]:
+    cfg, state_path, pq_root, steps, agg = args
+    compute, step_start, max_arrival = _load_state(cfg, state_path)
+    ranks = cfg.agg_ranks(agg)
+    tables = gen_chunk(cfg, compute, step_start, max_arrival, steps, ranks)
+
+    nrows = nbytes = 0
+    for name, table in tables.items():
+        path = pq_root / name / f"ts={steps[0]}_{steps[1]}" / f"ranks={ranks[0]}_{ranks[1]}.parquet"
+        nbytes += _write(table, path, cfg)
+        nrows += len(table)
+    return nrows, nbytes
+
+
+def _orca_events_worker(args: tuple[GenConfig, Path, Path, tuple[int, int]]) -> tuple[int, int]:
+    cfg, state_path, pq_root, (lo, hi) = args
+    compute, step_start, _ = _load_state(cfg, state_path)
+
+    nrows = nbytes = 0
+    for rank in range(lo, hi):
+        table = gen_orca_events(cfg, compute, step_start, rank)
+        nbytes += _write(table, pq_root / "orca_events" / f"R{rank}.parquet", cfg)
+        nrows += len(table)
+    return nrows, nbytes
+
+
+# -----------------------------------------------------------------------------
+# Driver
+# -----------------------------------------------------------------------------
+
+
+def calibrate_flush_steps(cfg: GenConfig, target_mb: float) -> int:
+    """Pick flush_steps so the largest per-aggregator file is ~target_mb."""
+    nsample = min(cfg.nsteps, 4)
+    compute = gen_compute(GenConfig(**{**cfg.__dict__, "nsteps": nsample}))
+    step_start, max_arrival = step_bounds(cfg, compute)
+    tables = gen_chunk(cfg, compute, step_start, max_arrival, (0, nsample), cfg.agg_ranks(0))
+
+    def size(t: pa.Table) -> int:
+        buf = io.BytesIO()
+        pq.write_table(t, buf, compression=cfg.compression)
+        return buf.tell()
+
+    bytes_per_step = max(size(t) for t in tables.values()) / nsample
+    return max(1, min(cfg.nsteps, round(target_mb * 2**20 / bytes_per_step)))
+
+
+def gen_trace_root(out_dir: Path, cfg: GenConfig, nworkers: int = 1) -> None:
+    """Write a complete ORCA parquet root under out_dir/parquet."""
+    pq_root = Path(out_dir) / "parquet"
+    if pq_root.exists():
+        shutil.rmtree(pq_root)
+
+    intervals = cfg.flush_intervals()
+    for table in TRACE_TABLES:
+        for a, b in intervals:
+            (pq_root / table / f"ts={a}_{b}").mkdir(parents=True)
+    (pq_root / "orca_events").mkdir(parents=True)
+
+    state_path = Path(out_dir) / STATE_FNAME
+    np.save(state_path, gen_compute(cfg))
+
+    trace_jobs = [
+        (cfg, state_path, pq_root, steps, agg)
+        for steps in intervals
+        for agg in range(cfg.naggs)
+    ]
+    rank_blocks = [(lo, min(lo + 64, cfg.nranks)) for lo in range(0, cfg.nranks, 64)]
+    event_jobs = [(cfg, state_path, pq_root, block) for block in rank_blocks]
+
+    print(
+        f"Generating {cfg.nranks} ranks x {cfg.nsteps} steps: "
+        f"{len(trace_jobs)} trace chunks, {cfg.nranks} orca_events files -> {pq_root}"
+    )
+
+    start = time.time()
+    try:
+        if nworkers > 1:
+            ctx = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=nworkers, mp_context=ctx) as ex:
+                results = [*ex.map(_trace_worker, trace_jobs), *ex.map(_orca_events_worker, event_jobs)]
+        else:
+            results = [*map(_trace_worker, trace_jobs), *map(_orca_events_worker, event_jobs)]
+    finally:
+        state_path.unlink()
+
+    nrows = sum(r for r, _ in results)
+    nbytes = sum(b for _, b in results)
+    print(
+        f"Wrote {nrows:,} rows, {nbytes / 2**20:.1f} MiB "
+        f"in {time.time() - start:.1f}s ({nworkers} workers)"
+    )
+
+
+def parse_args() -> tuple[Path, GenConfig, int]:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", "-o", type=Path, required=True, help="profile dir (parquet/ is created inside)")
+    parser.add_argument("--ranks", "-r", type=int, default=64)
+    parser.add_argument("--steps", "-s", type=int, default=100)
+    parser.add_argument("--aggs", "-a", type=int, default=1)
+    parser.add_argument("--flush-steps", "-f", type=int, default=2)
+    parser.add_argument("--target-file-mb", type=float, default=None, help="overrides --flush-steps")
+    parser.add_argument("--kernels", type=int, default=16, help="kokkos events per rank per step")
+    parser.add_argument("--msgs", type=int, default=6, help="p2p events per rank per step")
+    parser.add_argument("--colls", type=int, default=4, help="collectives per step")
+    parser.add_argument("--straggler-prob", type=float, default=1e-3)
+    parser.add_argument("--straggler-factor", type=float, default=5.0)
+    parser.add_argument("--slow-ranks", type=int, default=0)
+    parser.add_argument("--row-group-size", type=int, default=1 << 20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--nworkers", "-n", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    cfg = GenConfig(
+        nranks=args.ranks,
+        nsteps=args.steps,
+        naggs=args.aggs,
+        flush_steps=args.flush_steps,
+        kernels_per_step=args.kernels,
+        msgs_per_step=args.msgs,
+        colls_per_step=args.colls,
+        straggler_prob=args.straggler_prob,
+        straggler_factor=args.straggler_factor,
+        slow_ranks=args.slow_ranks,
+        row_group_size=args.row_group_size,
+        seed=args.seed,
+    )
+    if args.target_file_mb:
+        cfg.flush_steps = calibrate_flush_steps(cfg, args.target_file_mb)
+        print(f"flush_steps={cfg.flush_steps} for ~{args.target_file_mb} MiB files")
+
+    return args.out, cfg, args.nworkers
+
+
+def run():
+    out_dir, cfg, nworkers = parse_args()
+    gen_trace_root(out_dir, cfg, nworkers)
 
 
 if __name__ == "__main__":
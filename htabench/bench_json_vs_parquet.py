@@ -1,3 +1,4 @@
+import functools
 import os
 import time
 import statistics
@@ -5,6 +6,7 @@ import argparse
 from typing import List, Dict, Optional
 import hta_json
 import hta_parquet
+import hta_polars
 
 # HTA functions may emit FutureWarnings, ignore them because they don't affect the correctness of the analysis.
 import warnings
@@ -72,13 +74,18 @@ def benchmark_local_trace_analysis(
     print(f"  Number of CPU cores: {num_cores}")
     print()
 
-    set_cpu_affinity(num_cores)
-
-    analysis_func = (
-        hta_json.local_trace_analysis
-        if mode == "json"
-        else hta_parquet.local_trace_analysis
-    )
+    cores = set_cpu_affinity(num_cores)
+
+    analysis_func = {
+        "json": hta_json.local_trace_analysis,
+        "parquet": hta_parquet.local_trace_analysis,
+        "polars": hta_polars.local_trace_analysis,
+    }[mode]
+    if mode == "parquet" and os.path.isdir(trace_file):
+        # One process per core, each analyzing one rank's trace
+        analysis_func = functools.partial(
+            hta_parquet.distributed_trace_analysis, num_workers=len(cores)
+        )
 
     # Warmup runs
     print("Running warmup...")
@@ -135,13 +142,17 @@ def main():
     parser.add_argument(
         "--mode",
         "-m",
-        choices=["json", "parquet"],
+        choices=["json", "parquet", "polars"],
         default="json",
-        help="Input file format mode",
+        help="Input file format mode (polars: parquet input, Polars analyses)",
     )
 
     parser.add_argument(
-        "--file", "-f", type=str, required=True, help="Path to the trace file"
+        "--file",
+        "-f",
+        type=str,
+        required=True,
+        help="Path to the trace file (parquet mode: or a directory of per-rank traces)",
     )
 
     parser.add_argument(
@@ -192,5 +203,7 @@ def main():
 # Example usage:
 # python bench_json_vs_parquet.py --mode json --file h100_trace.json --hta_func get_temporal_breakdown
 # python bench_json_vs_parquet.py --mode parquet --file h100_trace.parquet --hta_func get_temporal_breakdown
+# python bench_json_vs_parquet.py --mode polars --file h100_trace.parquet --hta_func get_temporal_breakdown
+# python bench_json_vs_parquet.py --mode parquet --file h100_traces/ --cores 8 --hta_func get_temporal_breakdown
 if __name__ == "__main__":
     exit(main())
@@ -1,19 +1,45 @@
 from collections import defaultdict
+import glob
 import json
 import os
 import re
 import sys
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 import pyarrow.parquet as pq
 import numpy as np
-import math
 from hta.common.trace_symbol_table import TraceSymbolTable
 from hta.utils.utils import KernelType
 
 
 MetaData = Dict[str, Any]
 
+# Columns read by the load stages, from _round_timestamps through
+# _align_and_filter_trace. "end" only exists in pre-rounded traces.
+LOAD_COLUMNS = ["ts", "dur", "end", "cat", "name", "stream", "correlation"]
+
+# Columns each analysis reads on top of LOAD_COLUMNS
+ANALYSIS_COLUMNS: Dict[str, List[str]] = {
+    "get_temporal_breakdown": [],
+    "get_gpu_kernel_breakdown_by_type": [],
+    "get_gpu_kernel_breakdown_all_kernels": [],
+    "get_comm_comp_overlap": [],
+    "get_memory_bw_time_series": ["pid", "memory_bw_gbps"],
+}
+
+# Analyses that only look at GPU events and report durations, so CPU events
+# can be skipped at read time except those the load stages still need.
+# get_memory_bw_time_series is excluded: its ts are relative to the
+# trace-wide minimum ts, which CPU events take part in.
+GPU_ONLY_ANALYSES = {
+    "get_temporal_breakdown",
+    "get_gpu_kernel_breakdown_by_type",
+    "get_gpu_kernel_breakdown_all_kernels",
+    "get_comm_comp_overlap",
+}
+
 
 def normalize_gpu_stream_numbers(df: pd.DataFrame) -> None:
     """
@@ -26,55 +52,144 @@ def normalize_gpu_stream_numbers(df: pd.DataFrame) -> None:
 def _compress_df(df: pd.DataFrame) -> Tuple[pd.DataFrame, TraceSymbolTable]:
     normalize_gpu_stream_numbers(df)
 
-    df.dropna(axis=0, subset=["dur", "cat"], inplace=True)
-    df.drop(df[df["cat"] == "Trace"].index, inplace=True)
-
-    columns_to_drop = {"ph", "id", "bp", "s"}.intersection(set(df.columns))
-    df.drop(list(columns_to_drop), axis=1, inplace=True)
-
-    # create a local symbol table
+    # drop rows without dur/cat, "Trace" rows and unused columns in one take
+    keep = df["dur"].notna() & df["cat"].notna()
+    keep &= df["cat"].ne("Trace").fillna(False)
+    columns = [c for c in df.columns if c not in {"ph", "id", "bp", "s"}]
+    df = df.loc[keep.to_numpy(dtype=bool), columns]
+
+    # create a local symbol table: one factorize over cat and name together
+    # yields the symbols and the per-event codes (Arrow dictionary_encode for
+    # Arrow-backed columns), so no per-event Python lookup is needed
+    codes, symbols = pd.factorize(
+        pd.concat([df["cat"], df["name"]], ignore_index=True), use_na_sentinel=False
+    )
+    symbols = symbols.tolist()
     local_symbol_table = TraceSymbolTable()
-    symbols = set(df["cat"].unique()).union(set(df["name"].unique()))
     local_symbol_table.add_symbols(symbols)
 
+    # codes index into symbols; remap in case the table numbers them differently
     sym_index = local_symbol_table.get_sym_id_map()
-    for col in ["cat", "name"]:
-        df[col + "_id"] = df[col].apply(lambda s: sym_index[s]).astype(int)
+    sym_ids = np.array([sym_index[s] for s in symbols], dtype=np.int64)
+    df["cat_id"] = sym_ids[codes[: len(df)]]
+    df["name_id"] = sym_ids[codes[len(df) :]]
 
-    # data type downcast
-    for col in df.columns:
-        if df[col].dtype.kind == "i":
-            df[col] = pd.to_numeric(df[col], errors="coerce", downcast="integer")
+    _downcast_int_columns(df)
 
     return df, local_symbol_table
 
 
+def _downcast_int_columns(df: pd.DataFrame) -> None:
+    """Narrow every integer column to the smallest signed type, in one astype.
+
+    Columns become NumPy-backed, as in HTA: Arrow-backed sums and cumsums keep
+    the narrow type and overflow, NumPy's widen to int64. Columns with nulls
+    have no NumPy integer type and are left as they are.
+    """
+    int_cols = [c for c in df.columns if df[c].dtype.kind == "i"]
+    if not int_cols or df.empty:
+        return
+
+    bounds = df[int_cols].agg(["min", "max"])
+    nulls = df[int_cols].isna().any()
+    dtypes = {}
+    for col in int_cols:
+        lo, hi = bounds.at["min", col], bounds.at["max", col]
+        if nulls[col] or pd.isna(lo):
+            continue
+        np_type = next(
+            t for t in (np.int8, np.int16, np.int32, np.int64)
+            if np.iinfo(t).min <= lo and hi <= np.iinfo(t).max
+        )
+        if np.dtype(np_type) != df[col].dtype:
+            dtypes[col] = np_type
+
+    if dtypes:
+        df[list(dtypes)] = df.astype(dtypes)[list(dtypes)]
+
+
 def _parse_trace_file(
     trace_file_path: str,
+    analysis: Optional[str] = None,
 ) -> Tuple[MetaData, pd.DataFrame, TraceSymbolTable]:
-    meta, df, local_symbol_table = _parse_trace_dataframe_parquet(trace_file_path)
+    meta, df, local_symbol_table = _parse_trace_dataframe_parquet(
+        trace_file_path, analysis
+    )
 
     _add_fwd_bwd_links(df)
     df = _transform_correlation_to_index(df, local_symbol_table)
     _add_iteration(df, local_symbol_table)
-    df["end"] = df["ts"] + df["dur"]
 
     return meta, df, local_symbol_table
 
 
+def round_timestamps_arrow(
+    ts: pa.Array, dur: pa.Array
+) -> Tuple[pa.Array, pa.Array, pa.Array]:
+    """(ts, dur, end) as int64: ts rounded up, end = ts + dur rounded down."""
+    # Don't floor directly, first find the end
+    end = pc.cast(pc.floor(pc.add(ts, dur)), pa.int64())
+    ts = pc.cast(pc.ceil(ts), pa.int64())
+    return ts, pc.subtract(end, ts), end
+
+
 def _round_timestamps(df: pd.DataFrame) -> None:
-    if df["ts"].dtype != np.dtype("float64"):
+    """Round float ts/dur to whole us and add end, as whole-column kernels.
+
+    Traces converted with pre-rounded integer ts/dur/end skip this stage.
+    """
+    if df["ts"].dtype.kind != "f":
+        if "end" not in df.columns:
+            df["end"] = df["ts"] + df["dur"]
         return
-    # Don't floor directly, first find the end
-    df["end"] = df["ts"] + df["dur"]
 
-    df["ts"] = df[~df["ts"].isnull()]["ts"].apply(lambda x: math.ceil(x))
-    df["end"] = df[~df["end"].isnull()]["end"].apply(lambda x: math.floor(x))
-    df["dur"] = df["end"] - df["ts"]
+    ts, dur, end = round_timestamps_arrow(
+        pa.array(df["ts"], from_pandas=True), pa.array(df["dur"], from_pandas=True)
+    )
+    df["ts"] = pd.arrays.ArrowExtensionArray(ts)
+    df["dur"] = pd.arrays.ArrowExtensionArray(dur)
+    df["end"] = pd.arrays.ArrowExtensionArray(end)
+
+
+def _gpu_rows_filter(schema: pa.Schema) -> Optional[pc.Expression]:
+    """GPU events, plus CPU kernel launches (correlation) and ProfilerStep
+    annotations, which _align_and_filter_trace needs to pair and cut GPU events.
+    """
+    for col in ("stream", "correlation"):
+        if col not in schema.names or not pa.types.is_integer(schema.field(col).type):
+            return None
+    if "name" not in schema.names:
+        return None
+
+    return (
+        (pc.field("stream") >= 0)
+        | (pc.field("correlation") >= 0)
+        | pc.starts_with(pc.field("name"), "ProfilerStep")
+    )
+
+
+def _read_plan(
+    schema: pa.Schema, analysis: Optional[str]
+) -> Tuple[Optional[List[str]], Optional[pc.Expression]]:
+    """(columns, row filter) to read for an analysis; (None, None) reads all."""
+    if analysis not in ANALYSIS_COLUMNS:
+        return None, None
+
+    wanted = set(LOAD_COLUMNS + ANALYSIS_COLUMNS[analysis])
+    columns = [c for c in schema.names if c in wanted]
+    row_filter = _gpu_rows_filter(schema) if analysis in GPU_ONLY_ANALYSES else None
+    return columns, row_filter
+
 
+def _read_parquet_io(
+    trace_file_path: str, analysis: Optional[str] = None
+) -> Tuple[MetaData, pd.DataFrame]:
+    """Read parquet file into a DataFrame. IO only, no post-processing.
 
-def _read_parquet_io(trace_file_path: str) -> Tuple[MetaData, pd.DataFrame]:
-    """Read parquet file into a DataFrame. IO only, no post-processing."""
+    With an analysis name, only the columns in its manifest are read, and
+    for GPU-only analyses row groups and rows without GPU-relevant events
+    are skipped.
+    """
     pq_file = pq.ParquetFile(trace_file_path)
     pq_metadata = pq_file.metadata.metadata
     kineto_metadata: Dict[str, Any] = {}
@@ -85,16 +200,24 @@ def _read_parquet_io(trace_file_path: str) -> Tuple[MetaData, pd.DataFrame]:
     else:
         kineto_metadata = {}
 
+    columns, row_filter = _read_plan(pq_file.schema_arrow, analysis)
+    if row_filter is None:
+        table = pq_file.read(columns=columns)
+    else:
+        # row-group statistics on stream/correlation prune whole groups
+        table = pq.read_table(trace_file_path, columns=columns, filters=row_filter)
+
     # Explicitly use Arrow as the dataframe backend
-    df = pq_file.read().to_pandas(types_mapper=pd.ArrowDtype)
+    df = table.to_pandas(types_mapper=pd.ArrowDtype)
     print(f"Read {len(df)} trace events from parquet: {trace_file_path}")
     return kineto_metadata, df
 
 
 def _parse_trace_dataframe_parquet(
     trace_file_path: str,
+    analysis: Optional[str] = None,
 ) -> Tuple[MetaData, pd.DataFrame, TraceSymbolTable]:
-    kineto_metadata, df = _read_parquet_io(trace_file_path)
+    kineto_metadata, df = _read_parquet_io(trace_file_path, analysis)
 
     local_symbol_table: TraceSymbolTable = TraceSymbolTable()
 
@@ -160,55 +283,53 @@ def _filter_gpu_kernels_for_one_rank(
 
 
 def _add_iteration(df: pd.DataFrame, symbol_table: TraceSymbolTable) -> pd.DataFrame:
-    # Build profiler_step dataframe
-    sym_tab = pd.Series(symbol_table.sym_table)
-    profiler_step_ids = pd.Series(symbol_table.sym_index)
-    profiler_step_ids = profiler_step_ids[
-        profiler_step_ids.index.str.startswith("ProfilerStep")
-    ].sort_index()
-
-    profiler_steps = df.loc[
-        df["name_id"].isin(profiler_step_ids.values), ["ts", "dur", "name_id"]
-    ].copy()
+    # iteration number per ProfilerStep symbol id; one regex per symbol
+    step_iters = {
+        sym_id: int(re.search(r"\d+", sym).group(0))
+        for sym, sym_id in symbol_table.get_sym_id_map().items()
+        if sym.startswith("ProfilerStep")
+    }
+
+    is_step = df["name_id"].isin(list(step_iters)).to_numpy(dtype=bool)
+    profiler_steps = df.loc[is_step, ["ts", "dur", "name_id"]].copy()
     if profiler_steps.empty:
         df["iteration"] = -1
         return profiler_steps  # keep contract
 
-    # Vectorized extraction of iteration numbers from symbol names
-    profiler_steps["iter_idx"] = (
-        profiler_steps["name_id"]
-        .map(lambda i: re.search(r"\d+", sym_tab[i]).group(0))
-        .astype(int)
-    )
-
-    # Construct bounds: [start, end)
-    bounds = profiler_steps[["ts", "dur"]].to_numpy()
-    bounds[:, 1] = bounds[:, 0] + bounds[:, 1]
-    # iter_labels = profiler_steps["iter_str"].to_numpy()
-    iter_ids = profiler_steps["iter_idx"].to_numpy()
-
-    # Assign iterations for CPU events (stream < 0)
-    cpu_mask = df["stream"] < 0
-    ts_vals = df.loc[cpu_mask, "ts"].to_numpy()
-    iter_result = np.full_like(ts_vals, fill_value=-1, dtype=object)
+    profiler_steps["iter_idx"] = profiler_steps["name_id"].map(step_iters)
+    profiler_steps.sort_values(by="ts", inplace=True)
 
-    for i, (start, end) in enumerate(bounds):
-        mask = (ts_vals >= start) & (ts_vals < end)
-        iter_result[mask] = iter_ids[i]
+    # Steps are non-overlapping [start, end) bounds sorted by start, so each
+    # event falls in the last step starting at or before it, if before its end.
+    starts = profiler_steps["ts"].to_numpy(dtype=np.float64, na_value=np.nan)
+    ends = starts + profiler_steps["dur"].to_numpy(dtype=np.float64, na_value=np.nan)
+    iter_ids = profiler_steps["iter_idx"].to_numpy(dtype=np.int64)
 
-    df.loc[cpu_mask, "iteration"] = iter_result
+    iteration = np.full(len(df), -1, dtype=np.int64)
+    stream = df["stream"].to_numpy()
 
-    # Assign iterations for GPU events (stream > 0) using index_correlation
-    gpu_mask = df["stream"] > 0
-    corr_idx = df.loc[gpu_mask, "index_correlation"].to_numpy()
-    # fallback to -1 for bad index
-    iter_series = df["iteration"]
-    valid_mask = (corr_idx > 0) & (corr_idx < len(df))
-    gpu_result = np.full(len(corr_idx), -1, dtype=object)
-    gpu_result[valid_mask] = iter_series.iloc[corr_idx[valid_mask]].to_numpy()
-    df.loc[gpu_mask, "iteration"] = gpu_result
-
-    df["iteration"] = pd.to_numeric(df["iteration"], downcast="integer")
+    # Assign iterations for CPU events (stream < 0)
+    cpu_mask = stream < 0
+    ts_vals = df["ts"].to_numpy(dtype=np.float64, na_value=np.nan)[cpu_mask]
+    step = np.searchsorted(starts, ts_vals, side="right") - 1
+    in_step = (step >= 0) & (ts_vals < ends[np.maximum(step, 0)])
+    iteration[cpu_mask] = np.where(in_step, iter_ids[np.maximum(step, 0)], -1)
+
+    # Assign iterations for GPU events (stream > 0) from their CPU launch,
+    # gathering by the "index" label that index_correlation refers to
+    gpu_mask = stream > 0
+    if "index_correlation" in df.columns and gpu_mask.any():
+        labels = df["index"].to_numpy(dtype=np.int64)
+        label_pos = np.full(labels.max() + 1, -1, dtype=np.int64)
+        label_pos[labels] = np.arange(len(labels))
+
+        corr_idx = df["index_correlation"].to_numpy(dtype=np.int64)[gpu_mask]
+        # fallback to -1 for bad index
+        valid_mask = (corr_idx > 0) & (corr_idx < len(label_pos))
+        pos = np.where(valid_mask, label_pos[np.where(valid_mask, corr_idx, 0)], -1)
+        iteration[gpu_mask] = np.where(pos >= 0, iteration[pos], -1)
+
+    df["iteration"] = pd.to_numeric(iteration, downcast="integer")
 
     return profiler_steps
 
@@ -312,8 +433,10 @@ def _add_fwd_bwd_links(df: pd.DataFrame) -> None:
     df.drop(columns=["key"], inplace=True)
 
 
-def load_trace(trace_file_path: str):
-    meta, df, local_symbol_table = _parse_trace_file(trace_file_path)
+def load_trace(trace_file_path: str, analysis: Optional[str] = None):
+    """Load and preprocess a trace; pass an analysis name to read only what
+    it needs (see ANALYSIS_COLUMNS), or None for the full trace."""
+    meta, df, local_symbol_table = _parse_trace_file(trace_file_path, analysis)
     df = _align_and_filter_trace(df, local_symbol_table)
     df = df.set_index("index", drop=False)
     df.index.names = [None]
@@ -323,35 +446,78 @@ def load_trace(trace_file_path: str):
 # ===== Trace analysis =====
 
 
-def _merge_kernel_intervals(kernel_df: pd.DataFrame) -> pd.DataFrame:
+class MergedIntervals(NamedTuple):
+    """Sorted, non-overlapping [start, end) intervals from merge_intervals."""
+
+    starts: np.ndarray
+    ends: np.ndarray
+
+    def union_length(self):
+        # differences of end - ts are commutative
+        return self.ends.sum() - self.starts.sum()
+
+    def span(self):
+        return self.ends[-1] - self.starts[0]
+
+    def idle_gaps(self) -> np.ndarray:
+        return self.starts[1:] - self.ends[:-1]
+
+    def overlap_length(self, other: "MergedIntervals"):
+        """
+        Time covered by both sets. The running status changes by 1 and -1 when
+        an interval of self starts and ends, by 2 and -2 for other; both are
+        active while it is 3. Unlike |A| + |B| - |A u B|, an inverted interval
+        (a zero-duration kernel with fractional ts, after rounding) only dips
+        the status and takes nothing off the overlap.
+        """
+        n, m = len(self.starts), len(other.starts)
+        time = np.concatenate([self.starts, self.ends, other.starts, other.ends])
+        status = np.repeat(np.array([1, -1, 2, -2], dtype=np.int8), [n, n, m, m])
+        order = np.argsort(time, kind="stable")
+        time, running = time[order], np.cumsum(status[order])
+        return np.diff(time)[running[:-1] == 3].sum()
+
+
+def merge_intervals(ts: np.ndarray, end: np.ndarray) -> MergedIntervals:
     """
-    Merge all kernel intervals in the given dataframe such that there are no overlapping.
+    Merge [ts, end) intervals such that there are no overlapping, in one sort
+    and one pass. An interval starting exactly where the running end is joins
+    the current group.
     """
-    kernel_df.sort_values(by="ts", inplace=True)
-    kernel_df["end"] = kernel_df["ts"] + kernel_df["dur"]
-    # Operators within the same group need to be merged together to form a larger interval.
-    conds = (
-        (kernel_df["ts"] > kernel_df["end"].shift().cummax())
-        .fillna(False)
-        .astype(np.int8)
-    )
-    kernel_df["group"] = conds.cumsum()
+    if len(ts) == 0:
+        return MergedIntervals(ts[:0], end[:0])
+    order = np.argsort(ts, kind="stable")
+    ts, end = ts[order], end[order]
+    run_end = np.maximum.accumulate(end)
+    new_group = np.empty(len(ts), dtype=bool)
+    new_group[0] = True
+    np.greater(ts[1:], run_end[:-1], out=new_group[1:])
+    first = np.flatnonzero(new_group)
+    return MergedIntervals(ts[first], np.maximum.reduceat(end, first))
+
+
+def _interval_arrays(kernel_df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    ts = _to_numpy(kernel_df["ts"])
+    return ts, ts + _to_numpy(kernel_df["dur"])
 
-    kernel_df = (
-        kernel_df.groupby("group", as_index=False)
-        .agg({"ts": "min", "end": "max"})
-        .drop(["group"], axis=1)
-        .sort_values(by="ts")
-    )
-    return kernel_df
+
+def _to_numpy(col: pd.Series) -> np.ndarray:
+    if pd.api.types.is_integer_dtype(col.dtype) and not col.hasnans:
+        return col.to_numpy(dtype=np.int64)
+    return col.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _merge_kernel_intervals(kernel_df: pd.DataFrame) -> MergedIntervals:
+    """
+    Merge all kernel intervals in the given dataframe such that there are no overlapping.
+    """
+    return merge_intervals(*_interval_arrays(kernel_df))
 
 
 def _get_idle_time_for_kernels(kernels_df: pd.DataFrame) -> Tuple[int, int]:
     merged_kernels = _merge_kernel_intervals(kernels_df)
-    kernel_time = merged_kernels.iloc[-1]["end"] - merged_kernels.iloc[0]["ts"]
-    # differences of end - ts are commutative
-    kernel_run_time = merged_kernels.end.sum() - merged_kernels.ts.sum()
-    return kernel_time - kernel_run_time, kernel_time
+    kernel_time = merged_kernels.span()
+    return merged_kernels.idle_gaps().sum(), kernel_time
 
 
 def get_temporal_breakdown(trace_df: pd.DataFrame, rank: int) -> pd.DataFrame:
@@ -386,9 +552,9 @@ def get_temporal_breakdown(trace_df: pd.DataFrame, rank: int) -> pd.DataFrame:
 
     # Isolate computation kernels and merge each one of them.
     comp_kernels = _merge_kernel_intervals(
-        gpu_kernels[gpu_kernels["kernel_type"].eq(KernelType.COMPUTATION.name)].copy()
+        gpu_kernels[gpu_kernels["kernel_type"].eq(KernelType.COMPUTATION.name)]
     )
-    compute_time = comp_kernels.end.sum() - comp_kernels.ts.sum()
+    compute_time = comp_kernels.union_length()
     non_compute_time = kernel_time - compute_time - idle_time
 
     assert idle_time <= kernel_time
@@ -431,70 +597,44 @@ def get_temporal_breakdown(trace_df: pd.DataFrame, rank: int) -> pd.DataFrame:
 def _get_gpu_kernel_type_time(
     gpu_kernels: pd.DataFrame, kernel_type_to_analysis: List[str]
 ) -> pd.DataFrame:
-    overlap_kernel_type_df = pd.DataFrame(
-        {
-            "status": pd.Series(dtype="str"),
-            "time": pd.Series(dtype="int"),
-        }
-    )
-
-    kernel_t_mapping: Dict[str, int] = defaultdict(int)
+    # Each kernel type gets one bit; its merged intervals add the bit at the
+    # start and remove it at the end. One sort and one cumsum over all events
+    # give the set of running types between consecutive events.
+    ts, end = _interval_arrays(gpu_kernels)
+    kernel_types = gpu_kernels["kernel_type"].to_numpy()
+    times: List[np.ndarray] = []
+    status: List[np.ndarray] = []
     for idx, kernel_type in enumerate(kernel_type_to_analysis):
         value = 1 << idx
-        kernel_t_mapping[kernel_type] = value
-        kernel_t_df = _merge_kernel_intervals(
-            gpu_kernels[gpu_kernels["kernel_type"].eq(kernel_type)].copy()
-        )
-
-        overlap_kernel_type_df = (
-            pd.concat(
-                [
-                    overlap_kernel_type_df,
-                    kernel_t_df.melt(var_name="status", value_name="time").replace(
-                        {"ts": value, "end": -value}
-                    ),
-                ]
-            )
-            .sort_values(by="time")
-            .reset_index(drop=True)
+        is_type = kernel_types == kernel_type
+        merged = merge_intervals(ts[is_type], end[is_type])
+        times += [merged.starts, merged.ends]
+        status += [np.full(len(merged.starts), value), np.full(len(merged.ends), -value)]
+
+    time = np.concatenate(times)
+    delta = np.concatenate(status)
+    # at equal times, ends sort before starts
+    order = np.lexsort((delta, time))
+    running = np.cumsum(delta[order])[:-1]
+    dur = np.diff(time[order]).astype(np.int64)
+    busy = running > 0
+    running, dur = running[busy], dur[busy]
+
+    # one label per bitmask that occurs, e.g. "COMPUTATION overlapping MEMORY"
+    total = np.bincount(running, weights=dur).astype(np.int64)
+    occurring = np.flatnonzero(np.bincount(running))
+    labels = [
+        " overlapping ".join(
+            k_t for idx, k_t in enumerate(kernel_type_to_analysis) if running & (1 << idx)
         )
-
-    overlap_kernel_type_df["running"] = overlap_kernel_type_df["status"].cumsum()
-    overlap_kernel_type_df["next_time"] = overlap_kernel_type_df["time"].shift(-1)
-    unique_running = overlap_kernel_type_df["running"].unique()
-    running_mapping: Dict[int, str] = defaultdict(str)
-    for u_running in unique_running:
-        if u_running > 0:
-            for k_t, v_t in kernel_t_mapping.items():
-                if u_running & v_t:
-                    if u_running not in running_mapping:
-                        running_mapping[u_running] = k_t
-                    else:
-                        # FIXME linter mismatch between fbcode and git T183519933
-                        # fmt: off
-                        running_mapping[u_running] = (
-                            f"{running_mapping[u_running]} overlapping {k_t}"
-                        )
-                        # fmt: on
-
-    overlap_kernel_type_df["kernel_type"] = ""
-    overlap_kernel_type_df = overlap_kernel_type_df[
-        overlap_kernel_type_df["running"] > 0
+        for running in occurring
     ]
-    for running in running_mapping:
-        overlap_kernel_type_df.loc[
-            overlap_kernel_type_df["running"].eq(running), "kernel_type"
-        ] = running_mapping[running]
-    overlap_kernel_type_df["dur"] = (
-        overlap_kernel_type_df["next_time"] - overlap_kernel_type_df["time"]
-    ).astype(int)
-
-    overlap_kernel_type_df = overlap_kernel_type_df.groupby(by=["kernel_type"])[
-        "dur"
-    ].agg(["sum"])
-    overlap_kernel_type_df.reset_index(inplace=True)
 
-    return overlap_kernel_type_df
+    return (
+        pd.DataFrame({"kernel_type": labels, "sum": total[occurring]})
+        .sort_values(by="kernel_type")
+        .reset_index(drop=True)
+    )
 
 
 def get_gpu_kernel_breakdown_by_type(trace_df: pd.DataFrame, rank: int) -> pd.DataFrame:
@@ -710,37 +850,12 @@ def _get_comm_comp_overlap_value(trace_df: pd.DataFrame) -> float:
 
     # Isolate communication and computation kernels and merge each one of them.
     comp_kernels = _merge_kernel_intervals(
-        gpu_kernels[gpu_kernels["kernel_type"].eq(KernelType.COMPUTATION.name)].copy()
+        gpu_kernels[gpu_kernels["kernel_type"].eq(KernelType.COMPUTATION.name)]
     )
     comm_kernels = _merge_kernel_intervals(
-        gpu_kernels[gpu_kernels["kernel_type"].eq(KernelType.COMMUNICATION.name)].copy()
-    )
-
-    # When a communication kernel starts and ends, the cumulative status is changed by 1 and -1;
-    # when a computation kernel starts and ends, the cumulative status is changed by 2 and -2.
-    status_df = (
-        pd.concat(
-            [
-                comm_kernels.melt(var_name="status", value_name="time").replace(
-                    {"ts": 1, "end": -1}
-                ),
-                comp_kernels.melt(var_name="status", value_name="time").replace(
-                    {"ts": 2, "end": -2}
-                ),
-            ]
-        )
-        .sort_values(by="time")
-        .reset_index(drop=True)
+        gpu_kernels[gpu_kernels["kernel_type"].eq(KernelType.COMMUNICATION.name)]
     )
-    status_df["running"] = status_df["status"].cumsum()
-    # Time intervals when status is 3 indicate overlapping communication and computation kernels.
-    overlap = status_df[status_df["running"].eq(3)]
-    shifted_overlap = overlap.merge(
-        status_df.shift(-1).dropna(), left_index=True, right_index=True
-    )
-    return (shifted_overlap["time_y"] - shifted_overlap["time_x"]).sum() / (
-        comm_kernels["end"] - comm_kernels["ts"]
-    ).sum()
+    return comm_kernels.overlap_length(comp_kernels) / comm_kernels.union_length()
 
 
 def get_comm_comp_overlap(trace_df: pd.DataFrame, rank: int) -> pd.DataFrame:
@@ -835,6 +950,7 @@ def get_memory_bw_time_series(trace_df: pd.DataFrame, rank: int) -> pd.DataFrame
 def local_trace_analysis(
     trace_file: str,
     analysis_func: str,
+    rank: int = 0,
 ) -> Optional["AnalysisResult"]:
     import time
     from hta_json import AnalysisResult
@@ -843,18 +959,18 @@ def local_trace_analysis(
 
     # Phase 1: IO only (Parquet read into DataFrame)
     t0 = time.perf_counter()
-    _read_parquet_io(trace_file)
+    _read_parquet_io(trace_file, analysis_func)
     t1 = time.perf_counter()
 
     # Phase 2: full load (IO + post-processing)
-    _, trace_df, _ = load_trace(trace_file)
+    _, trace_df, _ = load_trace(trace_file, analysis_func)
     t2 = time.perf_counter()
 
     # Phase 3: analysis
     try:
         current_module = sys.modules[__name__]
         analysis_func = getattr(current_module, analysis_func)
-        result = analysis_func(trace_df, 0)
+        result = analysis_func(trace_df, rank)
     except AttributeError:
         print(f"Analysis function {analysis_func} not found")
         return None
@@ -869,14 +985,157 @@ def local_trace_analysis(
     )
 
 
+# ===== Multi-rank analysis =====
+
+
+def trace_rank(trace_file: str) -> Optional[int]:
+    """
+    Rank recorded by kineto_json_to_parquet: the rank column's row group
+    statistics, else a rank=<rank> parent directory (rank-partitioned
+    datasets), else distributedInfo in the kineto metadata.
+    """
+    pq_meta = pq.ParquetFile(trace_file).metadata
+    if pq_meta.num_row_groups > 0:
+        row_group = pq_meta.row_group(0)
+        for i in range(row_group.num_columns):
+            column = row_group.column(i)
+            if column.path_in_schema == "rank" and column.is_stats_set:
+                if column.statistics.has_min_max:
+                    return int(column.statistics.min)
+
+    partition = re.fullmatch(
+        r"rank=(\d+)", os.path.basename(os.path.dirname(os.path.abspath(trace_file)))
+    )
+    if partition:
+        return int(partition.group(1))
+
+    kineto_meta = (pq_meta.metadata or {}).get(b"kineto_metadata")
+    if kineto_meta is not None:
+        rank = json.loads(kineto_meta).get("distributedInfo", {}).get("rank")
+        if rank is not None:
+            return int(rank)
+    return None
+
+
+def _rank_trace_files(trace_dir: str) -> List[Tuple[int, str]]:
+    """
+    (rank, path) of every parquet trace in trace_dir, or in its rank=<rank>
+    directories, sorted by rank.
+    """
+    trace_files = sorted(
+        glob.glob(os.path.join(trace_dir, "*.parquet"))
+        + glob.glob(os.path.join(trace_dir, "rank=*", "*.parquet"))
+    )
+    rank_files: Dict[int, str] = {}
+    for trace_file in trace_files:
+        rank = trace_rank(trace_file)
+        if rank is None:
+            raise ValueError(f"No rank recorded in {trace_file}")
+        if rank in rank_files:
+            raise ValueError(
+                f"Rank {rank} recorded in both {rank_files[rank]} and {trace_file}"
+            )
+        rank_files[rank] = trace_file
+    return sorted(rank_files.items())
+
+
+def _init_rank_worker() -> None:
+    # One process per core already; keep Arrow from adding a thread per core
+    # on top of that.
+    pa.set_cpu_count(1)
+
+
+def _rank_trace_analysis(
+    task: Tuple[int, str, str]
+) -> Tuple[int, Optional["AnalysisResult"]]:
+    rank, trace_file, analysis_func = task
+    return rank, local_trace_analysis(trace_file, analysis_func, rank)
+
+
+def distributed_trace_analysis(
+    trace_dir: str,
+    analysis_func: str,
+    num_workers: Optional[int] = None,
+) -> Optional["AnalysisResult"]:
+    """
+    Run local_trace_analysis on every per-rank parquet trace in trace_dir
+    (separate files or a rank-partitioned dataset from kineto_json_to_parquet),
+    one rank per task in a process pool, and concatenate the results by rank.
+
+    Phase times are those of the slowest rank; total_time is the wall time
+    of the whole run, pool startup included.
+    """
+    import multiprocessing
+    import time
+    from concurrent.futures import ProcessPoolExecutor
+    from hta_json import AnalysisResult
+
+    t0 = time.perf_counter()
+    rank_files = _rank_trace_files(os.path.abspath(trace_dir))
+    if len(rank_files) == 0:
+        raise ValueError(f"No parquet traces found in {trace_dir}")
+    tasks = [(rank, trace_file, analysis_func) for rank, trace_file in rank_files]
+
+    num_workers = min(num_workers or os.cpu_count(), len(tasks))
+    if num_workers == 1:
+        rank_results = [_rank_trace_analysis(task) for task in tasks]
+    else:
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            max_workers=num_workers, mp_context=ctx, initializer=_init_rank_worker
+        ) as ex:
+            rank_results = list(ex.map(_rank_trace_analysis, tasks))
+
+    if any(res is None for _, res in rank_results):
+        return None
+
+    result_dfs = []
+    for rank, res in rank_results:
+        if res.result is None:
+            continue
+        if "rank" not in res.result.columns:
+            res.result.insert(0, "rank", rank)
+        result_dfs.append(res.result)
+    result = pd.concat(result_dfs, ignore_index=True) if result_dfs else None
+    t1 = time.perf_counter()
+
+    return AnalysisResult(
+        parse_time=max(res.parse_time for _, res in rank_results),
+        load_time=max(res.load_time for _, res in rank_results),
+        analysis_time=max(res.analysis_time for _, res in rank_results),
+        total_time=t1 - t0,
+        result=result,
+    )
+
+
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("Usage: python hta_parquet.py <input_parquet_path> <analysis_func>")
-        print(
-            "Available functions: get_temporal_breakdown, get_gpu_kernel_breakdown_all_kernels, get_comm_comp_overlap, get_memory_bw_time_series"
-        )
-        sys.exit(1)
-    trace_file = sys.argv[1]
-    analysis_func = sys.argv[2]
-    result_df = local_trace_analysis(trace_file, analysis_func)
-    print(result_df)
+    import argparse
+    from bench_json_vs_parquet import set_cpu_affinity
+
+    parser = argparse.ArgumentParser(
+        description="Run an HTA analysis on a parquet trace, or on a directory "
+        "of per-rank parquet traces"
+    )
+    parser.add_argument("trace", help="input parquet file or directory")
+    parser.add_argument(
+        "analysis_func",
+        help="Available functions: get_temporal_breakdown, "
+        "get_gpu_kernel_breakdown_by_type, get_gpu_kernel_breakdown_all_kernels, "
+        "get_comm_comp_overlap, get_memory_bw_time_series",
+    )
+    parser.add_argument(
+        "--cores",
+        "-c",
+        type=int,
+        default=None,
+        help="Number of CPU cores to use; a directory is analyzed with one "
+        "process per core (default: all)",
+    )
+    args = parser.parse_args()
+
+    cores = set_cpu_affinity(args.cores)
+    if os.path.isdir(args.trace):
+        result = distributed_trace_analysis(args.trace, args.analysis_func, len(cores))
+    else:
+        result = local_trace_analysis(args.trace, args.analysis_func)
+    print(result)
@@ -0,0 +1,498 @@
+"""Polars backend for the HTA analyses in hta_parquet.py.
+
+Reads the same Parquet schema (kineto_json_to_parquet.py) and returns the
+same results as the pandas versions, but every analysis is one lazy plan
+over scan_parquet. Polars reads only the columns and row groups the plan
+touches, and the preprocessing (stream normalization, timestamp rounding,
+alignment, last-ProfilerStep cut) is fused into the same plan.
+
+    trace = scan_trace("h100_trace.parquet")
+    get_temporal_breakdown(trace, 0)
+
+local_trace_analysis() is the exception: to report load and analysis time
+separately, as the other backends do, it collects the preprocessed trace
+first and runs the analysis over that frame.
+
+Ties between events with the same timestamp are kept in file order (stable
+sorts), where pandas' default quicksort leaves their order unspecified. Only
+the row order of same-ts rows in get_memory_bw_time_series can depend on it.
+"""
+
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+import polars as pl
+from hta.utils.utils import KernelType
+
+from hta_parquet import ANALYSIS_COLUMNS, LOAD_COLUMNS
+
+NCCL_KERNEL_RE = r"^nccl.*Kernel"
+MEMORY_KERNEL_RE = r"^(?:Memcpy|Memset|dma)"
+NCCL_COMPUTE_KERNEL_RE = r"^(?:nccl.*Kernel)|.*(?:Memcpy|Memset)|.*Sync"
+
+KERNEL_TYPES_TO_ANALYZE: List[str] = [
+    KernelType.COMPUTATION.name,
+    KernelType.COMMUNICATION.name,
+    KernelType.MEMORY.name,
+]
+
+
+# ===== Trace loading =====
+
+
+def _round_timestamps(schema: pl.Schema) -> List[pl.Expr]:
+    if schema["ts"].is_float():
+        # Don't floor directly, first find the end
+        end = (pl.col("ts") + pl.col("dur")).floor().cast(pl.Int64)
+        ts = pl.col("ts").ceil().cast(pl.Int64)
+        return [ts, (end - ts).alias("dur"), end.alias("end")]
+    if "end" not in schema:
+        return [(pl.col("ts") + pl.col("dur")).alias("end")]
+    return []
+
+
+def _is_gpu_kernel() -> pl.Expr:
+    # same split as hta_parquet._filter_gpu_kernels_with_cuda_sync
+    launched = (pl.col("stream") >= 0) & (pl.col("correlation") >= 0)
+    is_sync = pl.col("name").is_in(["Event Sync", "Context Sync"])
+    return launched.fill_null(False) | is_sync.fill_null(False)
+
+
+def scan_trace(trace_file_path: str) -> pl.LazyFrame:
+    """Lazy trace with hta_parquet.load_trace's preprocessing applied."""
+    lf = pl.scan_parquet(trace_file_path)
+    schema = lf.collect_schema()
+
+    lf = (
+        lf.with_columns(
+            pl.col("stream").cast(pl.Int64, strict=False).fill_null(-1),
+        )
+        .filter(
+            pl.col("dur").is_not_null()
+            & pl.col("cat").is_not_null()
+            & pl.col("cat").ne("Trace")
+        )
+        .with_columns(_round_timestamps(schema))
+        # align to the trace's first event
+        .with_columns(pl.col("ts") - pl.col("ts").min())
+        .with_columns(is_gpu=_is_gpu_kernel())
+    )
+
+    # Drop CPU events from the last ProfilerStep on, and GPU kernels that
+    # were not launched from the remaining CPU events (one row per matching
+    # launch, like the pandas merge). Traces without ProfilerStep
+    # annotations are kept whole.
+    is_step = pl.col("name").str.contains("ProfilerStep", literal=True).fill_null(False)
+    lf = lf.with_columns(
+        has_steps=is_step.any(),
+        last_start=pl.col("ts").filter(is_step & ~pl.col("is_gpu")).max(),
+    )
+
+    cpu_kept = lf.filter(
+        ~pl.col("is_gpu")
+        & (~pl.col("has_steps") | (pl.col("ts") < pl.col("last_start")))
+    )
+    gpu = lf.filter(pl.col("is_gpu"))
+    gpu_kept = pl.concat(
+        [
+            gpu.filter(pl.col("has_steps")).join(
+                cpu_kept.select("correlation"),
+                on="correlation",
+                how="inner",
+                maintain_order="left",
+            ),
+            gpu.filter(~pl.col("has_steps")),
+        ]
+    )
+
+    return pl.concat([gpu_kept, cpu_kept]).drop("is_gpu", "has_steps", "last_start")
+
+
+def _kernel_type() -> pl.Expr:
+    name = pl.col("name")
+    return (
+        pl.when(name.str.contains(NCCL_KERNEL_RE).fill_null(False))
+        .then(pl.lit(KernelType.COMMUNICATION.name))
+        .when(name.str.contains(MEMORY_KERNEL_RE).fill_null(False))
+        .then(pl.lit(KernelType.MEMORY.name))
+        .when(~name.str.contains(NCCL_COMPUTE_KERNEL_RE).fill_null(False))
+        .then(pl.lit(KernelType.COMPUTATION.name))
+        .otherwise(pl.lit(KernelType.OTHER.name))
+        .alias("kernel_type")
+    )
+
+
+def _gpu_kernels(trace: pl.LazyFrame) -> pl.LazyFrame:
+    return trace.filter(pl.col("stream").ne(-1)).with_columns(_kernel_type())
+
+
+def _merge_kernel_intervals(
+    kernels: pl.LazyFrame, by: Optional[str] = None
+) -> pl.LazyFrame:
+    """
+    Merge all kernel intervals (per `by` group) such that there are no
+    overlapping; returns disjoint (ts, end) rows sorted by ts.
+    """
+    keys = [by] if by else []
+
+    def per_group(expr: pl.Expr) -> pl.Expr:
+        return expr.over(keys) if keys else expr
+
+    # An interval starts a new group when it begins after every earlier end.
+    new_group = pl.col("ts") > per_group(pl.col("end").shift(1).cum_max())
+    return (
+        kernels.sort([*keys, "ts"], maintain_order=True)
+        .select(*keys, "ts", (pl.col("ts") + pl.col("dur")).alias("end"))
+        .with_columns(group=per_group(new_group.fill_null(False).cum_sum()))
+        .group_by([*keys, "group"])
+        .agg(pl.col("ts").min(), pl.col("end").max())
+        .drop("group")
+        .sort([*keys, "ts"])
+    )
+
+
+def _status_events(merged: pl.LazyFrame, status: pl.Expr) -> pl.LazyFrame:
+    """(time, status) rows: +status at each interval's ts, -status at its end."""
+    return pl.concat(
+        [
+            merged.select(pl.col("ts").alias("time"), status.alias("status")),
+            merged.select(pl.col("end").alias("time"), (-status).alias("status")),
+        ]
+    )
+
+
+def _run_time(merged: pl.LazyFrame, alias: str) -> pl.LazyFrame:
+    # differences of end - ts are commutative
+    return merged.select((pl.col("end").sum() - pl.col("ts").sum()).alias(alias))
+
+
+# ===== Trace analysis =====
+
+
+def get_temporal_breakdown(trace: pl.LazyFrame, rank: int) -> pl.DataFrame:
+    """returns idle_time (us) , compute_time (us), non_compute_time (us), total_time (us)"""
+    gpu_kernels = _gpu_kernels(trace)
+
+    merged = _merge_kernel_intervals(gpu_kernels)
+    kernel_time = merged.select(
+        (pl.col("end").last() - pl.col("ts").first()).alias("kernel_time(us)")
+    )
+    comp_kernels = _merge_kernel_intervals(
+        gpu_kernels.filter(pl.col("kernel_type") == KernelType.COMPUTATION.name)
+    )
+
+    idle = pl.col("kernel_time(us)") - pl.col("kernel_run_time")
+
+    def pctg(col: str) -> pl.Expr:
+        return (100 * (pl.col(col) / pl.col("kernel_time(us)"))).round(2)
+
+    return (
+        pl.concat(
+            [
+                kernel_time,
+                _run_time(merged, "kernel_run_time"),
+                _run_time(comp_kernels, "compute_time(us)"),
+            ],
+            how="horizontal",
+        )
+        .with_columns(pl.lit(rank).alias("rank"), idle.alias("idle_time(us)"))
+        .with_columns(
+            (
+                pl.col("kernel_time(us)")
+                - pl.col("compute_time(us)")
+                - pl.col("idle_time(us)")
+            ).alias("non_compute_time(us)")
+        )
+        .select(
+            "rank",
+            "idle_time(us)",
+            "compute_time(us)",
+            "non_compute_time(us)",
+            "kernel_time(us)",
+            pctg("idle_time(us)").alias("idle_time_pctg"),
+            pctg("compute_time(us)").alias("compute_time_pctg"),
+            pctg("non_compute_time(us)").alias("non_compute_time_pctg"),
+        )
+        .collect()
+    )
+
+
+def _overlap_labels(kernel_types: List[str]) -> Dict[int, str]:
+    # running bitmask -> "A overlapping B ..." in kernel_types order
+    return {
+        mask: " overlapping ".join(
+            k_t for idx, k_t in enumerate(kernel_types) if mask & (1 << idx)
+        )
+        for mask in range(1, 1 << len(kernel_types))
+    }
+
+
+def _get_gpu_kernel_type_time(
+    gpu_kernels: pl.LazyFrame, kernel_type_to_analysis: List[str]
+) -> pl.LazyFrame:
+    bits = {k_t: 1 << idx for idx, k_t in enumerate(kernel_type_to_analysis)}
+    merged = _merge_kernel_intervals(
+        gpu_kernels.filter(pl.col("kernel_type").is_in(kernel_type_to_analysis)),
+        by="kernel_type",
+    )
+    bit = pl.col("kernel_type").replace_strict(bits, return_dtype=pl.Int64)
+
+    # +bit when a kernel type starts running, -bit when it stops
+    return (
+        _status_events(merged, bit)
+        .sort("time", maintain_order=True)
+        .with_columns(
+            pl.col("status").cum_sum().alias("running"),
+            pl.col("time").shift(-1).alias("next_time"),
+        )
+        .filter(pl.col("running") > 0)
+        .group_by(
+            pl.col("running")
+            .replace_strict(_overlap_labels(kernel_type_to_analysis))
+            .alias("kernel_type")
+        )
+        .agg((pl.col("next_time") - pl.col("time")).sum().alias("sum"))
+        .sort("kernel_type")
+    )
+
+
+def get_gpu_kernel_breakdown_by_type(trace: pl.LazyFrame, rank: int) -> pl.DataFrame:
+    kernel_type_df = _get_gpu_kernel_type_time(
+        _gpu_kernels(trace), KERNEL_TYPES_TO_ANALYZE
+    )
+    return (
+        kernel_type_df.sort("sum", descending=True, maintain_order=True)
+        .with_columns(
+            ((pl.col("sum") / pl.col("sum").sum()) * 100).round(1).alias("percentage"),
+            pl.lit(int(rank)).alias("rank"),
+        )
+        .collect()
+    )
+
+
+def _aggr_gpu_kernel_time(
+    gpu_kernel_time: pl.LazyFrame,
+    num_kernels: int = 10,
+    duration_ratio: float = 0.8,
+    allowlist_names: Optional[List[str]] = None,
+) -> pl.LazyFrame:
+    """Per kernel_type: the top kernels by total duration, the rest as "others"."""
+
+    def by_type(expr: pl.Expr) -> pl.Expr:
+        return expr.over("kernel_type")
+
+    stats = (
+        gpu_kernel_time.group_by("kernel_type", "name")
+        .agg(
+            pl.col("dur").sum().alias("sum"),
+            pl.col("dur").max().alias("max"),
+            pl.col("dur").min().alias("min"),
+            pl.col("dur").mean().alias("mean"),
+            pl.col("dur").std().alias("std"),
+        )
+        .sort("kernel_type", "name")
+        .sort(["kernel_type", "sum"], descending=[False, True], maintain_order=True)
+        .with_columns(pl.col("std").fill_null(0))
+    )
+
+    # if there are more than num_kernels kernels, starting to aggregate kernels
+    many = by_type(pl.len()) > num_kernels
+    cumsum = by_type(pl.col("sum").cum_sum())
+    quantile = by_type(cumsum.quantile(duration_ratio, "linear"))
+    keep_idx = pl.col("name").is_in(allowlist_names or [])
+    is_other = (
+        many
+        & ~keep_idx
+        & ((cumsum > quantile) | (by_type(pl.int_range(pl.len())) >= num_kernels))
+    )
+
+    # When aggregating, every row is regrouped by name and the stats are taken
+    # over the per-name sums, as in the pandas version.
+    def regrouped(stat: str) -> pl.Expr:
+        over_sums = getattr(pl.col("sum"), stat)()
+        return (
+            pl.when(pl.col("many").first())
+            .then(over_sums)
+            .otherwise(pl.col(stat).first())
+            .alias(stat)
+        )
+
+    return (
+        stats.with_columns(
+            many.alias("many"),
+            pl.when(is_other).then(pl.lit("others")).otherwise(pl.col("name")).alias("name"),
+        )
+        .group_by("kernel_type", "name")
+        .agg(
+            pl.col("sum").sum(),
+            *[regrouped(stat) for stat in ("max", "min", "mean", "std")],
+        )
+        .with_columns(pl.col("std").fill_null(0))
+    )
+
+
+def get_gpu_kernel_breakdown_all_kernels(
+    trace: pl.LazyFrame, rank: int
+) -> pl.DataFrame:
+    duration_ratio = 0.8
+    num_kernels = 10
+
+    gpu_kernels = _gpu_kernels(trace).filter(
+        pl.col("kernel_type").is_in(KERNEL_TYPES_TO_ANALYZE)
+    )
+    return (
+        _aggr_gpu_kernel_time(
+            gpu_kernels, duration_ratio=duration_ratio, num_kernels=num_kernels
+        )
+        .select(
+            "name",
+            pl.col("sum").alias("sum (us)"),
+            pl.col("max").alias("max (us)"),
+            pl.col("min").alias("min (us)"),
+            pl.col("std").alias("stddev"),
+            pl.col("mean").alias("mean (us)"),
+            "kernel_type",
+            pl.lit(int(rank)).alias("rank"),
+        )
+        .sort("kernel_type", "name")
+        .collect()
+    )
+
+
+def _get_comm_comp_overlap_value(trace: pl.LazyFrame) -> pl.LazyFrame:
+    gpu_kernels = _gpu_kernels(trace)
+    comp_kernels = _merge_kernel_intervals(
+        gpu_kernels.filter(pl.col("kernel_type") == KernelType.COMPUTATION.name)
+    )
+    comm_kernels = _merge_kernel_intervals(
+        gpu_kernels.filter(pl.col("kernel_type") == KernelType.COMMUNICATION.name)
+    )
+
+    # When a communication kernel starts and ends, the cumulative status is changed by 1 and -1;
+    # when a computation kernel starts and ends, the cumulative status is changed by 2 and -2.
+    # Time intervals when status is 3 indicate overlapping communication and computation kernels.
+    overlap = (
+        pl.concat(
+            [
+                _status_events(comm_kernels, pl.lit(1)),
+                _status_events(comp_kernels, pl.lit(2)),
+            ]
+        )
+        .sort("time", maintain_order=True)
+        .with_columns(
+            pl.col("status").cum_sum().alias("running"),
+            pl.col("time").shift(-1).alias("next_time"),
+        )
+        .filter(pl.col("running").eq(3))
+        .select((pl.col("next_time") - pl.col("time")).sum().alias("overlap"))
+    )
+    return pl.concat(
+        [overlap, _run_time(comm_kernels, "comm_time")], how="horizontal"
+    ).select((pl.col("overlap") / pl.col("comm_time")).alias("comp_comm_overlap_ratio"))
+
+
+def get_comm_comp_overlap(trace: pl.LazyFrame, rank: int) -> pl.DataFrame:
+    return (
+        _get_comm_comp_overlap_value(trace)
+        .select(
+            pl.lit(rank).alias("rank"),
+            (100 * pl.col("comp_comm_overlap_ratio")).round(2).alias("comp_comm_overlap_pctg"),
+        )
+        .collect()
+    )
+
+
+def get_memory_bw_time_series(trace: pl.LazyFrame, rank: int) -> Optional[pl.DataFrame]:
+    name = pl.col("name")
+    memcpy_kernels = (
+        _gpu_kernels(trace)
+        .filter(pl.col("kernel_type") == KernelType.MEMORY.name)
+        .with_columns(
+            pl.when(name.str.starts_with("Memset"))
+            .then(pl.lit("Memset"))
+            .when(name.str.starts_with("Memcpy"))
+            .then(name.str.slice(0, 11))
+            .otherwise(pl.lit("Memcpy Unknown"))
+            .alias("name"),
+            # In case of 0 us duration events round it up to 1 us to avoid -ve values
+            # see https://github.com/facebookresearch/HolisticTraceAnalysis/issues/20
+            pl.when(pl.col("dur") == 0).then(1).otherwise(pl.col("dur")).alias("dur"),
+        )
+    )
+
+    # The end events have timestamps = start timestamp + duration
+    membw_time_series = pl.concat(
+        [
+            memcpy_kernels.select("ts", "pid", "name", "memory_bw_gbps"),
+            memcpy_kernels.select(
+                (pl.col("ts") + pl.col("dur")).alias("ts"),
+                "pid",
+                "name",
+                -pl.col("memory_bw_gbps"),
+            ),
+        ]
+    )
+    result_df = (
+        membw_time_series.sort("name", "ts", maintain_order=True)
+        .with_columns(pl.col("memory_bw_gbps").cum_sum().over("name"))
+        .collect()
+    )
+
+    if len(result_df) == 0:
+        return None
+    return result_df
+
+
+def local_trace_analysis(
+    trace_file: str,
+    analysis_func: str,
+    rank: int = 0,
+) -> Optional["AnalysisResult"]:
+    from hta_json import AnalysisResult
+
+    trace_file = os.path.abspath(trace_file)
+    if analysis_func not in ANALYSIS_COLUMNS:
+        print(f"Analysis function {analysis_func} not found")
+        return None
+
+    raw_columns = LOAD_COLUMNS + ANALYSIS_COLUMNS[analysis_func]
+    schema = pl.scan_parquet(trace_file).collect_schema()
+    raw_columns = [c for c in schema.names() if c in raw_columns]
+
+    # Phase 1: IO only (Parquet read into DataFrame)
+    t0 = time.perf_counter()
+    df = pl.read_parquet(trace_file, columns=raw_columns)
+    print(f"Read {len(df)} trace events from parquet: {trace_file}")
+    t1 = time.perf_counter()
+
+    # Phase 2: full load (IO + preprocessing), materialized so that phase 3
+    # times the analysis alone
+    analysis_columns = ["ts", "dur", "name", "stream"] + ANALYSIS_COLUMNS[analysis_func]
+    trace_df = scan_trace(trace_file).select(analysis_columns).collect()
+    t2 = time.perf_counter()
+
+    # Phase 3: analysis
+    current_module = sys.modules[__name__]
+    result = getattr(current_module, analysis_func)(trace_df.lazy(), rank)
+    t3 = time.perf_counter()
+
+    return AnalysisResult(
+        parse_time=t1 - t0,
+        load_time=t2 - t1,
+        analysis_time=t3 - t2,
+        total_time=t3 - t1,
+        result=result,
+    )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python hta_polars.py <input_parquet_path> <analysis_func>")
+        print(f"Available functions: {', '.join(ANALYSIS_COLUMNS)}")
+        sys.exit(1)
+    trace_file = sys.argv[1]
+    analysis_func = sys.argv[2]
+    result_df = local_trace_analysis(trace_file, analysis_func)
+    print(result_df)
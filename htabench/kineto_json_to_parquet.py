@@ -1,18 +1,30 @@
+import contextlib
 import gzip
-from typing import Any, Dict
+import io
+import multiprocessing
+import re
+from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO, Tuple
 import numpy as np
 import pyarrow as pa
 import json
 import pandas as pd
 import pyarrow.parquet as pq
+import argparse
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from hta.configs.parser_config import ParserConfig
+from hta_parquet import round_timestamps_arrow
 
 
 # The goal here is to convert a trace JSON file to a parquet file,
 # that contains only needed columns for HTA temporal breakdown analysis.
-def _convert_trace_json_to_parquet(trace_json_path: dict, parquet_path: str):
+def _convert_trace_json_to_parquet(
+    trace_json_path: dict,
+    parquet_path: str,
+    round_timestamps: bool = False,
+    rank: Optional[int] = None,
+):
     trace_record: Dict[str, Any] = {}
     if trace_json_path.endswith('.gz'):
         with gzip.open(trace_json_path, 'rb') as f:
@@ -70,7 +82,12 @@ def _convert_trace_json_to_parquet(trace_json_path: dict, parquet_path: str):
             if has_complex:
                 df[col] = df[col].apply(lambda x: json.dumps(x) if isinstance(x, (list, dict)) else ('' if pd.isna(x) else str(x)))
 
-    df["rank"] = 0
+    # Record the rank, so per-rank traces can be analyzed together. Kineto
+    # writes it to distributedInfo for distributed runs.
+    if rank is None:
+        rank = meta.get("distributedInfo", {}).get("rank", 0)
+    print(f"Rank: {rank}")
+    df["rank"] = rank
     df["rank"] = df["rank"].astype(np.int32)
 
     print(f'Final dtypes:\n{df.dtypes}')
@@ -85,6 +102,13 @@ def _convert_trace_json_to_parquet(trace_json_path: dict, parquet_path: str):
     print(f"Total dropped: {total_dropped} ({drop_pct:.2f}%)")
 
     table = pa.Table.from_pandas(df, preserve_index=False)
+    if round_timestamps:
+        # Store integer ts/dur/end as the parquet loader would round them,
+        # so loading can skip that stage.
+        ts, dur, end = round_timestamps_arrow(table["ts"], table["dur"])
+        table = table.set_column(table.schema.get_field_index("ts"), "ts", ts)
+        table = table.set_column(table.schema.get_field_index("dur"), "dur", dur)
+        table = table.append_column("end", end)
     existing_metadata = table.schema.metadata or {}
     # The metadata of parquet must be in bytes, so encode it as a json string for simplicity
     # and then encode it as bytes.
@@ -95,33 +119,459 @@ def _convert_trace_json_to_parquet(trace_json_path: dict, parquet_path: str):
     pq.write_table(table, parquet_path)
 
 
+# ===== Streaming conversion =====
+
+# Top-level trace event fields written by the streaming converter, with the
+# args from ParserConfig.get_default_args() after them.
+EVENT_FIELDS: List[Tuple[str, pa.DataType]] = [
+    ("ph", pa.large_string()),
+    ("cat", pa.large_string()),
+    ("name", pa.large_string()),
+    ("pid", pa.int64()),
+    ("tid", pa.int64()),
+    ("ts", pa.float64()),
+    ("dur", pa.float64()),
+    ("id", pa.int64()),
+    ("s", pa.large_string()),
+    ("bp", pa.large_string()),
+]
+
+# Events per row group, and per batch of Python dicts held in memory
+STREAM_BATCH_SIZE = 1 << 16
+
+_JSON_WS = re.compile(r"[ \t\n\r]*")
+
+
+def _arg_type(arg: Any) -> pa.DataType:
+    value_type = getattr(arg.value_type, "name", str(arg.value_type)).lower()
+    if value_type == "int":
+        return pa.int64()
+    if value_type == "float":
+        return pa.float64()
+    # String and Object args are stored as strings, lists and dicts as JSON
+    return pa.large_string()
+
+
+def trace_schema(round_timestamps: bool = False, rank_column: bool = True) -> pa.Schema:
+    """
+    The fixed schema of traces written by the streaming converter. Traces
+    in a rank-partitioned dataset leave rank to the directory names.
+    """
+    fields = [pa.field(name, pa_type) for name, pa_type in EVENT_FIELDS]
+    fields += [
+        pa.field(arg.name, _arg_type(arg)) for arg in ParserConfig.get_default_args()
+    ]
+    if rank_column:
+        fields.append(pa.field("rank", pa.int32()))
+    schema = pa.schema(fields)
+    if round_timestamps:
+        schema = schema.set(schema.get_field_index("ts"), pa.field("ts", pa.int64()))
+        schema = schema.set(schema.get_field_index("dur"), pa.field("dur", pa.int64()))
+        schema = schema.append(pa.field("end", pa.int64()))
+    return schema
+
+
+class _JSONStream:
+    """
+    Decodes one JSON value at a time from a text file, reading it in chunks
+    so only the current chunk and value are held in memory.
+    """
+
+    def __init__(self, f: TextIO, chunk_size: int = 1 << 22):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        chunk = self.f.read(self.chunk_size)
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        self.eof = not chunk
+        return not self.eof
+
+    def peek(self) -> str:
+        """The next non-whitespace character, without consuming it."""
+        while True:
+            self.pos = _JSON_WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of trace JSON")
+
+    def expect(self, c: str) -> None:
+        if self.peek() != c:
+            raise ValueError(
+                f"Expected {c!r} in trace JSON, got {self.buf[self.pos:self.pos + 20]!r}"
+            )
+        self.pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A number or literal ending at the chunk boundary may continue
+            # in the next chunk
+            if end == len(self.buf) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_trace_events(f: TextIO, meta: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the traceEvents of a Kineto trace one at a time. The other
+    top-level keys are added to meta as they are read; those written before
+    traceEvents (distributedInfo, in Kineto's output) are there by the time
+    the first event is yielded.
+    """
+    stream = _JSONStream(f)
+    stream.expect("{")
+    if stream.peek() == "}":
+        return
+    while True:
+        key = stream.value()
+        stream.expect(":")
+        if key == "traceEvents":
+            stream.expect("[")
+            if stream.peek() != "]":
+                while True:
+                    yield stream.value()
+                    if stream.peek() != ",":
+                        break
+                    stream.pos += 1
+            stream.expect("]")
+        else:
+            meta[key] = stream.value()
+        if stream.peek() != ",":
+            break
+        stream.pos += 1
+    stream.expect("}")
+
+
+def _to_int(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_float(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_str(value: Any) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return str(value)
+
+
+_COERCE: Dict[pa.DataType, Callable[[Any], Any]] = {
+    pa.int64(): _to_int,
+    pa.float64(): _to_float,
+    pa.large_string(): _to_str,
+}
+
+
+def _column_array(values: List[Any], pa_type: pa.DataType) -> pa.Array:
+    try:
+        return pa.array(values, type=pa_type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # e.g. numeric strings, or a list in a string column
+        coerce = _COERCE[pa_type]
+        return pa.array([coerce(v) for v in values], type=pa_type)
+
+
+def _events_to_batch(
+    events: List[Dict[str, Any]], schema: pa.Schema, rank: int, round_timestamps: bool
+) -> pa.RecordBatch:
+    columns: Dict[str, pa.Array] = {}
+    for name, pa_type in EVENT_FIELDS:
+        values = [ev.get(name) for ev in events]
+        if name in ("pid", "tid"):
+            # As the in-memory converter does: non-numeric ids become -1
+            values = [v if isinstance(v, int) else _to_int(v) for v in values]
+            values = [-1 if v is None else v for v in values]
+        columns[name] = _column_array(values, pa_type)
+
+    args = [ev.get("args") for ev in events]
+    args = [a if isinstance(a, dict) else {} for a in args]
+    for arg in ParserConfig.get_default_args():
+        values = [a.get(arg.raw_name, arg.default_value) for a in args]
+        pa_type = schema.field(arg.name).type
+        if pa.types.is_large_string(pa_type):
+            values = [_to_str(v) for v in values]
+        columns[arg.name] = _column_array(values, pa_type)
+
+    columns["rank"] = pa.array(np.full(len(events), rank, dtype=np.int32))
+    if round_timestamps:
+        columns["ts"], columns["dur"], columns["end"] = round_timestamps_arrow(
+            columns["ts"], columns["dur"]
+        )
+    return pa.RecordBatch.from_arrays(
+        [columns[name] for name in schema.names], schema=schema
+    )
+
+
+def _convert_trace_json_to_parquet_streaming(
+    trace_json_path: str,
+    parquet_path: str,
+    round_timestamps: bool = False,
+    rank: Optional[int] = None,
+    batch_size: int = STREAM_BATCH_SIZE,
+    rank_column: bool = True,
+) -> int:
+    """
+    Convert a trace like _convert_trace_json_to_parquet, parsing traceEvents
+    incrementally and writing one row group per batch_size events, so memory
+    stays bounded by the batch size rather than the trace size. Columns
+    follow trace_schema() for every trace. Returns the recorded rank.
+    """
+    if trace_json_path.endswith(".gz"):
+        f = gzip.open(trace_json_path, "rt", encoding="utf-8")
+    elif trace_json_path.endswith(".json"):
+        f = open(trace_json_path, "r", encoding="utf-8")
+    else:
+        raise ValueError(f"Invalid trace JSON path: {trace_json_path}")
+
+    schema = trace_schema(round_timestamps, rank_column)
+    meta: Dict[str, Any] = {}
+    initial_total_rows = 0
+    final_row_count = 0
+    with f, pq.ParquetWriter(parquet_path, schema) as writer:
+        events: List[Dict[str, Any]] = []
+        for event in iter_trace_events(f, meta):
+            initial_total_rows += 1
+            # These special pid cannot be converted to int64
+            if event.get("pid") in ("Spans", "Traces"):
+                continue
+            events.append(event)
+            if len(events) < batch_size:
+                continue
+            if rank is None:
+                rank = meta.get("distributedInfo", {}).get("rank", 0)
+            writer.write_batch(
+                _events_to_batch(events, schema, rank, round_timestamps)
+            )
+            final_row_count += len(events)
+            events = []
+
+        if rank is None:
+            rank = meta.get("distributedInfo", {}).get("rank", 0)
+        if events or final_row_count == 0:
+            writer.write_batch(
+                _events_to_batch(events, schema, rank, round_timestamps)
+            )
+            final_row_count += len(events)
+        # Keys after traceEvents are only known now, so the kineto metadata
+        # goes into the file footer rather than the schema.
+        writer.add_key_value_metadata({"kineto_metadata": json.dumps(meta)})
+
+    total_dropped = initial_total_rows - final_row_count
+    drop_pct = (total_dropped / initial_total_rows * 100) if initial_total_rows > 0 else 0
+    print(f"Rank: {rank}")
+    print("\n=== End-to-end summary ===")
+    print(f"Initial rows: {initial_total_rows}")
+    print(f"Final rows: {final_row_count}")
+    print(f"Total dropped: {total_dropped} ({drop_pct:.2f}%)")
+    return rank
+
+
+# ===== Batch conversion =====
+
+TRACE_JSON_SUFFIXES = (".json.gz", ".json")
+
+# e.g. rank3.json, trace_rank_3.pt.trace.json.gz, rank-3.json
+RANK_FILENAME_RE = re.compile(r"rank[-_]?(\d+)", re.IGNORECASE)
+
+
+def rank_from_filename(trace_json_path: str) -> Optional[int]:
+    match = RANK_FILENAME_RE.search(os.path.basename(trace_json_path))
+    return int(match.group(1)) if match else None
+
+
+def _trace_stem(file: str) -> str:
+    for suffix in TRACE_JSON_SUFFIXES:
+        if file.endswith(suffix):
+            return file[: -len(suffix)]
+    return file
+
+
+def _convert_one_trace(task: Tuple[str, str, bool, bool]) -> Tuple[str, str, int]:
+    trace_json_path, parquet_dir, round_timestamps, partitioned = task
+    stem = _trace_stem(os.path.basename(trace_json_path))
+    parquet_path = os.path.join(parquet_dir, f"{stem}.parquet")
+    if partitioned:
+        # The rank may only be known from the trace metadata, so write the
+        # file first and move it into its rank=<rank> directory after.
+        parquet_path = os.path.join(parquet_dir, f".{stem}.parquet.tmp")
+
+    # Keep the per-trace summaries of concurrent conversions apart
+    with contextlib.redirect_stdout(io.StringIO()):
+        rank = _convert_trace_json_to_parquet_streaming(
+            trace_json_path,
+            parquet_path,
+            round_timestamps,
+            rank_from_filename(trace_json_path),
+            rank_column=not partitioned,
+        )
+
+    if partitioned:
+        rank_dir = os.path.join(parquet_dir, f"rank={rank}")
+        os.makedirs(rank_dir, exist_ok=True)
+        final_path = os.path.join(rank_dir, f"{stem}.parquet")
+        os.replace(parquet_path, final_path)
+        parquet_path = final_path
+    return trace_json_path, parquet_path, rank
+
+
+def convert_trace_dir_to_parquet(
+    trace_json_dir: str,
+    parquet_dir: str,
+    round_timestamps: bool = False,
+    num_workers: Optional[int] = None,
+    partitioned: bool = False,
+) -> Dict[int, str]:
+    """
+    Convert every .json/.json.gz trace in trace_json_dir with the streaming
+    converter, one trace per task in a process pool, so all ranks share
+    trace_schema(). The rank is taken from the file name (rank<N>), else the
+    trace's distributedInfo. With partitioned, the output is one dataset of
+    <parquet_dir>/rank=<rank>/<trace>.parquet files.
+
+    Returns the parquet path of each rank.
+    """
+    trace_files = sorted(
+        os.path.join(trace_json_dir, file)
+        for file in os.listdir(trace_json_dir)
+        if file.endswith(TRACE_JSON_SUFFIXES)
+    )
+    if len(trace_files) == 0:
+        raise ValueError(f"No trace JSON files found in {trace_json_dir}")
+    stems = [_trace_stem(os.path.basename(f)) for f in trace_files]
+    if len(set(stems)) != len(stems):
+        raise ValueError(f"Traces with the same name in {trace_json_dir}")
+    os.makedirs(parquet_dir, exist_ok=True)
+    tasks = [(f, parquet_dir, round_timestamps, partitioned) for f in trace_files]
+
+    num_workers = min(num_workers or os.cpu_count(), len(tasks))
+    if num_workers == 1:
+        return _collect_ranks(map(_convert_one_trace, tasks))
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=num_workers, mp_context=ctx) as ex:
+        return _collect_ranks(ex.map(_convert_one_trace, tasks))
+
+
+def _collect_ranks(converted: Iterator[Tuple[str, str, int]]) -> Dict[int, str]:
+    rank_files: Dict[int, str] = {}
+    for trace_json_path, parquet_path, rank in converted:
+        print(f"{trace_json_path} -> {parquet_path} (rank {rank})")
+        if rank in rank_files:
+            raise ValueError(
+                f"Rank {rank} recorded for both {rank_files[rank]} and {parquet_path}"
+            )
+        rank_files[rank] = parquet_path
+    return rank_files
+
+
 # Either specify input and output directories, or a single input and output file.
-def convert_trace_json_to_parquet(trace_json_path_or_dir: str, parquet_path_or_dir: str):
+def convert_trace_json_to_parquet(
+    trace_json_path_or_dir: str,
+    parquet_path_or_dir: str,
+    round_timestamps: bool = False,
+    rank: Optional[int] = None,
+    streaming: bool = False,
+    num_workers: Optional[int] = None,
+    partitioned: bool = False,
+):
+    convert = (
+        _convert_trace_json_to_parquet_streaming
+        if streaming
+        else _convert_trace_json_to_parquet
+    )
     if os.path.isdir(trace_json_path_or_dir):
+        if rank is not None:
+            raise ValueError("A rank can only be given for a single trace file")
         if not os.path.isdir(parquet_path_or_dir):
             if parquet_path_or_dir.endswith('.parquet'):
                 raise ValueError(
                     f"Parquet path must be a directory, not a file: {parquet_path_or_dir}")
             os.makedirs(parquet_path_or_dir)
 
-        for file in os.listdir(trace_json_path_or_dir):
-            if file.endswith('.json'):
-                _convert_trace_json_to_parquet(os.path.join(trace_json_path_or_dir, file), os.path.join(
-                    parquet_path_or_dir, file.replace('.json', '.parquet')))
+        # Directories always stream, so every rank gets the same schema
+        convert_trace_dir_to_parquet(
+            trace_json_path_or_dir, parquet_path_or_dir, round_timestamps,
+            num_workers, partitioned)
     else:
-        if trace_json_path_or_dir.endswith('.json'):
+        if trace_json_path_or_dir.endswith(TRACE_JSON_SUFFIXES):
             if not parquet_path_or_dir.endswith('.parquet'):
                 raise ValueError(
                     f"Parquet path must be a file, not a directory: {parquet_path_or_dir}")
-            _convert_trace_json_to_parquet(
-                trace_json_path_or_dir, parquet_path_or_dir)
+            if rank is None:
+                rank = rank_from_filename(trace_json_path_or_dir)
+            convert(
+                trace_json_path_or_dir, parquet_path_or_dir, round_timestamps, rank)
         else:
             raise ValueError(
                 f"Invalid trace JSON path: {trace_json_path_or_dir}")
 
 
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("Usage: python kineto_json_to_parquet.py <input_json_path> <output_parquet_path>")
-        sys.exit(1)
-    convert_trace_json_to_parquet(sys.argv[1], sys.argv[2])
+    parser = argparse.ArgumentParser(
+        description="Convert Kineto trace JSON to parquet for hta_parquet.py"
+    )
+    parser.add_argument("input", help="input trace JSON file or directory")
+    parser.add_argument("output", help="output parquet file or directory")
+    parser.add_argument(
+        "--round-timestamps",
+        action="store_true",
+        help="store integer ts/dur/end, rounded as the parquet loader would",
+    )
+    parser.add_argument(
+        "--rank",
+        type=int,
+        default=None,
+        help="rank to record for a single trace (default: rank<N> in the file "
+        "name, else distributedInfo.rank, else 0)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="parse traceEvents incrementally and write row groups as they fill, "
+        "to bound memory on large traces (always on for directories)",
+    )
+    parser.add_argument(
+        "--cores",
+        "-c",
+        type=int,
+        default=None,
+        help="Number of CPU cores to use; a directory is converted with one "
+        "process per core (default: all)",
+    )
+    parser.add_argument(
+        "--partitioned",
+        action="store_true",
+        help="write a directory as one dataset partitioned by rank "
+        "(output/rank=<rank>/<trace>.parquet)",
+    )
+    args = parser.parse_args()
+
+    from bench_json_vs_parquet import set_cpu_affinity
+
+    cores = set_cpu_affinity(args.cores)
+    convert_trace_json_to_parquet(
+        args.input, args.output, args.round_timestamps, args.rank, args.stream,
+        len(cores), args.partitioned
+    )
@@ -34,14 +34,7 @@ convert_trace() {
     fi
 
     echo "Converting JSON to Parquet..."
-    # kineto_json_to_parquet.py dispatcher doesn't handle .gz, but the internal
-    # function does. Decompress first, convert, clean up.
-    TRACE_UNZIPPED="${TRACE_JSON%.gz}"
-    if [ ! -f "$TRACE_UNZIPPED" ]; then
-        gunzip -k "$TRACE_JSON"
-    fi
-    python3 "$SCRIPT_DIR/kineto_json_to_parquet.py" "$TRACE_UNZIPPED" "$TRACE_PARQUET"
-    /bin/rm -f "$TRACE_UNZIPPED"
+    python3 "$SCRIPT_DIR/kineto_json_to_parquet.py" "$TRACE_JSON" "$TRACE_PARQUET"
     echo ""
 }
 
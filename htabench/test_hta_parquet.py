@@ -0,0 +1,45 @@
+"""
+Tests for the interval analyses in hta_parquet
+"""
+import unittest
+
+import pandas as pd
+
+from hta_parquet import _round_timestamps, get_comm_comp_overlap
+
+
+def _kernels(rows):
+    df = pd.DataFrame(rows, columns=["name", "ts", "dur"])
+    df["stream"] = 7
+    return df
+
+
+class TestCommCompOverlap(unittest.TestCase):
+    """Test get_comm_comp_overlap against the status sweep HTA uses"""
+
+    def test_overlap(self):
+        """Test a communication kernel half covered by computation"""
+        df = _kernels([("ncclAllReduceKernel", 0, 4), ("gemm", 2, 8)])
+        result = get_comm_comp_overlap(df, 0)
+        self.assertEqual(result["comp_comm_overlap_pctg"].item(), 50.0)
+
+    def test_zero_duration_fractional_ts(self):
+        """Test that a rounded-inverted kernel does not reduce the overlap"""
+        # ts 5.5, dur 0 rounds to ts 6, end 5: an interval with dur -1
+        df = _kernels(
+            [
+                ("ncclAllReduceKernel", 0.0, 4.0),
+                ("ncclAllReduceKernel", 5.5, 0.0),
+                ("gemm", 2.0, 8.0),
+            ]
+        )
+        _round_timestamps(df)
+        self.assertEqual(df["dur"].tolist(), [4, -1, 8])
+
+        # overlap [2, 4) over a communication time of 4 - 1
+        result = get_comm_comp_overlap(df, 0)
+        self.assertEqual(result["comp_comm_overlap_pctg"].item(), 66.67)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -13,6 +13,7 @@ SCRIPT_DIR = Path(__file__).resolve().parent
 TAU_DIR = SCRIPT_DIR.parent / "tau-analysis"
 sys.path.insert(0, str(TAU_DIR))
 
+import suite_exec
 from suite_utils import read_v2_suites
 from analyze_suites import run_amr_tracesizes, run_amr_runtimes
 
@@ -27,17 +28,17 @@ def get_suitedir() -> Path:
 
 
 # analyze_tracesizes: per-profile bytes, written to trace_sizes.csv
-def analyze_tracesizes(suitedir: Path, suites):
+def analyze_tracesizes(suitedir: Path, adf):
     out = suitedir / "trace_sizes.csv"
     print(f"-INFO- writing trace sizes to {out}")
-    run_amr_tracesizes(suites, df_path=out, save=True)
+    run_amr_tracesizes(adf, df_path=out, save=True)
 
 
 # analyze_overhead: per-profile wall-clock + overhead vs baseline, via tau-analysis
-def analyze_overhead(suitedir: Path, suites):
+def analyze_overhead(suitedir: Path, adf):
     out = suitedir / "runtimes.csv"
     print(f"-INFO- writing runtimes to {out}")
-    run_amr_runtimes(suites, df_path=out, save=True)
+    run_amr_runtimes(adf, df_path=out, save=True)
 
 
 def main():
@@ -48,9 +49,12 @@ def main():
     if not suites:
         raise SystemExit(f"no suites found under {suitedir}")
 
+    # one pass over the profiles feeds both steps
+    adf = suite_exec.analyze_suites(suites, ["runtime", "tracesize", "evtcnt"]).to_pandas()
+
     # Comment out either step for partial trials.
-    analyze_tracesizes(suitedir, suites)
-    analyze_overhead(suitedir, suites)
+    analyze_tracesizes(suitedir, adf)
+    analyze_overhead(suitedir, adf)
 
 
 if __name__ == "__main__":
@@ -1,7 +1,7 @@
 import time
 from typing import Callable
 
-from orcareader import OrcaReader
+from orcareader import OrcaReader, spans
 from pathlib import Path
 
 import matplotlib.pyplot as plt
@@ -62,18 +62,18 @@ class DashboardData:
             .sort(["timestep", "swid"])
             .collect()
         )
-        return df.to_pandas()
+        return spans.to_pandas(df, "swid_stats")
 
     @timeit
     def get_swid_dura(self, swid: int) -> pd.DataFrame:
         gp = self.ord.get_glob_pattern("mpi_collectives")
-        df = (
+        df = spans.to_pandas(
             pl.scan_parquet(gp, parallel="columns")
             .filter(pl.col("swid") == swid)  # sort by rank
             .sort("rank")
             .select("rank", (pl.col("dura_ns") / 1e6).alias("dura_ms"))
-            .collect()
-            .to_pandas()
+            .collect(),
+            "swid_dura",
         )
         return df
 
@@ -87,13 +87,13 @@ class DashboardData:
         # subtract ts_ms_min from ts_ms
         ts_ms_min = ts_ms_expr.min()
         ts_ms_expr = ts_ms_expr - ts_ms_min
-        df = (
+        df = spans.to_pandas(
             pl.scan_parquet(gp, parallel="columns")
             .filter(pl.col("swid").is_between(swid - 8, swid + 5))
             .filter(pl.col("rank") == rank)
             .with_columns(dura_ms_expr, ts_ms_expr)
-            .collect()
-            .to_pandas()
+            .collect(),
+            "swid_data",
         )
         return df
 
@@ -104,7 +104,7 @@ class DashboardData:
         # subtract ts_ms_min from ts_ms
         ts_ms_min = ts_ms_expr.min()
         ts_ms_expr = ts_ms_expr - ts_ms_min
-        df = (
+        df = spans.to_pandas(
             pl.scan_parquet(gp, parallel="columns")
             .filter(pl.col("swid").is_between(swid - 8, swid + 5))
             .filter(pl.col("rank") == rank)
@@ -112,8 +112,8 @@ class DashboardData:
             # .filter(pl.col("depth").is_between(1, 2))
             .with_columns(dura_ms_expr, ts_ms_expr)
             # .filter(pl.col("dura_ms") > 50)
-            .collect()
-            .to_pandas()
+            .collect(),
+            "swid_rank_data",
         )
         return df
 
@@ -4,10 +4,21 @@ Provides modular interfaces for querying ORCA parquet traces:
 - OrcaReader: High-level interface returning DataFrames
 - OrcaIndex: Low-level interface returning file paths
 - Interval, IntervalIndex, Range: Range query primitives
+- profile_spans, span: Opt-in nested span profiling (Chrome trace export)
 """
 
 from .index import OrcaIndex
 from .interval import Interval, IntervalIndex, Range
 from .reader import OrcaReader
+from .spans import SpanRecorder, profile_spans, span
 
-__all__ = ["OrcaReader", "OrcaIndex", "Interval", "IntervalIndex", "Range"]
+__all__ = [
+    "OrcaReader",
+    "OrcaIndex",
+    "Interval",
+    "IntervalIndex",
+    "Range",
+    "SpanRecorder",
+    "profile_spans",
+    "span",
+]
@@ -9,6 +9,7 @@ from pathlib import Path
 import polars as pl
 
 from .interval import Interval, IntervalIndex, Range
+from .spans import span, traced
 
 logger = logging.getLogger(__name__)
 
@@ -29,7 +30,8 @@ class OrcaIndex:
         self._swid_index = IntervalIndex()  # swid -> mpi_collectives files
         self._tables: list[str] = []
         logger.info(f"Initializing OrcaIndex for {root}")
-        self._build_indices()
+        with span("OrcaIndex.build", "index"):
+            self._build_indices()
         logger.info(
             f"Index built: {len(self._tables)} tables, {len(self._ts_intervals)} timestep intervals"
         )
@@ -46,7 +48,8 @@ class OrcaIndex:
             return
 
         # Discover all tables
-        self._tables = [d.name for d in self.root.iterdir() if d.is_dir()]
+        with span("list_tables", "enumerate"):
+            self._tables = [d.name for d in self.root.iterdir() if d.is_dir()]
         logger.debug(f"Discovered tables: {self._tables}")
 
         # Build timestep intervals from mpi_collectives
@@ -56,7 +59,8 @@ class OrcaIndex:
             return
 
         logger.debug("Building timestep intervals from mpi_collectives")
-        ts_dirs = sorted(mpi_coll_root.iterdir())
+        with span("list_ts_dirs", "enumerate"):
+            ts_dirs = sorted(mpi_coll_root.iterdir())
         for ts_dir in ts_dirs:
             if not ts_dir.is_dir():
                 continue
@@ -80,8 +84,8 @@ class OrcaIndex:
 
         logger.info("Building SWID index from mpi_collectives (parallel scan)")
         try:
-            df = (
-                pl.read_parquet(
+            with span("read_swids", "decode"):
+                df = pl.read_parquet(
                     glob_pattern,
                     parallel="columns",
                     hive_partitioning=False,
@@ -89,14 +93,13 @@ class OrcaIndex:
                     rechunk=False,
                     include_file_paths="path",
                 )
-                .group_by("path")
-                .agg(
+            with span("swid_bounds", "compute"):
+                df = df.group_by("path").agg(
                     [
                         pl.col("swid").min().alias("swid_min"),
                         pl.col("swid").max().alias("swid_max"),
                     ]
                 )
-            )
 
             num_files = len(df)
             logger.debug(f"Polars scan completed: {num_files} files")
@@ -115,6 +118,7 @@ class OrcaIndex:
         except Exception as e:
             logger.error(f"Failed to build SWID index: {e}")
 
+    @traced("index")
     def query_ts(self, table: str, ts_range: Range) -> list[Path]:
         """Return file paths from table overlapping timestep range."""
         ts_start, ts_end = ts_range
@@ -134,11 +138,13 @@ class OrcaIndex:
             # Construct expected directory path
             ts_dir = table_root / f"ts={ts_interval.start}_{ts_interval.end}"
             if ts_dir.exists():
-                result.extend(ts_dir.glob("*.parquet"))
+                with span("glob", "enumerate"):
+                    result.extend(ts_dir.glob("*.parquet"))
 
         logger.debug(f"query_ts: found {len(result)} files")
         return sorted(result)
 
+    @traced("index")
     def query_swid(
         self, swid_range: Range, table: str = "mpi_collectives"
     ) -> list[Path]:
@@ -152,13 +158,15 @@ class OrcaIndex:
         logger.debug(f"query_swid: table={table}, range={swid_range}")
 
         if table == "mpi_collectives":
-            result = sorted(self._swid_index.query(query))
+            with span("interval_lookup", "index"):
+                result = sorted(self._swid_index.query(query))
             logger.debug(f"query_swid: found {len(result)} files")
             return result
 
         # For other tables: map swid -> mpi_collectives files -> timestep dirs -> other table files
         logger.debug(f"query_swid: mapping via mpi_collectives for table {table}")
-        mpi_files = self._swid_index.query(query)
+        with span("interval_lookup", "index"):
+            mpi_files = self._swid_index.query(query)
         if not mpi_files:
             logger.debug("query_swid: no matching mpi_collectives files")
             return []
@@ -174,7 +182,8 @@ class OrcaIndex:
             for ts_dir_name in ts_dirs:
                 ts_dir = table_root / ts_dir_name
                 if ts_dir.exists():
-                    result.extend(ts_dir.glob("*.parquet"))
+                    with span("glob", "enumerate"):
+                        result.extend(ts_dir.glob("*.parquet"))
 
         logger.debug(f"query_swid: found {len(result)} files")
         return sorted(result)
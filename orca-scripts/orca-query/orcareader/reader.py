@@ -9,6 +9,7 @@ import polars as pl
 
 from .index import OrcaIndex
 from .interval import Range
+from .spans import span, traced
 
 logger = logging.getLogger(__name__)
 
@@ -61,6 +62,7 @@ class OrcaReader:
         """Low-level access: return file paths for swid range (no reading)."""
         return self._index.query_swid(swid_range, table)
 
+    @traced("reader")
     def read_ts(self, table: str, ts_range: Range) -> pl.DataFrame:
         """Read table data for timestep range {ts_range}."""
         logger.info(f"read_ts: table={table}, range={ts_range}")
@@ -71,9 +73,12 @@ class OrcaReader:
             return pl.DataFrame()
 
         logger.debug(f"read_ts: reading {len(files)} files")
-        df = pl.read_parquet(files)
-        return _apply_trace_transforms(df)
+        with span("read_parquet", "decode", files=len(files)):
+            df = pl.read_parquet(files)
+        with span("transforms", "compute"):
+            return _apply_trace_transforms(df)
 
+    @traced("reader")
     def read_swid(
         self, swid_range: Range, table: str = "mpi_collectives"
     ) -> pl.DataFrame:
@@ -86,8 +91,10 @@ class OrcaReader:
             return pl.DataFrame()
 
         logger.debug(f"read_swid: reading {len(files)} files")
-        df = pl.read_parquet(files)
-        return _apply_trace_transforms(df)
+        with span("read_parquet", "decode", files=len(files)):
+            df = pl.read_parquet(files)
+        with span("transforms", "compute"):
+            return _apply_trace_transforms(df)
 
     def query_orca_events_files(self, ranks: Range | None = None) -> list[Path]:
         """Low-level access: return file paths for orca_events (no reading)."""
@@ -99,13 +106,16 @@ class OrcaReader:
         else:
             return list(orca_events_dir.glob("R*.parquet"))
 
+    @traced("reader")
     def read_orca_events(self, ranks: Range | None = None) -> pl.DataFrame:
         """Read orca_events table for specified rank range.
 
         Args:
             ranks: Range of rank numbers to read. If None, reads all ranks.
         """
-        files = self.query_orca_events_files(ranks)
+        with span("list_orca_events", "enumerate"):
+            files = self.query_orca_events_files(ranks)
         logger.info(f"read_orca_events: reading {len(files)} files")
-        df = pl.read_parquet(files)
+        with span("read_parquet", "decode", files=len(files)):
+            df = pl.read_parquet(files)
         return df
@@ -0,0 +1,218 @@
+"""Opt-in nested span profiling for orcareader and tracequery.
+
+Spans are no-ops unless recording is on, either for a block:
+
+    with profile_spans("trace.json") as rec:
+        OrcaQuery(trace_dir).count_sync_maxdur()
+    print(rec.summary())
+
+or for the whole process, by setting ORCA_SPANS=<path>; the Chrome trace is
+written to <path> at exit. Load it in chrome://tracing or ui.perfetto.dev.
+
+Categories used by the instrumented code: index, enumerate, decode, compute,
+pandas, plus the tracequery phases. Where collect() is used, the per-node
+timings from Polars' LazyFrame.profile() are recorded as child spans.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+import functools
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+import polars as pl
+
+logger = logging.getLogger(__name__)
+
+SPANS_ENV = "ORCA_SPANS"
+
+
+@dataclass
+class Span:
+    name: str
+    cat: str
+    start_us: float
+    dur_us: float
+    tid: int
+    depth: int
+    args: dict[str, Any] = field(default_factory=dict)
+
+
+class SpanRecorder:
+    """Collects completed spans; timestamps are microseconds since creation."""
+
+    def __init__(self):
+        self.spans: list[Span] = []
+        self._t0 = time.perf_counter_ns()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def now_us(self) -> float:
+        return (time.perf_counter_ns() - self._t0) / 1000
+
+    @property
+    def depth(self) -> int:
+        return getattr(self._local, "depth", 0)
+
+    @depth.setter
+    def depth(self, val: int) -> None:
+        self._local.depth = val
+
+    def add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def to_chrome_trace(self) -> dict:
+        """Chrome trace-event format: one complete ('X') event per span."""
+        pid = os.getpid()
+        events = [
+            {
+                "name": s.name,
+                "cat": s.cat,
+                "ph": "X",
+                "ts": s.start_us,
+                "dur": s.dur_us,
+                "pid": pid,
+                "tid": s.tid,
+                "args": {k: str(v) for k, v in s.args.items()},
+            }
+            for s in sorted(self.spans, key=lambda s: (s.start_us, s.depth))
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def dump(self, path: Path) -> None:
+        with open(path, "w") as f:
+            json.dump(self.to_chrome_trace(), f)
+        logger.info(f"Wrote {len(self.spans)} spans to {path}")
+
+    def summary(self) -> pl.DataFrame:
+        """Total time and count per (cat, name), slowest first."""
+        if not self.spans:
+            return pl.DataFrame()
+        df = pl.DataFrame(
+            {
+                "cat": [s.cat for s in self.spans],
+                "name": [s.name for s in self.spans],
+                "depth": [s.depth for s in self.spans],
+                "dur_us": [s.dur_us for s in self.spans],
+            }
+        )
+        return (
+            df.group_by(["cat", "name"])
+            .agg(
+                pl.len().alias("count"),
+                pl.col("depth").min(),
+                (pl.col("dur_us").sum() / 1000).alias("total_ms"),
+            )
+            .sort("total_ms", descending=True)
+        )
+
+
+_recorder: SpanRecorder | None = None
+
+
+def recording() -> bool:
+    return _recorder is not None
+
+
+@contextmanager
+def span(name: str, cat: str = "", **args: Any) -> Iterator[dict[str, Any]]:
+    """Record the enclosed block as a span, if recording.
+
+    Yields the args dict so callers can attach results (e.g. row counts).
+    """
+    rec = _recorder
+    if rec is None:
+        yield args
+        return
+
+    depth = rec.depth
+    rec.depth = depth + 1
+    start = rec.now_us()
+    try:
+        yield args
+    finally:
+        rec.depth = depth
+        rec.add(Span(name, cat, start, rec.now_us() - start, threading.get_ident(), depth, args))
+
+
+def traced(cat: str) -> Callable:
+    """Decorator: record each call of the function as a span named by its qualname."""
+
+    def wrap(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if _recorder is None:
+                return fn(*args, **kwargs)
+            with span(fn.__qualname__, cat):
+                return fn(*args, **kwargs)
+
+        return inner
+
+    return wrap
+
+
+def collect(lf: pl.LazyFrame, name: str = "collect", cat: str = "decode") -> pl.DataFrame:
+    """lf.collect(), recording Polars' per-node timings when profiling.
+
+    LazyFrame.profile() is missing in some Polars versions and fails on some
+    plans ("no data to time"); then the plain collect() is recorded instead.
+    """
+    rec = _recorder
+    if rec is None:
+        return lf.collect()
+
+    with span(name, cat) as args:
+        start = rec.now_us()
+        try:
+            df, timings = lf.profile()
+        except (AttributeError, pl.exceptions.ComputeError) as e:
+            args["polars_profile"] = f"unavailable: {e}"
+            df = lf.collect()
+        else:
+            depth = rec.depth
+            tid = threading.get_ident()
+            for node, beg, end in timings.iter_rows():
+                rec.add(Span(node, "polars", start + beg, end - beg, tid, depth))
+        args["rows"] = len(df)
+    return df
+
+
+def to_pandas(df: pl.DataFrame, name: str = "to_pandas"):
+    """df.to_pandas() as a 'pandas' span."""
+    with span(name, "pandas", rows=len(df)):
+        return df.to_pandas()
+
+
+@contextmanager
+def profile_spans(path: Path | None = None) -> Iterator[SpanRecorder]:
+    """Record spans from the enclosed block; optionally dump a Chrome trace."""
+    global _recorder
+    prev, _recorder = _recorder, SpanRecorder()
+    rec = _recorder
+    try:
+        yield rec
+    finally:
+        _recorder = prev
+        if path is not None:
+            rec.dump(Path(path))
+
+
+def _enable_from_env() -> None:
+    global _recorder
+    path = os.environ.get(SPANS_ENV)
+    if not path:
+        return
+    _recorder = SpanRecorder()
+    atexit.register(_recorder.dump, Path(path))
+
+
+_enable_from_env()
@@ -2,6 +2,8 @@ import re
 import otf2
 from polars.selectors import starts_with
 from suite_utils import *
+import suite_exec
+import overheads
 from dataclasses import dataclass
 import logging
 from pathlib import Path
@@ -14,20 +16,14 @@ import polars as pl
 class ParseOpts:
     suite_dir: Path
     save: bool = False
+    nworkers: int = 32
+    per_fs: int = 8
 
 
-def log_rdf_summary(rdf: pd.DataFrame):
-    # group by [profile, ranks, steps, and get mean of time_secs
-    rdf_agg = (
-        rdf.groupby(["steps", "ranks", "profile"])
-        .agg({"time_secs": "mean", "ratio": "mean"})
-        .reset_index()
-    )
-    # convert ratio to +x%
-    rdf_agg["ratio"] = rdf_agg["ratio"].apply(lambda x: f"+{(x-1)*100:.1f}%")
-    # pivot to make profiles a column
-    rdf_agg = rdf_agg.pivot(index=["steps", "ranks"], columns="profile", values="ratio")
-    print(rdf_agg.to_string())
+def log_rdf_summary(sdf: pl.DataFrame):
+    # one row per (steps, ranks), mean ratio per profile as +x%
+    with pl.Config(tbl_rows=-1, tbl_cols=-1):
+        print(overheads.overhead_pivot(sdf))
 
 
 def log_sdf_summary(sdf: pd.DataFrame):
@@ -67,45 +63,22 @@ def log_tstatsdf_summary(tdf: pd.DataFrame):
     print(tdf_agg.to_string())
 
 
-def run_amr_runtimes(suites: list[Suite], df_path: Path, save: bool = False):
-    all_rdf = [get_suite_amr_runtimes(suite) for suite in suites]
-    merged_rdf = pd.concat(all_rdf)
+SUITEDF_COLS = ["root", "name", "profile", "ranks", "aggs", "steps", "run_id"]
 
-    # (nranks, nsteps, run_id) is the primary key
-    merged_base = merged_rdf[merged_rdf["profile"] == "00_noorca"].copy()
-    merged_rdf = merged_rdf.merge(
-        merged_base,
-        on=["ranks", "steps", "run_id"],
-        how="left",
-        suffixes=("", "_base"),
-        validate="m:1",
-    )
-    merged_rdf["ratio"] = merged_rdf["time_secs"] / merged_rdf["time_secs_base"]
-    colstodrop = ["root_base", "name_base", "profile_base", "aggs_base"]
-    merged_rdf = merged_rdf.drop(columns=colstodrop)
-    # sort by: steps, ranks, agg, profile, run_id
-    merged_rdf = merged_rdf.sort_values(
-        by=["steps", "ranks", "aggs", "profile", "run_id"]
-    )
-    print(merged_rdf.to_string())
-    log_rdf_summary(merged_rdf)
+
+def run_amr_runtimes(adf: pd.DataFrame, df_path: Path, save: bool = False):
+    rdf, sdf = overheads.analyze_overheads(pl.from_pandas(adf[overheads.RUN_COLS]))
+    print(rdf.to_pandas().to_string())
+    log_rdf_summary(sdf)
 
     if save:
         logger.info(f"Writing output to: {df_path}")
-        merged_rdf.to_csv(df_path, index=False)
-
+        rdf.write_csv(df_path)
 
-def run_amr_tracesizes(suites: list[Suite], df_path: Path, save: bool = False):
-    all_sdf = []
 
-    for suite in suites:
-        sdf = get_suite_tracesizes(suite)
-        evtcnts = [profile.get_evtcnt() for profile in suite.profiles]
-        sdf["evtcnt"] = evtcnts
-
-        all_sdf.append(sdf)
-
-    merged_sdf = pd.concat(all_sdf)
+def run_amr_tracesizes(adf: pd.DataFrame, df_path: Path, save: bool = False):
+    merged_sdf = adf[SUITEDF_COLS + ["trace_size", "evtcnt"]].copy()
+    merged_sdf["trace_size"] = merged_sdf["trace_size"].fillna(0).astype("int64")
     print(merged_sdf.to_string())
     log_sdf_summary(merged_sdf)
 
@@ -114,17 +87,20 @@ def run_amr_tracesizes(suites: list[Suite], df_path: Path, save: bool = False):
         merged_sdf.to_csv(df_path, index=False)
 
 
-def run_tracestats(suites: list[Suite], df_path: Path, save: bool = False):
+def run_tracestats(opts: ParseOpts, suites: list[Suite], df_path: Path, save: bool = False):
     all_tdf = []
 
-    for suite in suites:
-        for p in suite.profiles:
-            tdf = p.get_tracestats_df()
-            tdf.insert(0, "suite", suite.name)
-            tdf.insert(1, "profile", p.name)
-            all_tdf.append(tdf)
-
-    merged_tdf = pd.concat(all_tdf)
+    results = suite_exec.map_profiles(
+        suites, lambda s, p: p.get_tracestats_df(), opts.nworkers, opts.per_fs
+    )
+    for suite, p, tdf in results:
+        if tdf is None:
+            continue
+        tdf.insert(0, "suite", suite.name)
+        tdf.insert(1, "profile", p.name)
+        all_tdf.append(tdf)
+
+    merged_tdf = pd.concat(all_tdf) if all_tdf else pd.DataFrame()
     log_tstatsdf_summary(merged_tdf)
 
     if save:
@@ -136,8 +112,15 @@ def parse_opts() -> ParseOpts:
     parser = argparse.ArgumentParser()
     parser.add_argument("--suite-dir", "-d", type=Path, required=True)
     parser.add_argument("--save", "-s", action="store_true", default=False)
+    parser.add_argument("--workers", "-w", type=int, default=32)
+    parser.add_argument("--per-fs", type=int, default=8, help="max concurrent profiles per filesystem")
     pargs = parser.parse_args()
-    return ParseOpts(suite_dir=pargs.suite_dir, save=pargs.save)
+    return ParseOpts(
+        suite_dir=pargs.suite_dir,
+        save=pargs.save,
+        nworkers=pargs.workers,
+        per_fs=pargs.per_fs,
+    )
 
 
 def run(opts: ParseOpts):
@@ -165,9 +148,13 @@ def run(opts: ParseOpts):
     logger.info(f"Will write tracesizes to: {sdf_path}")
     logger.info(f"Will write tracestats to: {tstats_path}")
 
-    run_amr_runtimes(suites, rdf_path, save=opts.save)
-    run_amr_tracesizes(suites, sdf_path, save=opts.save)
-    run_tracestats(suites, tstats_path, save=opts.save)
+    adf = suite_exec.analyze_suites(
+        suites, ["runtime", "tracesize", "evtcnt"], opts.nworkers, opts.per_fs
+    ).to_pandas()
+
+    run_amr_runtimes(adf, rdf_path, save=opts.save)
+    run_amr_tracesizes(adf, sdf_path, save=opts.save)
+    run_tracestats(opts, suites, tstats_path, save=opts.save)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,139 @@
+"""Extract walltime and per-cycle timings from Parthenon mpi.log files.
+
+Logs of 2000-step, 4096-rank runs are large, and both consumers only need a
+few lines:
+
+- get_walltime(): reads fixed-size blocks backwards from the end of the file
+  until the "walltime used" line is found (it is printed at exit)
+- get_cycles(): the whole file is read once as a Polars string column and
+  the cycle= lines are parsed with vectorized str.extract passes.
+  The result is cached as Parquet via suite_cache, keyed by the log's
+  size/mtime.
+
+read_mpi_log() returns both from a single read, and caches the walltime
+next to the cycles.
+"""
+
+import logging
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+import polars as pl
+
+import suite_cache
+
+logger = logging.getLogger(__name__)
+
+WALLTIME_RE = re.compile(rb"walltime used = (\d+\.\d+)")
+WALLTIME_BLOCKSZ = 64 << 10
+
+CYCLE_SCHEMA = {"cycle": pl.Int64, "wsec_total": pl.Float64, "wsec_step": pl.Float64}
+
+
+@dataclass
+class MpiLog:
+    walltime: float  # 0 if the run did not finish
+    cycles: pl.DataFrame  # cycle, wsec_total, wsec_step
+
+
+def _find_walltime(data: bytes) -> float | None:
+    mobjs = list(WALLTIME_RE.finditer(data))
+    return float(mobjs[-1].group(1)) if mobjs else None
+
+
+def get_walltime(log_path: Path, blocksz: int = WALLTIME_BLOCKSZ) -> float:
+    """Walltime from the last "walltime used" line, reading backwards; 0 if absent."""
+    with open(log_path, "rb") as f:
+        end = f.seek(0, 2)
+        frag = b""  # start of the later block, up to its first newline
+        while end > 0:
+            beg = max(0, end - blocksz)
+            f.seek(beg)
+            buf = f.read(end - beg) + frag
+            walltime = _find_walltime(buf)
+            if walltime is not None:
+                return walltime
+            nl = buf.find(b"\n")
+            frag = buf[:nl] if nl >= 0 else buf
+            end = beg
+
+    logger.debug(f"No walltime line in {log_path}")
+    return 0.0
+
+
+def _last_value(key: str) -> pl.Expr:
+    # last occurrence, like the greedy .* of the old per-line regex
+    # (wsec_step= also appears in zone-cycles/wsec_step=)
+    matches = pl.col("line").str.extract_all(rf"{key}=[0-9.e\-\+]+")
+    return matches.list.last().str.slice(len(key) + 1).alias(key)
+
+
+def parse_cycles(data: bytes) -> pl.DataFrame:
+    """cycle= lines of a log as (cycle, wsec_total, wsec_step)."""
+    if not data.strip():
+        return pl.DataFrame(schema=CYCLE_SCHEMA)
+
+    # one string column, one row per line (no separator or quoting applies)
+    lines = pl.read_csv(
+        data,
+        has_header=False,
+        separator="\x1f",
+        quote_char=None,
+        schema={"line": pl.String},
+        truncate_ragged_lines=True,
+        encoding="utf8-lossy",
+    ).filter(pl.col("line").str.starts_with("cycle"))
+
+    df = lines.with_columns(
+        pl.col("line").str.extract(r"^cycle=(\d+)").alias("cycle"),
+        _last_value("wsec_total"),
+        _last_value("wsec_step"),
+    )
+
+    bad = df.filter(pl.any_horizontal(pl.col(list(CYCLE_SCHEMA)).is_null()))
+    if len(bad) > 0:
+        raise ValueError(f"Failed to parse line: {bad['line'][0]}")
+
+    return df.select(list(CYCLE_SCHEMA)).cast(CYCLE_SCHEMA)
+
+
+def _read_mpi_log(log_path: Path) -> MpiLog:
+    data = Path(log_path).read_bytes()
+    walltime = _find_walltime(data) or 0.0
+    cycles = parse_cycles(data)
+    return MpiLog(walltime=walltime, cycles=cycles)
+
+
+def get_cycles(log_path: Path, cached: bool = True) -> pl.DataFrame:
+    """Per-cycle timings of a log, cached as Parquet per log."""
+    return suite_cache.memoize(
+        "mpilog_cycles",
+        Path(log_path),
+        lambda: _read_mpi_log(log_path).cycles,
+        cached=cached,
+    )
+
+
+def read_mpi_log(log_path: Path, cached: bool = True) -> MpiLog:
+    """Walltime and cycle timings, both cached per log.
+
+    A miss costs one read of the log; a hit only a stat.
+    """
+    log_path = Path(log_path)
+    fp = suite_cache.fingerprint(log_path)
+    log = None
+
+    def read() -> MpiLog:
+        nonlocal log
+        if log is None:
+            log = _read_mpi_log(log_path)
+        return log
+
+    cycles = suite_cache.memoize(
+        "mpilog_cycles", log_path, lambda: read().cycles, cached=cached, fp=fp
+    )
+    walltime = suite_cache.memoize(
+        "mpilog_walltime", log_path, lambda: read().walltime, cached=cached, fp=fp
+    )
+    return MpiLog(walltime=walltime, cycles=cycles)
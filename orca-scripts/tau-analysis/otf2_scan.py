@@ -0,0 +1,140 @@
+"""Parallel event counting and per-region extraction for OTF2 archives.
+
+TAU and Score-P write one OTF2 archive per run, with one location per rank
+(plus threads). Two entry points:
+
+- count_events(): total events, taken from the Location definitions
+  (number_of_events) without reading event files; archives whose writer left
+  those counts at zero are scanned instead
+- scan_region_counts(): per-(rank, location, region) Enter counts plus total
+  events per location. Locations are split across a process pool, balanced by
+  their event counts, and each worker reads only its own locations.
+"""
+
+import heapq
+import logging
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import otf2
+import polars as pl
+
+logger = logging.getLogger(__name__)
+
+REGION_COUNTS_SCHEMA = {
+    "rank": pl.Int32,
+    "location": pl.Int64,
+    "region": pl.String,
+    "count": pl.Int64,
+}
+
+
+def _location_rank(location) -> int:
+    """MPI rank from the location group ("MPI Rank 12", "rank 12"), else -1."""
+    for label in (location.group.name, location.name):
+        mobj = re.search(r"rank\s+(\d+)", label or "", re.IGNORECASE)
+        if mobj:
+            return int(mobj.group(1))
+    return -1
+
+
+def _split_locations(nevents: list[int], nparts: int) -> list[list[int]]:
+    """Greedy LPT: assign location indices to nparts bins of similar event count."""
+    bins: list[tuple[int, int]] = [(0, i) for i in range(nparts)]
+    parts: list[list[int]] = [[] for _ in range(nparts)]
+    for idx in sorted(range(len(nevents)), key=lambda i: nevents[i], reverse=True):
+        load, b = heapq.heappop(bins)
+        parts[b].append(idx)
+        heapq.heappush(bins, (load + nevents[idx], b))
+    return [p for p in parts if p]
+
+
+# -----------------------------------------------------------------------------
+# Module-level worker for multiprocessing (must be picklable)
+# -----------------------------------------------------------------------------
+
+
+def _scan_worker(args: tuple[Path, list[int]]) -> list[tuple[int, int, str, int]]:
+    """Read events of the given locations; return (rank, loc, region, count) rows.
+
+    Region "" holds the total number of events of each location.
+    """
+    anchor, loc_idxs = args
+    with otf2.reader.open(str(anchor)) as reader:
+        all_locs = list(reader.definitions.locations)
+        locs = [all_locs[i] for i in loc_idxs]
+        loc_ids = {loc: i for loc, i in zip(locs, loc_idxs)}
+
+        enters: dict[tuple, int] = {}
+        totals: dict = {loc: 0 for loc in locs}
+        for location, event in reader.events(locs):
+            totals[location] += 1
+            if isinstance(event, otf2.events.Enter):
+                key = (location, event.region.name)
+                enters[key] = enters.get(key, 0) + 1
+
+    rows = [
+        (_location_rank(loc), loc_ids[loc], region, n)
+        for (loc, region), n in enters.items()
+    ]
+    rows += [(_location_rank(loc), loc_ids[loc], "", n) for loc, n in totals.items()]
+    return rows
+
+
+# -----------------------------------------------------------------------------
+# Entry points
+# -----------------------------------------------------------------------------
+
+
+def _location_nevents(anchor: Path) -> list[int]:
+    with otf2.reader.open(str(anchor)) as reader:
+        return [loc.number_of_events for loc in reader.definitions.locations]
+
+
+def scan_region_counts(anchor: Path, nworkers: int = 16) -> pl.DataFrame:
+    """Per-(rank, location, region) Enter counts; region "" is the location total."""
+    nevents = _location_nevents(anchor)
+    parts = _split_locations(nevents, min(nworkers, len(nevents)) or 1)
+    jobs = [(anchor, part) for part in parts]
+    logger.info(f"Scanning {anchor}: {len(nevents)} locations, {len(jobs)} workers")
+
+    if len(jobs) > 1:
+        # otf2 handles and the parent's polars threads do not survive fork()
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=len(jobs), mp_context=ctx) as ex:
+            results = list(ex.map(_scan_worker, jobs))
+    else:
+        results = [_scan_worker(job) for job in jobs]
+
+    rows = [row for rows in results for row in rows]
+    return pl.DataFrame(rows, schema=REGION_COUNTS_SCHEMA, orient="row").sort(
+        ["rank", "location", "region"]
+    )
+
+
+def count_events(anchor: Path, nworkers: int = 16) -> int:
+    """Total events in an archive; metadata-only unless the counts are missing."""
+    nevents = _location_nevents(anchor)
+    if sum(nevents) > 0:
+        return sum(nevents)
+
+    logger.warning(f"{anchor}: no number_of_events in definitions, scanning events")
+    rcdf = scan_region_counts(anchor, nworkers)
+    return int(rcdf.filter(pl.col("region") == "")["count"].sum())
+
+
+def count_events_many(anchors: list[Path], nworkers: int = 16) -> int:
+    """count_events over several archives, reading their definitions in parallel."""
+    if len(anchors) <= 1 or nworkers <= 1:
+        return sum(count_events(a, nworkers) for a in anchors)
+
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(nworkers, len(anchors)), mp_context=ctx) as ex:
+        nevents = list(ex.map(_location_nevents, anchors))
+
+    total = 0
+    for anchor, counts in zip(anchors, nevents):
+        total += sum(counts) if sum(counts) > 0 else count_events(anchor, nworkers)
+    return total
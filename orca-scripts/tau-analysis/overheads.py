@@ -0,0 +1,169 @@
+"""Tracer overhead ratios, confidence intervals and summary pivots in Polars.
+
+Input is one row per (suite, profile) run with the get_suitedf() columns and
+time_secs, from analyze_suites, suite_exec or the DuckDB catalog. Ratios
+against the baseline profile and the per-(steps, ranks, profile) summary are
+built as one lazy plan:
+
+- runtime_ratios(): per-run time_secs_base and ratio; written as the
+  runtimes/<root>.csv files that plotsrc/tracer_runtimes.py reads
+- overhead_summary(): mean/std of runtimes and ratios, with a 95% t-interval
+  for the mean ratio
+- overhead_pivot(): steps x ranks rows, one "+x.y%" column per profile
+
+Usage:
+    python overheads.py catalog.duckdb -o ext/mon-paper/data/plotdata
+"""
+
+import argparse
+import logging
+from pathlib import Path
+
+import duckdb
+import polars as pl
+
+logger = logging.getLogger(__name__)
+
+BASELINE = "00_noorca"
+# a run's baseline is the same (root, ranks, steps, run_id) without tracing
+BASELINE_KEYS = ["root", "ranks", "steps", "run_id"]
+RUN_COLS = ["root", "name", "profile", "ranks", "aggs", "steps", "run_id", "time_secs"]
+SUMMARY_KEYS = ["steps", "ranks", "profile"]
+
+# two-sided 95% Student t critical values by degrees of freedom; 1.96 beyond
+T95 = [
+    12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+    2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+    2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042,
+]
+
+
+def _t95(dof: pl.Expr) -> pl.Expr:
+    table = {d: t for d, t in enumerate(T95, 1)}
+    tval = dof.replace_strict(table, default=1.96, return_dtype=pl.Float64)
+    return pl.when(dof >= 1).then(tval)
+
+
+def runtime_ratios(
+    runs: pl.LazyFrame, baseline: str = BASELINE, keys: list[str] = BASELINE_KEYS
+) -> pl.LazyFrame:
+    """Per-run time_secs_base and ratio (time_secs / baseline time_secs).
+
+    Two baseline runs with the same keys are ambiguous; collecting raises.
+    """
+    base = runs.filter(pl.col("profile") == baseline).select(
+        *keys, pl.col("time_secs").alias("time_secs_base")
+    )
+    return (
+        runs.select(RUN_COLS)
+        .join(base, on=keys, how="left", validate="m:1")
+        .with_columns(ratio=pl.col("time_secs") / pl.col("time_secs_base"))
+        .sort(["steps", "ranks", "aggs", "profile", "run_id"])
+    )
+
+
+def overhead_summary(ratios: pl.LazyFrame, keys: list[str] = SUMMARY_KEYS) -> pl.LazyFrame:
+    """Per-keys runtime/ratio mean and std, plus a 95% CI on the mean ratio."""
+    ratio_ok = pl.col("ratio").filter(pl.col("ratio").is_not_null())
+    n = ratio_ok.count()
+    half = _t95(n - 1) * ratio_ok.std() / n.sqrt()
+    return (
+        ratios.group_by(keys)
+        .agg(
+            pl.len().alias("nruns"),
+            pl.col("time_secs").mean().alias("tsecs_mean"),
+            pl.col("time_secs").std().alias("tsecs_std"),
+            pl.col("time_secs_base").mean().alias("tsecs_base_mean"),
+            pl.col("time_secs_base").std().alias("tsecs_base_std"),
+            ratio_ok.mean().alias("ratio_mean"),
+            ratio_ok.std().alias("ratio_std"),
+            (ratio_ok.mean() - half).alias("ratio_ci_lo"),
+            (ratio_ok.mean() + half).alias("ratio_ci_hi"),
+        )
+        .sort(keys)
+    )
+
+
+def overhead_pivot(summary: pl.DataFrame, value: str = "ratio_mean") -> pl.DataFrame:
+    """steps x ranks rows, one column per profile, ratios formatted as +x.y%."""
+    fmt = (
+        pl.when(pl.col(value).is_null())
+        .then(pl.lit(None))
+        .otherwise(pl.format("+{}%", ((pl.col(value) - 1) * 100).round(1)))
+        .alias(value)
+    )
+    profiles = summary["profile"].unique(maintain_order=True).to_list()
+    return (
+        summary.with_columns(fmt)
+        .pivot(on="profile", index=["steps", "ranks"], values=value)
+        .select("steps", "ranks", *profiles)
+        .sort(["steps", "ranks"])
+    )
+
+
+def analyze_overheads(
+    runs: pl.DataFrame | pl.LazyFrame,
+    baseline: str = BASELINE,
+    keys: list[str] = SUMMARY_KEYS,
+) -> tuple[pl.DataFrame, pl.DataFrame]:
+    """(per-run ratios, summary by keys), collected together from one plan."""
+    ratios = runtime_ratios(runs.lazy(), baseline)
+    summary = overhead_summary(ratios, keys)
+    rdf, sdf = pl.collect_all([ratios, summary])
+    return rdf, sdf
+
+
+def write_runtime_csvs(runs: pl.DataFrame, out_dir: Path, baseline: str = BASELINE) -> list[Path]:
+    """runtimes/<root name>.csv per suite root, plus <root name>_summary.csv."""
+    rdf, sdf = analyze_overheads(runs, baseline, ["root", *SUMMARY_KEYS])
+
+    written = []
+    (out_dir / "runtimes").mkdir(parents=True, exist_ok=True)
+    for (root,), grp in rdf.group_by("root", maintain_order=True):
+        csv_path = out_dir / "runtimes" / f"{Path(root).name}.csv"
+        grp.write_csv(csv_path)
+        sdf.filter(pl.col("root") == root).drop("root").write_csv(
+            csv_path.with_name(f"{csv_path.stem}_summary.csv")
+        )
+        logger.info(f"Wrote {len(grp)} runs to {csv_path}")
+        written.append(csv_path)
+    return written
+
+
+def read_catalog_runs(db_path: Path) -> pl.DataFrame:
+    """Runs with RUN_COLS from a suite_catalog DuckDB file."""
+    con = duckdb.connect(str(db_path), read_only=True)
+    df = con.execute(
+        """
+        SELECT s.root, s.name, p.profile, s.ranks, s.aggs, s.steps, s.run_id, p.time_secs
+        FROM profiles p JOIN suites s USING (suite_dir)
+        WHERE p.time_secs IS NOT NULL
+        """
+    ).pl()
+    con.close()
+    return df
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("catalog", type=Path, help="suite_catalog DuckDB file")
+    parser.add_argument("--out-dir", "-o", type=Path, default=None, help="plotdata dir to write runtimes/ CSVs")
+    parser.add_argument("--baseline", "-b", default=BASELINE)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    runs = read_catalog_runs(args.catalog)
+    _, sdf = analyze_overheads(runs, args.baseline)
+
+    with pl.Config(tbl_rows=-1, tbl_cols=-1):
+        print(overhead_pivot(sdf))
+
+    if args.out_dir:
+        write_runtime_csvs(runs, args.out_dir, args.baseline)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -1,4 +1,5 @@
-import re
+from pathlib import Path
+
 import pandas as pd
 
 import panel as pn
@@ -8,34 +9,12 @@ import matplotlib.ticker as mtick
 
 import numpy as np
 
+import mpilog
+
 
 def parse_cycle_log(log_file: str) -> pd.DataFrame:
     """Parse cycle lines and extract wsec_total and wsec_step."""
-
-    records = []
-
-    lines = open(log_file).readlines()
-    lines = [l for l in lines if l.startswith("cycle")]
-
-    regex = r"cycle=(\d+).*wsec_total=([0-9.e\-\+]+).*wsec_step=([0-9.e\-\+]+)"
-    for l in lines:
-        mobj = re.search(regex, l)
-        assert mobj is not None, f"Failed to parse line: {l}"
-        cycle, wsec_total, wsec_step = mobj.groups()
-        cycle, wsec_total, wsec_step = int(
-            cycle), float(wsec_total), float(wsec_step)
-        records.append(
-            {
-                "cycle": cycle,
-                "wsec_total": wsec_total,
-                "wsec_step": wsec_step,
-            }
-        )
-
-    df = pd.DataFrame(records)
-    print(df)
-
-    return pd.DataFrame(records)
+    return mpilog.get_cycles(Path(log_file)).to_pandas()
 
 
 def process_cycle_log(log_file: str) -> pd.DataFrame:
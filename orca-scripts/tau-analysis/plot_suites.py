@@ -7,6 +7,7 @@ import matplotlib.ticker as mtick
 import numpy as np
 import polars as pl
 
+import suite_cache
 from suite_utils import *
 from common import PlotSaver
 from parse_cycle_log import parse_cycle_log
@@ -111,23 +112,19 @@ def read_suite_overhead(suite: Suite, probe_name: str) -> pd.DataFrame:
 
 
 def get_probe_freqs(profile_dir: str, tracer: str) -> pl.DataFrame:
-    counts_cached_path = f"{profile_dir}/{tracer}-probe-freqs.parquet"
-    if os.path.exists(counts_cached_path):
-        return pl.read_parquet(counts_cached_path)
-
     trace_dir = f"{profile_dir}/parquet/{tracer}"
-    pn.panel(trace_dir).servable()
-    q = (
-        pl.scan_parquet(trace_dir, rechunk=False, cache=False)
-        .group_by(["rank", "probe_name"])
-        .agg(pl.len())
-        .sort(["rank", "probe_name"])
-    )
-
-    tdf_counts = q.collect(engine="streaming")
-    tdf_counts.write_parquet(counts_cached_path)
 
-    return tdf_counts
+    def compute() -> pl.DataFrame:
+        pn.panel(trace_dir).servable()
+        q = (
+            pl.scan_parquet(trace_dir, rechunk=False, cache=False)
+            .group_by(["rank", "probe_name"])
+            .agg(pl.len())
+            .sort(["rank", "probe_name"])
+        )
+        return q.collect(engine="streaming")
+
+    return suite_cache.memoize("probe_freqs", Path(trace_dir), compute)
 
 
 def plot_probe_freqs(profile_dir: str, probe_name: str, **kwargs) -> pn.pane.Matplotlib:
@@ -0,0 +1,310 @@
+"""Run the query benchmarks over whole suites, concurrently and resumably.
+
+Builds the (suite, profile, tracer, query, mode, iter) task matrix and runs
+tasks in fresh processes under a CPU and memory budget:
+
+- each task is charged cpus_per_task cores (Polars threads / Caliper workers)
+  and a memory estimate scaled from its trace size (MEM_PER_TRACE_BYTE)
+- a cold-cache task runs alone on its filesystem: it waits for the
+  device's running tasks to finish and nothing else starts there until it
+  is done, so no other task's reads can warm or thrash its cache
+- every finished task is appended to the checkpoint CSV; rerunning with the
+  same CSV skips tasks already present
+
+Rows carry the tracequery.bench columns plus suite and profile, so the CSV is
+readable by plotsrc/query_suite.py.
+
+Usage:
+    python query_sweep.py /mnt/ltio/orcajobs/suites/20260102/* -o sweep.csv \\
+        --cpus 64 --mem-gb 200 --cpus-per-task 16 --tmp-dir /mnt/ltio/orca-tmp
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+
+import pandas as pd
+
+import dirscan
+
+logger = logging.getLogger(__name__)
+
+# Profile dir suffixes ("07_or_tracetgt" -> "or_tracetgt") per tracer
+PROFILE_NAMES: dict[str, tuple[str, ...]] = {
+    "orca": ("or_trace_mpisync", "or_tracetgt"),
+    "dftracer": ("dftracer",),
+    "caliper": ("caliper_tracetgt",),
+}
+
+# Rough peak RSS per on-disk trace byte; ORCA only decodes projected columns
+MEM_PER_TRACE_BYTE: dict[str, float] = {"orca": 1.0, "caliper": 4.0, "dftracer": 3.0}
+MIN_TASK_MEM_GB = 1.0
+
+QUERIES = ["count_sync_maxdur", "count_mpi_wait_dur", "count_window"]
+KEY_COLS = ["suite", "profile", "run_type", "query_name", "mode", "iter"]
+
+
+@dataclass(frozen=True)
+class SweepTask:
+    suite: str
+    profile: str
+    tracer: str
+    trace_dir: Path
+    query: str
+    mode: str
+    iter: int
+    cpus: int
+    mem_gb: float
+    fs_dev: int
+
+    @property
+    def key(self) -> tuple:
+        return (self.suite, self.profile, self.tracer, self.query, self.mode, self.iter)
+
+
+@dataclass
+class SweepBudget:
+    cpus: int
+    mem_gb: float
+
+
+# -----------------------------------------------------------------------------
+# Task matrix
+# -----------------------------------------------------------------------------
+
+
+def find_profiles(suite_dir: Path, tracer: str) -> list[Path]:
+    names = PROFILE_NAMES[tracer]
+    return [
+        d for d in sorted(suite_dir.iterdir())
+        if d.is_dir() and d.name.split("_", 1)[-1] in names
+    ]
+
+
+def get_trace_dir(prof: Path, tracer: str) -> Path:
+    if tracer == "orca":
+        return prof / "parquet"
+    if tracer == "dftracer" and (prof / "trace").is_dir():
+        return prof / "trace"
+    return prof
+
+
+def build_tasks(
+    suite_dirs: list[Path],
+    tracers: list[str],
+    queries: list[str] = QUERIES,
+    modes: list[str] = ["cold"],
+    repeats: int = 1,
+    cpus_per_task: int = 1,
+) -> list[SweepTask]:
+    """One task per (suite, profile, query, mode, iter), suites in given order."""
+    tasks = []
+    for suite_dir in suite_dirs:
+        for tracer in tracers:
+            for prof in find_profiles(suite_dir, tracer):
+                trace_dir = get_trace_dir(prof, tracer)
+                if not trace_dir.exists():
+                    logger.warning(f"Skipping {prof}: no trace dir {trace_dir}")
+                    continue
+
+                trace_gb = dirscan.dir_size(trace_dir) / 2**30
+                mem_gb = max(MIN_TASK_MEM_GB, MEM_PER_TRACE_BYTE[tracer] * trace_gb)
+                fs_dev = os.stat(trace_dir).st_dev
+
+                tasks.extend(
+                    SweepTask(
+                        suite=suite_dir.name,
+                        profile=prof.name,
+                        tracer=tracer,
+                        trace_dir=trace_dir,
+                        query=query,
+                        mode=mode,
+                        iter=it,
+                        cpus=cpus_per_task,
+                        mem_gb=mem_gb,
+                        fs_dev=fs_dev,
+                    )
+                    for query in queries
+                    for mode in modes
+                    for it in range(repeats)
+                )
+    return tasks
+
+
+# -----------------------------------------------------------------------------
+# Module-level worker for multiprocessing (must be picklable)
+# -----------------------------------------------------------------------------
+
+
+def _run_task(task: SweepTask, tmp_dir: Path | None) -> dict:
+    """Run one timed query in this (fresh) process."""
+    # must be set before polars is first imported in this process
+    os.environ["POLARS_MAX_THREADS"] = str(task.cpus)
+
+    from dataclasses import asdict
+
+    from tracequery.bench import BenchConfig, make_case, run_once
+
+    cfg = BenchConfig(queries=[task.query])
+    case = make_case(task.tracer, task.trace_dir, nworkers=task.cpus, tmp_dir=tmp_dir)
+
+    window = None
+    if task.query == "count_window":
+        query = case.make_query()
+        window = query.get_window_bounds(cfg.window_s)
+        if hasattr(query, "close"):
+            query.close()
+
+    if task.mode == "warm":
+        run_once(case, task.query, cfg, window, "warm", -1)
+
+    sample = run_once(case, task.query, cfg, window, task.mode, task.iter)
+    return {"suite": task.suite, "profile": task.profile, **asdict(sample)}
+
+
+# -----------------------------------------------------------------------------
+# Scheduler
+# -----------------------------------------------------------------------------
+
+
+class Checkpoint:
+    """Append-only results CSV; its rows mark tasks as done."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.done: set[tuple] = set()
+        if self.path.exists():
+            df = pd.read_csv(self.path)
+            self.done = set(df[KEY_COLS].itertuples(index=False, name=None))
+            logger.info(f"Resuming: {len(self.done)} tasks already in {self.path}")
+
+    def append(self, row: dict) -> None:
+        pd.DataFrame([row]).to_csv(
+            self.path, mode="a", header=not self.path.exists(), index=False
+        )
+        self.done.add(tuple(row[c] for c in KEY_COLS))
+
+
+def run_sweep(
+    tasks: list[SweepTask],
+    budget: SweepBudget,
+    ckpt_path: Path,
+    tmp_dir: Path | None = None,
+) -> pd.DataFrame:
+    """Run tasks under budget, checkpointing each result; returns all rows."""
+    ckpt = Checkpoint(ckpt_path)
+    pending = deque(t for t in tasks if t.key not in ckpt.done)
+    print(f"-INFO- Sweep: {len(tasks)} tasks, {len(pending)} to run, budget {budget}")
+
+    running: dict[Future, SweepTask] = {}
+    used_cpus, used_mem = 0, 0.0
+    cold_devs: set[int] = set()
+    dev_running: Counter[int] = Counter()
+
+    def fits(t: SweepTask) -> bool:
+        if t.fs_dev in cold_devs:
+            return False
+        if t.mode == "cold" and dev_running[t.fs_dev] > 0:
+            return False
+        if not running:
+            return True  # an oversized task still runs, alone
+        return used_cpus + t.cpus <= budget.cpus and used_mem + t.mem_gb <= budget.mem_gb
+
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=max(1, budget.cpus), mp_context=ctx, max_tasks_per_child=1
+    ) as ex:
+        while pending or running:
+            # a cold task waiting for its device to drain holds back the
+            # tasks behind it on that device, so warm tasks cannot starve it
+            draining: set[int] = set()
+            for t in list(pending):
+                if t.fs_dev in draining:
+                    continue
+                if not fits(t):
+                    if t.mode == "cold" and t.fs_dev not in cold_devs:
+                        draining.add(t.fs_dev)
+                    continue
+                pending.remove(t)
+                running[ex.submit(_run_task, t, tmp_dir)] = t
+                used_cpus += t.cpus
+                used_mem += t.mem_gb
+                dev_running[t.fs_dev] += 1
+                if t.mode == "cold":
+                    cold_devs.add(t.fs_dev)
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                t = running.pop(fut)
+                used_cpus -= t.cpus
+                used_mem -= t.mem_gb
+                dev_running[t.fs_dev] -= 1
+                if t.mode == "cold":
+                    cold_devs.discard(t.fs_dev)
+
+                try:
+                    row = fut.result()
+                except Exception as e:
+                    logger.error(f"Task {t.key} failed: {e}")
+                    continue
+
+                ckpt.append(row)
+                print(
+                    f"-INFO- [{len(ckpt.done)}/{len(tasks)}] {t.suite}/{t.profile} "
+                    f"{t.query} {t.mode}: {row['total_us']/1e3:.1f} ms"
+                )
+
+    return pd.read_csv(ckpt.path) if ckpt.path.exists() else pd.DataFrame()
+
+
+# -----------------------------------------------------------------------------
+# CLI
+# -----------------------------------------------------------------------------
+
+
+def parse_args() -> argparse.Namespace:
+    ncpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("suites", type=Path, nargs="+")
+    parser.add_argument("--out", "-o", type=Path, required=True, help="checkpoint/result CSV")
+    parser.add_argument("--tracers", "-t", nargs="+", choices=list(PROFILE_NAMES), default=list(PROFILE_NAMES))
+    parser.add_argument("--queries", "-q", nargs="+", choices=QUERIES, default=QUERIES)
+    parser.add_argument("--modes", "-m", nargs="+", choices=["cold", "warm"], default=["cold"])
+    parser.add_argument("--repeats", "-r", type=int, default=1)
+    parser.add_argument("--cpus", type=int, default=ncpus)
+    parser.add_argument("--mem-gb", type=float, default=64.0)
+    parser.add_argument(
+        "--cpus-per-task", type=int, default=None, help="default: a quarter of --cpus"
+    )
+    parser.add_argument("--tmp-dir", type=Path, default=None, help="required for dftracer")
+    args = parser.parse_args()
+
+    if "dftracer" in args.tracers and args.tmp_dir is None:
+        parser.error("dftracer needs --tmp-dir (or leave it out of --tracers)")
+    if args.cpus_per_task is None:
+        args.cpus_per_task = max(1, args.cpus // 4)
+    return args
+
+
+def main():
+    args = parse_args()
+    tasks = build_tasks(
+        [s for s in args.suites if s.is_dir()],
+        args.tracers,
+        args.queries,
+        args.modes,
+        args.repeats,
+        args.cpus_per_task,
+    )
+    df = run_sweep(tasks, SweepBudget(args.cpus, args.mem_gb), args.out, args.tmp_dir)
+    print(df)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -1,4 +1,5 @@
 import copy
+import os
 import subprocess
 import datetime
 import suite_utils as su
@@ -328,7 +329,7 @@ def main():
         trace_dir=Path("/mnt/ltio/orca-tmp"),
         tmp_dir=Path("/mnt/ltio/orca-tmp"),
         nranks=-1,
-        nworkers=16,
+        nworkers=os.cpu_count() or 1,
     )
 
     num_iters = 3
@@ -0,0 +1,287 @@
+"""Fingerprinted cache for artifacts derived from suite/profile directories.
+
+An entry is keyed by (function, path, params) and stores the directory
+fingerprint it was computed from: a digest of (relative path, size, mtime) of
+every file below the fingerprinted directory. A lookup whose fingerprint no
+longer matches (trace rewritten, profile re-run) recomputes and overwrites.
+
+Entries are Parquet files under ORCA_SUITE_CACHE (default
+~/.cache/orca-suite-cache)/<function>/<key>.parquet; the key, params and
+fingerprint live in the Parquet schema metadata. Values may be pandas or
+polars DataFrames, or scalars (stored as a one-row "value" column). Writes go
+through a temp file and os.replace, so readers never see partial entries.
+
+Usage:
+    python suite_cache.py list [--func evtcnt] [--path /mnt/ltio/...]
+    python suite_cache.py purge [--func F] [--path P] [--stale]
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+
+import pandas as pd
+import polars as pl
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import dirscan
+
+logger = logging.getLogger(__name__)
+
+CACHE_ENV = "ORCA_SUITE_CACHE"
+META_KEY = b"suite_cache"
+
+
+def get_cache_root() -> Path:
+    default = Path.home() / ".cache" / "orca-suite-cache"
+    return Path(os.environ.get(CACHE_ENV, default))
+
+
+# -----------------------------------------------------------------------------
+# Fingerprints
+# -----------------------------------------------------------------------------
+
+
+def is_cache_artifact(name: str) -> bool:
+    # hidden/underscore sidecars and legacy in-tree caches (.evtcnt,
+    # *_cached.csv) must not invalidate the entries derived from a trace
+    return name.startswith((".", "_")) or "_cached." in name
+
+
+def fingerprint(root: Path) -> str:
+    """Digest of (relative path, size, mtime_ns) for every file below root.
+
+    A plain file is fingerprinted by its own size and mtime.
+    """
+    root = Path(root)
+    if not root.exists():
+        return "missing"
+    if root.is_file():
+        st = root.stat()
+        return f"file-{st.st_size}-{st.st_mtime_ns}"
+
+    return fingerprint_scan(dirscan.scan_dir(root, skip=is_cache_artifact, mtime=True))
+
+
+def fingerprint_scan(df: pl.DataFrame) -> str:
+    """fingerprint() of a directory from its scan_dir(..., skip=is_cache_artifact, mtime=True) frame."""
+    h = hashlib.sha1()
+    for rel, size, mtime in df.select("relpath", "size", "mtime_ns").iter_rows():
+        h.update(f"{rel}\0{size}\0{mtime}\n".encode())
+    return f"{len(df)}-{h.hexdigest()[:16]}"
+
+
+# -----------------------------------------------------------------------------
+# Value <-> Arrow
+# -----------------------------------------------------------------------------
+
+
+def _to_arrow(value: Any) -> tuple[pa.Table, str]:
+    if isinstance(value, pd.DataFrame):
+        return pa.Table.from_pandas(value, preserve_index=False), "pandas"
+    if isinstance(value, pl.DataFrame):
+        return value.to_arrow(), "polars"
+    return pa.table({"value": [value]}), "scalar"
+
+
+def _from_arrow(table: pa.Table, kind: str) -> Any:
+    if kind == "pandas":
+        return table.to_pandas()
+    if kind == "polars":
+        return pl.from_arrow(table)
+    return table.column("value")[0].as_py()
+
+
+# -----------------------------------------------------------------------------
+# Cache
+# -----------------------------------------------------------------------------
+
+
+class SuiteCache:
+    def __init__(self, root: Path | None = None):
+        self.root = Path(root) if root else get_cache_root()
+
+    def entry_path(self, func: str, path: Path, params: dict) -> Path:
+        key = json.dumps([str(Path(path).resolve()), params], sort_keys=True, default=str)
+        return self.root / func / f"{hashlib.sha1(key.encode()).hexdigest()[:20]}.parquet"
+
+    @staticmethod
+    def read_meta(entry: Path) -> dict:
+        meta = pq.read_schema(entry).metadata or {}
+        return json.loads(meta.get(META_KEY, b"{}"))
+
+    def get(self, func: str, path: Path, params: dict, fp: str) -> tuple[bool, Any]:
+        """(hit, value); a miss if absent, unreadable or fingerprint differs."""
+        entry = self.entry_path(func, path, params)
+        if not entry.exists():
+            return False, None
+
+        try:
+            table = pq.read_table(entry)
+            meta = json.loads(table.schema.metadata[META_KEY])
+        except Exception as e:
+            logger.warning(f"Unreadable cache entry {entry}: {e}")
+            return False, None
+
+        if meta["fingerprint"] != fp:
+            logger.info(f"Stale cache entry for {func}({path}): trace changed")
+            return False, None
+
+        return True, _from_arrow(table, meta["kind"])
+
+    def put(self, func: str, path: Path, params: dict, fp: str, value: Any) -> None:
+        entry = self.entry_path(func, path, params)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+
+        table, kind = _to_arrow(value)
+        meta = {
+            "func": func,
+            "path": str(Path(path).resolve()),
+            "params": params,
+            "fingerprint": fp,
+            "kind": kind,
+            "created": datetime.now().isoformat(timespec="seconds"),
+        }
+        schema_meta = {**(table.schema.metadata or {}), META_KEY: json.dumps(meta, default=str)}
+        table = table.replace_schema_metadata(schema_meta)
+
+        tmp = entry.with_name(f".{entry.name}.{os.getpid()}.tmp")
+        pq.write_table(table, tmp)
+        os.replace(tmp, entry)
+
+    def entries(self) -> pl.DataFrame:
+        """One row per entry: func, path, params, fingerprint, created, bytes, entry."""
+        rows = []
+        for entry in sorted(self.root.glob("*/*.parquet")):
+            try:
+                meta = self.read_meta(entry)
+            except Exception as e:
+                logger.warning(f"Skipping unreadable entry {entry}: {e}")
+                continue
+            rows.append(
+                {
+                    "func": meta.get("func", entry.parent.name),
+                    "path": meta.get("path", ""),
+                    "params": json.dumps(meta.get("params", {}), sort_keys=True),
+                    "fingerprint": meta.get("fingerprint", ""),
+                    "created": meta.get("created", ""),
+                    "bytes": entry.stat().st_size,
+                    "entry": str(entry),
+                }
+            )
+        return pl.DataFrame(rows)
+
+    def purge(
+        self,
+        func: str | None = None,
+        path_prefix: str | None = None,
+        fp_fn: Callable[[str], str] | None = None,
+    ) -> int:
+        """Delete matching entries; with fp_fn, only those whose fingerprint is stale."""
+        df = self.entries()
+        if df.is_empty():
+            return 0
+        if func:
+            df = df.filter(pl.col("func") == func)
+        if path_prefix:
+            df = df.filter(pl.col("path").str.starts_with(str(Path(path_prefix).resolve())))
+
+        npurged = 0
+        for row in df.iter_rows(named=True):
+            if fp_fn is not None and fp_fn(row["path"]) == row["fingerprint"]:
+                continue
+            Path(row["entry"]).unlink(missing_ok=True)
+            npurged += 1
+        return npurged
+
+
+_default_cache: SuiteCache | None = None
+
+
+def get_cache() -> SuiteCache:
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = SuiteCache()
+    return _default_cache
+
+
+def memoize(
+    func: str,
+    path: Path,
+    compute: Callable[[], Any],
+    params: dict | None = None,
+    cached: bool = True,
+    fp: str | None = None,
+) -> Any:
+    """compute(), cached under (func, path, params) and validated against path's fingerprint.
+
+    cached=False recomputes and refreshes the entry. fp is path's fingerprint
+    if the caller already has it, saving a walk of path.
+    """
+    cache = get_cache()
+    params = params or {}
+    if fp is None:
+        fp = fingerprint(path)
+
+    if cached:
+        hit, value = cache.get(func, path, params, fp)
+        if hit:
+            return value
+
+    value = compute()
+    try:
+        cache.put(func, path, params, fp, value)
+    except OSError as e:
+        logger.warning(f"Could not write cache entry for {func}({path}): {e}")
+    return value
+
+
+# -----------------------------------------------------------------------------
+# CLI
+# -----------------------------------------------------------------------------
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--root", type=Path, default=None, help=f"cache root (default: ${CACHE_ENV})")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    for cmd in ["list", "purge"]:
+        p = sub.add_parser(cmd)
+        p.add_argument("--func", "-f", default=None)
+        p.add_argument("--path", "-p", default=None, help="only entries under this path")
+    sub.choices["purge"].add_argument(
+        "--stale", action="store_true", help="only entries whose directory has changed"
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    cache = SuiteCache(args.root)
+
+    if args.cmd == "list":
+        df = cache.entries()
+        if not df.is_empty():
+            if args.func:
+                df = df.filter(pl.col("func") == args.func)
+            if args.path:
+                df = df.filter(pl.col("path").str.starts_with(str(Path(args.path).resolve())))
+        with pl.Config(tbl_rows=-1, fmt_str_lengths=80):
+            print(df.drop("entry") if not df.is_empty() else "(empty)")
+        return
+
+    fp_fn = (lambda p: fingerprint(Path(p))) if args.stale else None
+    n = cache.purge(args.func, args.path, fp_fn)
+    print(f"Purged {n} entries from {cache.root}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
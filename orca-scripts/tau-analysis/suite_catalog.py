@@ -0,0 +1,389 @@
+"""DuckDB catalog of suites, profiles and trace files.
+
+One DuckDB file records, per suite root:
+
+- suites:     suite_dir, name, root, run_type, ranks, aggs, steps, run_id
+- profiles:   suite_dir, profile, tracer, path, fingerprint, time_secs,
+              trace_size, evtcnt, nfiles, updated
+- files:      suite_dir, profile, relpath, tbl, bytes, nrows,
+              ts_min/ts_max, swid_min/swid_max (parquet footer statistics)
+- tracestats: suite_dir, profile, timestep, counter, val (fljob counters)
+
+Refreshes are incremental: a profile is rescanned only when its directory
+fingerprint (suite_cache.fingerprint) differs from the catalogued one, and
+catalogued profiles that no longer exist on disk are dropped.
+
+Usage:
+    python suite_catalog.py build catalog.duckdb /mnt/ltio/orcajobs/suites/2026*
+    python suite_catalog.py query catalog.duckdb --report bytes-per-event
+    python suite_catalog.py query catalog.duckdb "SELECT tracer, count(*) FROM profiles GROUP BY 1"
+"""
+
+import argparse
+import logging
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+import duckdb
+import polars as pl
+import pyarrow.parquet as pq
+
+import dirscan
+import mpilog
+import suite_cache
+import suite_exec
+from suite_utils import Profile, Suite, read_v2_suites
+
+logger = logging.getLogger(__name__)
+
+CATALOG_DDL = """
+CREATE TABLE IF NOT EXISTS suites (
+    suite_dir VARCHAR PRIMARY KEY, name VARCHAR, root VARCHAR, run_type VARCHAR,
+    ranks INTEGER, aggs INTEGER, steps INTEGER, run_id INTEGER
+);
+CREATE TABLE IF NOT EXISTS profiles (
+    suite_dir VARCHAR, profile VARCHAR, tracer VARCHAR, path VARCHAR,
+    fingerprint VARCHAR, time_secs DOUBLE, trace_size BIGINT, evtcnt BIGINT,
+    nfiles BIGINT, updated TIMESTAMP, PRIMARY KEY (suite_dir, profile)
+);
+CREATE TABLE IF NOT EXISTS files (
+    suite_dir VARCHAR, profile VARCHAR, relpath VARCHAR, tbl VARCHAR,
+    bytes BIGINT, nrows BIGINT, ts_min BIGINT, ts_max BIGINT,
+    swid_min UBIGINT, swid_max UBIGINT
+);
+CREATE TABLE IF NOT EXISTS tracestats (
+    suite_dir VARCHAR, profile VARCHAR, timestep INTEGER, counter VARCHAR, val BIGINT
+);
+"""
+
+PROFILE_TABLES = ["profiles", "files", "tracestats"]
+
+FILES_SCHEMA = {
+    "relpath": pl.String,
+    "tbl": pl.String,
+    "bytes": pl.Int64,
+    "nrows": pl.Int64,
+    "ts_min": pl.Int64,
+    "ts_max": pl.Int64,
+    "swid_min": pl.UInt64,
+    "swid_max": pl.UInt64,
+}
+
+# profile name suffix (after "NN_") -> tracer
+TRACER_PATTERNS = [
+    (r"^noorca", "none"),
+    (r"^or_", "orca"),
+    (r"^tau", "tau"),
+    (r"^scorep", "scorep"),
+    (r"^dftracer", "dftracer"),
+    (r"^caliper", "caliper"),
+]
+
+REPORTS = {
+    "bytes-per-event": """
+        SELECT p.tracer, s.ranks, s.steps,
+               sum(p.trace_size) / sum(p.evtcnt) AS bytes_per_event,
+               count(*) AS nprofiles
+        FROM profiles p JOIN suites s USING (suite_dir)
+        WHERE p.evtcnt > 0
+        GROUP BY ALL ORDER BY ALL
+    """,
+    "table-sizes": """
+        SELECT p.tracer, f.tbl, s.ranks, sum(f.bytes)::BIGINT AS bytes, sum(f.nrows)::BIGINT AS nrows,
+               sum(f.bytes) / nullif(sum(f.nrows), 0) AS bytes_per_row
+        FROM files f JOIN profiles p USING (suite_dir, profile)
+        JOIN suites s USING (suite_dir)
+        GROUP BY ALL ORDER BY ALL
+    """,
+    "overheads": """
+        SELECT s.steps, s.ranks, p.profile,
+               avg(p.time_secs / b.time_secs) AS ratio, count(*) AS nruns
+        FROM profiles p JOIN suites s USING (suite_dir)
+        JOIN profiles b ON b.suite_dir = p.suite_dir AND b.profile = '00_noorca'
+        WHERE b.time_secs > 0
+        GROUP BY ALL ORDER BY ALL
+    """,
+}
+
+
+def get_tracer(profile_name: str) -> str:
+    suffix = profile_name.split("_", 1)[-1]
+    for patt, tracer in TRACER_PATTERNS:
+        if re.match(patt, suffix):
+            return tracer
+    return "other"
+
+
+def connect(db_path: Path, read_only: bool = False) -> duckdb.DuckDBPyConnection:
+    con = duckdb.connect(str(db_path), read_only=read_only)
+    if not read_only:
+        con.execute(CATALOG_DDL)
+    return con
+
+
+# -----------------------------------------------------------------------------
+# Per-profile scan (runs on suite_exec worker threads)
+# -----------------------------------------------------------------------------
+
+
+@dataclass
+class ProfileScan:
+    profile: dict
+    files: pl.DataFrame
+    tracestats: pl.DataFrame
+
+
+def _col_range(md: pq.FileMetaData, name: str) -> tuple[int | None, int | None]:
+    """(min, max) of a column over all row groups, from footer statistics."""
+    idx = md.schema.to_arrow_schema().get_field_index(name)
+    if idx < 0:
+        return None, None
+
+    lo, hi = None, None
+    for rg in range(md.num_row_groups):
+        stats = md.row_group(rg).column(idx).statistics
+        if stats is None or not stats.has_min_max:
+            return None, None
+        lo = stats.min if lo is None else min(lo, stats.min)
+        hi = stats.max if hi is None else max(hi, stats.max)
+    return lo, hi
+
+
+def _parquet_stats(fpath: Path) -> tuple:
+    md = pq.ParquetFile(fpath).metadata
+    return (md.num_rows, *_col_range(md, "timestep"), *_col_range(md, "swid"))
+
+
+def _scan_subdir(scan: pl.DataFrame, root: Path, sub: Path) -> pl.DataFrame:
+    """The part of root's scan below sub; symlinked dirs on the way were not walked, so walk sub."""
+    rel = sub.relative_to(root)
+    if any((root / Path(*rel.parts[: i + 1])).is_symlink() for i in range(len(rel.parts))):
+        return dirscan.scan_dir(sub, skip=suite_cache.is_cache_artifact, mtime=True)
+    return dirscan.subdir(scan, str(rel))
+
+
+def _scan_files(tracedir: Path, sdf: pl.DataFrame) -> pl.DataFrame:
+    rows = []
+    for relpath, table, size in sdf.select("relpath", "table", "size").iter_rows():
+        stats = (None,) * 5
+        if relpath.endswith(".parquet"):
+            try:
+                stats = _parquet_stats(tracedir / relpath)
+            except Exception as e:
+                logger.warning(f"{tracedir / relpath}: unreadable footer: {e}")
+        rows.append((relpath, table, size, *stats))
+    return pl.DataFrame(rows, schema=FILES_SCHEMA, orient="row")
+
+
+def scan_profile(suite: Suite, prof: Profile, fingerprint: str, scan: pl.DataFrame) -> ProfileScan:
+    """Catalog rows of a profile, from the scan_dir walk its fingerprint came from.
+
+    The trace and orca_events fingerprints for the memoized evtcnt and
+    tracestats are derived from the same walk.
+    """
+    tracer = get_tracer(prof.name)
+    log_path = prof.path / "mpi.log"
+    time_secs = mpilog.get_walltime(log_path) if log_path.exists() else None
+
+    try:
+        tracedir = prof.get_tracedir()
+    except FileNotFoundError:
+        tracedir = None
+
+    files = pl.DataFrame(schema=FILES_SCHEMA)
+    tstats = pl.DataFrame(schema={"timestep": pl.Int32, "counter": pl.String, "val": pl.Int64})
+    trace_size, evtcnt = 0, None
+
+    if tracedir is not None:
+        tscan = _scan_subdir(scan, prof.path, tracedir)
+        files = _scan_files(tracedir, tscan)
+        sized = files.filter(pl.col("tbl") != "orca_events") if tracer == "orca" else files
+        trace_size = int(sized["bytes"].sum())
+        evtcnt = prof.get_evtcnt(fp=suite_cache.fingerprint_scan(tscan))
+
+        oe_dir = tracedir / "orca_events"
+        if oe_dir.is_dir():
+            oe_fp = suite_cache.fingerprint_scan(_scan_subdir(tscan, tracedir, oe_dir))
+            tdf = prof.get_tracestats_df(fp=oe_fp)
+            if len(tdf) > 0:
+                tstats = (
+                    pl.from_pandas(tdf.drop(columns=["tracedir"]))
+                    .unpivot(index="timestep", variable_name="counter", value_name="val")
+                    .cast({"timestep": pl.Int32, "val": pl.Int64})
+                )
+
+    profile = {
+        "profile": prof.name,
+        "tracer": tracer,
+        "path": str(prof.path),
+        "fingerprint": fingerprint,
+        "time_secs": time_secs,
+        "trace_size": trace_size,
+        "evtcnt": evtcnt,
+        "nfiles": len(files),
+        "updated": datetime.now(),
+    }
+    return ProfileScan(profile, files, tstats)
+
+
+# -----------------------------------------------------------------------------
+# Incremental refresh
+# -----------------------------------------------------------------------------
+
+
+def _suite_row(suite: Suite) -> dict:
+    return {
+        "suite_dir": str(suite.suitedir),
+        "name": suite.name,
+        "root": str(suite.suitedir.parent),
+        "run_type": suite.run_type,
+        "ranks": suite.ranks,
+        "aggs": suite.naggs,
+        "steps": suite.nsteps,
+        "run_id": suite.run_id,
+    }
+
+
+def _insert(con: duckdb.DuckDBPyConnection, table: str, df: pl.DataFrame) -> None:
+    if df.is_empty():
+        return
+    con.register("_ins", df.to_arrow())
+    cols = ", ".join(df.columns)
+    con.execute(f"INSERT INTO {table} ({cols}) SELECT {cols} FROM _ins")
+    con.unregister("_ins")
+
+
+def refresh(
+    con: duckdb.DuckDBPyConnection,
+    suite_roots: list[Path],
+    full: bool = False,
+    nworkers: int = 32,
+    per_fs: int = 8,
+) -> int:
+    """Rescan new or changed profiles under suite_roots; returns #profiles rescanned."""
+    suites = [s for root in suite_roots for s in read_v2_suites(root)]
+    known = dict(
+        ((sd, p), fp)
+        for sd, p, fp in con.execute(
+            "SELECT suite_dir, profile, fingerprint FROM profiles"
+        ).fetchall()
+    )
+
+    def scan_if_changed(suite: Suite, prof: Profile) -> ProfileScan | None:
+        # the one walk of the profile dir; scan_profile reuses it
+        scan = dirscan.scan_dir(prof.path, skip=suite_cache.is_cache_artifact, mtime=True)
+        fp = suite_cache.fingerprint_scan(scan)
+        if not full and known.get((str(suite.suitedir), prof.name)) == fp:
+            return None
+        return scan_profile(suite, prof, fp, scan)
+
+    results = suite_exec.map_profiles(suites, scan_if_changed, nworkers, per_fs)
+
+    con.execute("BEGIN TRANSACTION")
+    try:
+        nscanned = _apply_scans(con, suites, results)
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+
+    logger.info(f"Catalog refresh: {nscanned} of {len(results)} profiles rescanned")
+    return nscanned
+
+
+def _apply_scans(
+    con: duckdb.DuckDBPyConnection,
+    suites: list[Suite],
+    results: list[tuple[Suite, Profile, ProfileScan | None]],
+) -> int:
+    sdf = pl.DataFrame([_suite_row(s) for s in suites])
+    if not sdf.is_empty():
+        con.register("_sdf", sdf.to_arrow())
+        con.execute("DELETE FROM suites WHERE suite_dir IN (SELECT suite_dir FROM _sdf)")
+        con.unregister("_sdf")
+        _insert(con, "suites", sdf)
+
+    nscanned = 0
+    for suite, prof, scan in results:
+        if scan is None:
+            continue
+        key = [str(suite.suitedir), prof.name]
+        for table in PROFILE_TABLES:
+            con.execute(f"DELETE FROM {table} WHERE suite_dir = ? AND profile = ?", key)
+
+        keycols = {"suite_dir": key[0], "profile": key[1]}
+        _insert(con, "profiles", pl.DataFrame([{**scan.profile, **keycols}]))
+        _insert(con, "files", scan.files.with_columns(**{k: pl.lit(v) for k, v in keycols.items()}))
+        _insert(con, "tracestats", scan.tracestats.with_columns(**{k: pl.lit(v) for k, v in keycols.items()}))
+        nscanned += 1
+
+    # profiles of refreshed suites that are gone from disk
+    live = pl.DataFrame(
+        [(str(s.suitedir), p.name) for s in suites for p in s.profiles],
+        schema=["suite_dir", "profile"],
+        orient="row",
+    )
+    con.register("_live", live.to_arrow())
+    for table in PROFILE_TABLES:
+        con.execute(
+            f"DELETE FROM {table} t WHERE suite_dir IN (SELECT suite_dir FROM _live) "
+            f"AND NOT EXISTS (SELECT 1 FROM _live l "
+            f"WHERE l.suite_dir = t.suite_dir AND l.profile = t.profile)"
+        )
+    con.unregister("_live")
+    return nscanned
+
+
+# -----------------------------------------------------------------------------
+# CLI
+# -----------------------------------------------------------------------------
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("build", help="create or incrementally refresh a catalog")
+    p.add_argument("db", type=Path)
+    p.add_argument("suite_roots", type=Path, nargs="+")
+    p.add_argument("--full", action="store_true", help="rescan every profile")
+    p.add_argument("--workers", "-w", type=int, default=32)
+    p.add_argument("--per-fs", type=int, default=8)
+
+    p = sub.add_parser("query", help="run SQL or a canned report")
+    p.add_argument("db", type=Path)
+    p.add_argument("sql", nargs="?", default=None)
+    p.add_argument("--report", "-r", choices=list(REPORTS), default=None)
+    p.add_argument("--csv", type=Path, default=None)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    if args.cmd == "build":
+        con = connect(args.db)
+        roots = [r for r in args.suite_roots if r.is_dir()]
+        refresh(con, roots, args.full, args.workers, args.per_fs)
+        con.close()
+        return
+
+    sql = REPORTS[args.report] if args.report else args.sql
+    if sql is None:
+        raise SystemExit("query: give SQL or --report")
+
+    con = connect(args.db, read_only=True)
+    df = con.execute(sql).pl()
+    con.close()
+
+    if args.csv:
+        df.write_csv(args.csv)
+    with pl.Config(tbl_rows=-1, tbl_cols=-1):
+        print(df)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
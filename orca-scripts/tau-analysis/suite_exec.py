@@ -0,0 +1,141 @@
+"""Concurrent per-profile analyses over many suites.
+
+Per-profile work (mpi.log parsing, trace size scans, event counts,
+tracestats) is I/O-bound on Lustre, so profiles are fanned out over a thread
+pool. Concurrency is bounded per filesystem (st_dev of the profile dir), so
+one slow mount cannot take every worker, and a local scratch suite does not
+wait behind Lustre.
+
+    df = analyze_suites(suites, ["runtime", "tracesize", "evtcnt"])
+
+returns one Polars frame: the get_suitedf() columns plus one column per
+analysis (null where an analysis failed for a profile).
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable
+
+import polars as pl
+
+from suite_utils import (
+    Profile,
+    Suite,
+    get_profile_amr_runtime,
+    get_profile_tracesize,
+)
+
+logger = logging.getLogger(__name__)
+
+ProfileFn = Callable[[Suite, Profile], Any]
+
+
+def _tracestats_totals(suite: Suite, prof: Profile) -> dict[str, int] | None:
+    tdf = prof.get_tracestats_df()
+    if len(tdf) == 0:
+        return None
+    return {c: int(tdf[c].sum()) for c in tdf.columns if c.startswith("fljob.")}
+
+
+# analysis name -> (output column, fn); fn may return a dict to emit several
+# columns, prefixed with the analysis name
+ANALYSES: dict[str, tuple[str, ProfileFn]] = {
+    "runtime": ("time_secs", lambda s, p: get_profile_amr_runtime(p.path)),
+    "tracesize": ("trace_size", lambda s, p: get_profile_tracesize(p)),
+    "evtcnt": ("evtcnt", lambda s, p: p.get_evtcnt()),
+    "tracestats": ("tracestats", _tracestats_totals),
+}
+
+
+class FsLimiter:
+    """One semaphore per filesystem (st_dev), created on first use."""
+
+    def __init__(self, per_fs: int):
+        self.per_fs = per_fs
+        self._sems: dict[int, threading.Semaphore] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: os.PathLike) -> threading.Semaphore:
+        dev = os.stat(path).st_dev
+        with self._lock:
+            if dev not in self._sems:
+                self._sems[dev] = threading.Semaphore(self.per_fs)
+            return self._sems[dev]
+
+
+def map_profiles(
+    suites: list[Suite],
+    fn: ProfileFn,
+    nworkers: int = 32,
+    per_fs: int = 8,
+) -> list[tuple[Suite, Profile, Any]]:
+    """fn(suite, profile) over every profile, in suite/profile order.
+
+    A failing call is logged and yields None.
+    """
+    limiter = FsLimiter(per_fs)
+    jobs = [(s, p) for s in suites for p in s.profiles]
+
+    def run(suite: Suite, prof: Profile) -> Any:
+        with limiter.get(prof.path):
+            return fn(suite, prof)
+
+    results: list[Any] = [None] * len(jobs)
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=nworkers) as ex:
+        futs = {ex.submit(run, s, p): i for i, (s, p) in enumerate(jobs)}
+        for ndone, fut in enumerate(as_completed(futs), 1):
+            i = futs[fut]
+            try:
+                results[i] = fut.result()
+            except Exception as e:
+                s, p = jobs[i]
+                logger.warning(f"{s.name}/{p.name}: {type(e).__name__}: {e}")
+            if ndone % 50 == 0 or ndone == len(jobs):
+                logger.info(f"{ndone}/{len(jobs)} profiles done ({time.perf_counter() - t0:.1f}s)")
+
+    return [(s, p, r) for (s, p), r in zip(jobs, results)]
+
+
+def analyze_suites(
+    suites: list[Suite],
+    analyses: list[str],
+    nworkers: int = 32,
+    per_fs: int = 8,
+) -> pl.DataFrame:
+    """One row per (suite, profile): get_suitedf() columns plus analysis columns."""
+    fns = [ANALYSES[a] for a in analyses]
+
+    def run_all(suite: Suite, prof: Profile) -> dict[str, Any]:
+        row: dict[str, Any] = {}
+        for name, (col, fn) in zip(analyses, fns):
+            try:
+                val = fn(suite, prof)
+            except Exception as e:
+                logger.warning(f"{suite.name}/{prof.name}: {name} failed: {e}")
+                val = None
+            if isinstance(val, dict):
+                row.update({f"{col}.{k}": v for k, v in val.items()})
+            elif name != "tracestats":
+                row[col] = val
+        return row
+
+    rows = []
+    for suite, prof, res in map_profiles(suites, run_all, nworkers, per_fs):
+        rows.append(
+            {
+                "root": str(suite.suitedir.parent),
+                "name": suite.name,
+                "profile": prof.name,
+                "ranks": suite.ranks,
+                "aggs": suite.naggs,
+                "steps": suite.nsteps,
+                "run_id": suite.run_id,
+                **(res or {}),
+            }
+        )
+
+    return pl.DataFrame(rows, infer_schema_length=None)
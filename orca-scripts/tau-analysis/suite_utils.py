@@ -1,3 +1,4 @@
+import gzip
 import logging
 from functools import wraps
 import time
@@ -8,14 +9,25 @@ import re
 import os
 import duckdb
 import polars as pl
+import pyarrow.parquet as pq
 from datetime import datetime
-import otf2
+import dirscan
+import mpilog
+import otf2_scan
+import suite_cache
 import yaml
 from concurrent.futures import ThreadPoolExecutor
 import argparse
-import subprocess
 import pandas as pd
 
+try:
+    from orcareader.spans import to_pandas as _to_pandas
+except ImportError:  # orcareader not on sys.path: conversions are not spanned
+
+    def _to_pandas(df: pl.DataFrame, name: str = "to_pandas") -> pd.DataFrame:
+        return df.to_pandas()
+
+
 SUITE_ROOT = Path("/mnt/ltio/orcajobs/suites")
 
 
@@ -45,45 +57,153 @@ ORCA_UMBRELLA = _load_orca_umbrella()
 logger = logging.getLogger(__name__)
 
 
-def _get_linecount_ascii(fpath: Path) -> int:
-    with open(fpath, "r") as f:
-        return len(f.readlines())
+LINECOUNT_BUFSZ = 8 << 20  # per-read buffer
+LINECOUNT_SPLITSZ = 256 << 20  # uncompressed files are counted in ranges of this size
+
+LineCountTask = tuple[Path, int, int]  # (fpath, offset, length); length -1 = gzip stream
 
 
-def _get_linecount_ascii_wc(fpath: Path) -> int:
-    wc_out = subprocess.check_output(["wc", "-l", fpath])
-    return int(wc_out.split()[0])
+def _count_newlines(task: LineCountTask) -> int:
+    "Count newlines in one byte range (or a whole .gz stream) with a reused buffer"
+    fpath, offset, length = task
+    buf = bytearray(LINECOUNT_BUFSZ)
+    view = memoryview(buf)
+    count = 0
 
+    if length < 0:
+        with gzip.open(fpath, "rb") as f:
+            while n := f.readinto(buf):
+                count += buf.count(b"\n", 0, n)
+        return count
 
-def _get_linecount_ascii_wc_batch(fpaths: list[Path]) -> int:
-    logger.info(f"Getting line count for {len(fpaths)} files")
-    fpath_strs = [str(fpath) for fpath in fpaths]
+    with open(fpath, "rb", buffering=0) as f:
+        f.seek(offset)
+        while length > 0:
+            n = f.readinto(view[: min(len(buf), length)])
+            if n == 0:
+                break
+            count += buf.count(b"\n", 0, n)
+            length -= n
+    return count
 
-    wc_out = subprocess.check_output(["wc", "-l", *fpath_strs])
-    wc_str = wc_out.decode("utf-8")
-    # logger.info(f"WC output: {wc_str}")
-    wc_lines = wc_str.split("\n")
-    wc_lines = [l.strip() for l in wc_lines if l.strip()]
 
-    mobj = re.match(r"^(\d+)\s+total$", wc_lines[-1])
-    assert mobj is not None
-    return int(mobj.group(1))
+def _get_linecount_tasks(fpaths: list[Path]) -> list[LineCountTask]:
+    "Split files into byte ranges, largest first, so workers finish together"
+    tasks: list[tuple[int, LineCountTask]] = []
+    for fpath in fpaths:
+        fsize = fpath.stat().st_size
+        if fpath.suffix == ".gz":
+            tasks.append((fsize, (fpath, 0, -1)))
+            continue
+        for off in range(0, fsize, LINECOUNT_SPLITSZ):
+            length = min(LINECOUNT_SPLITSZ, fsize - off)
+            tasks.append((length, (fpath, off, length)))
+
+    return [t for _, t in sorted(tasks, key=lambda x: x[0], reverse=True)]
+
+
+def _get_linecount_ascii(fpath: Path) -> int:
+    return sum(map(_count_newlines, _get_linecount_tasks([fpath])))
 
 
 def _get_linecount_parallel(fpaths: list[Path], nworkers: int = 16) -> int:
-    # divide fpaths into nworkers chunks
-    chunk_size = len(fpaths) // nworkers
-    chunks = [fpaths[i : i + chunk_size] for i in range(0, len(fpaths), chunk_size)]
-    chunk_sizes = ",".join([str(len(chunk)) for chunk in chunks])
-    logger.info(f"Chunk sizes: {chunk_sizes}")
+    "`wc -l` over many files (.gz decompressed), in-process; reads release the GIL"
+    tasks = _get_linecount_tasks(fpaths)
+    logger.info(f"Counting lines: {len(fpaths)} files, {len(tasks)} ranges, {nworkers} workers")
 
     with ThreadPoolExecutor(max_workers=nworkers) as executor:
-        futures = [
-            executor.submit(_get_linecount_ascii_wc_batch, chunk) for chunk in chunks
-        ]
-        results = [future.result() for future in futures]
+        return sum(executor.map(_count_newlines, tasks))
+
 
-    return sum(results)
+def _get_parquet_nrows(fpath: Path) -> int:
+    "Row count from the parquet footer; no data pages are read"
+    return pq.read_metadata(fpath).num_rows
+
+
+def get_parquet_rowcounts(tracedir: Path, nworkers: int = 32) -> pd.DataFrame:
+    """Per-file row counts of an ORCA parquet trace, from footers only.
+
+    Columns: table, ts_beg, ts_end, fpath, nrows. ts_beg/ts_end come from the
+    ts=A_B directory and are -1 for tables without one (orca_events).
+    """
+    fpaths = sorted(
+        f for f in tracedir.glob("*/**/*.parquet") if not suite_cache.is_cache_artifact(f.name)
+    )
+    logger.info(f"Reading {len(fpaths)} parquet footers in {tracedir}")
+
+    with ThreadPoolExecutor(max_workers=nworkers) as ex:
+        nrows = list(ex.map(_get_parquet_nrows, fpaths))
+
+    rows = []
+    for fpath, n in zip(fpaths, nrows):
+        rel = fpath.relative_to(tracedir).parts
+        mobj = re.match(r"^ts=(-?\d+)_(-?\d+)$", rel[1]) if len(rel) > 2 else None
+        ts_beg, ts_end = (int(mobj.group(1)), int(mobj.group(2))) if mobj else (-1, -1)
+        rows.append((rel[0], ts_beg, ts_end, str(fpath), n))
+
+    return pd.DataFrame(rows, columns=["table", "ts_beg", "ts_end", "fpath", "nrows"])
+
+
+FLJOB_SIDECAR = "_fljob.parquet"  # "_": skipped by R*.parquet globs and fingerprints
+FLJOB_COLS = ["probe_name", "ts_ns", "timestep", "swid", "rank", "val"]
+
+
+def _fljob_source(oe_dir: Path) -> pl.LazyFrame:
+    return (
+        pl.scan_parquet(oe_dir / "R*.parquet")
+        .with_columns(pl.col("probe_name").cast(pl.String))
+        .filter(pl.col("probe_name").str.starts_with("fljob"))
+        .select(FLJOB_COLS)
+    )
+
+
+def scan_fljob_rows(oe_dir: Path, fp: str | None = None) -> pl.LazyFrame:
+    """fljob.* rows of orca_events, via a sidecar extracted once per trace.
+
+    fljob counters are a tiny fraction of orca_events, so the first call
+    streams them out of R*.parquet into orca_events/_fljob.parquet, tagged
+    with the fingerprint of the R*.parquet files; later calls scan only the
+    sidecar, and a changed trace triggers re-extraction. Read-only trace dirs
+    fall back to scanning R*.parquet. fp is oe_dir's fingerprint, if known.
+    """
+    sidecar = oe_dir / FLJOB_SIDECAR
+    if fp is None:
+        fp = suite_cache.fingerprint(oe_dir)
+
+    if sidecar.exists():
+        meta = pq.ParquetFile(sidecar).metadata.metadata or {}
+        if meta.get(b"orca_events_fp", b"").decode() == fp:
+            return pl.scan_parquet(sidecar)
+        logger.info(f"Stale fljob sidecar in {oe_dir}, re-extracting")
+
+    tmp = oe_dir / f".{FLJOB_SIDECAR}.{os.getpid()}.tmp"
+    try:
+        _fljob_source(oe_dir).sink_parquet(tmp, metadata={"orca_events_fp": fp})
+        os.replace(tmp, sidecar)
+    except (OSError, pl.exceptions.PolarsError) as e:
+        tmp.unlink(missing_ok=True)
+        logger.warning(f"Cannot write fljob sidecar in {oe_dir} ({e}), scanning R*.parquet")
+        return _fljob_source(oe_dir)
+
+    logger.info(f"Extracted fljob rows to {sidecar}")
+    return pl.scan_parquet(sidecar)
+
+
+def rowcounts_by_table(rcdf: pd.DataFrame) -> pd.DataFrame:
+    "Total rows and files per table, from get_parquet_rowcounts output"
+    return (
+        rcdf.groupby("table")
+        .agg(nrows=("nrows", "sum"), nfiles=("fpath", "count"))
+        .reset_index()
+    )
+
+
+def rowcounts_by_timestep(rcdf: pd.DataFrame) -> pd.DataFrame:
+    "Rows per (ts_beg, ts_end) flush interval, one column per table"
+    rcdf = rcdf[rcdf["ts_beg"] >= 0]
+    return rcdf.pivot_table(
+        index=["ts_beg", "ts_end"], columns="table", values="nrows", aggfunc="sum"
+    ).reset_index()
 
 
 class Profile:
@@ -112,6 +232,13 @@ class Profile:
         else:
             raise FileNotFoundError(f"No trace directory found in {self.path}")
 
+    def _cache_dir(self) -> Path:
+        "Dir whose fingerprint validates cached results for this profile"
+        try:
+            return self.get_tracedir()
+        except FileNotFoundError:
+            return self.path
+
     def _get_evtcount_otf2(self) -> int:
         logger.info(f"Getting event count for profile {self.name}")
 
@@ -119,11 +246,23 @@ class Profile:
         if len(all_files) == 0:
             return -1
 
-        evtcnt = 0
-        for f in all_files:
-            reader = otf2.reader.Reader(str(f))
-            evtcnt += len(reader.events)
-        return evtcnt
+        return otf2_scan.count_events_many(all_files)
+
+    def get_otf2_region_counts(self, cached: bool = True) -> pd.DataFrame:
+        "Per-(archive, rank, location, region) event counts; region '' is the total"
+        tracedir = self.get_tracedir()
+
+        def compute() -> pl.DataFrame:
+            all_dfs = [
+                otf2_scan.scan_region_counts(f).with_columns(
+                    archive=pl.lit(str(f.relative_to(tracedir)))
+                )
+                for f in sorted(tracedir.glob("**/*.otf2"))
+            ]
+            return pl.concat(all_dfs) if all_dfs else pl.DataFrame()
+
+        rcdf = suite_cache.memoize("otf2_region_counts", tracedir, compute, cached=cached)
+        return _to_pandas(rcdf, "otf2_region_counts")
 
     def _get_evtcnt_ascii_generic(self, glob_patt: str, nworkers: int = 8) -> int:
         tracedir = self.get_tracedir()
@@ -135,57 +274,50 @@ class Profile:
 
         return _get_linecount_parallel(all_files, nworkers=nworkers)
 
-    def _get_evtcnt_parquet(self) -> int:
-        logger.info(f"Getting event count for profile {self.name}")
+    def get_parquet_rowcounts(self, cached: bool = True, fp: str | None = None) -> pd.DataFrame:
+        "Footer row counts per parquet file (see get_parquet_rowcounts)"
+        tracedir = self.get_tracedir()
+        return suite_cache.memoize(
+            "parquet_rowcounts",
+            tracedir,
+            lambda: get_parquet_rowcounts(tracedir),
+            cached=cached,
+            fp=fp,
+        )
 
-        evtcnt = 0
-        for item in self.get_tracedir().iterdir():
-            if item.name == "orca_events" or not item.is_dir():
-                continue
-
-            glob_pattern = f"{item}/**/*.parquet"
-            try:
-                pl_df = (
-                    pl.scan_parquet(glob_pattern, parallel="columns")
-                    .select(pl.len())
-                    .collect()
-                )
-                evtcnt += pl_df.item(0, 0)
-            except Exception as e:
-                logger.error(f"Error scanning parquet files in {item}: {e}")
-                evtcnt = -1
-                continue
+    def _get_evtcnt_parquet(self, fp: str | None = None) -> int:
+        logger.info(f"Getting event count for profile {self.name}")
 
-        return evtcnt
+        try:
+            rcdf = self.get_parquet_rowcounts(fp=fp)
+        except Exception as e:
+            logger.error(f"Error reading parquet footers in {self.path}: {e}")
+            return -1
 
-    def get_evtcnt(self, cached: bool = True) -> int:
-        evtcnt = -1
+        return int(rcdf[rcdf["table"] != "orca_events"]["nrows"].sum())
 
-        evtcnt_file = self.path / ".evtcnt"
-        if cached and evtcnt_file.exists():
-            with open(evtcnt_file, "r") as f:
-                evtcnt = int(f.read())
-            return evtcnt
+    def get_evtcnt(self, cached: bool = True, fp: str | None = None) -> int:
+        "fp: fingerprint of _cache_dir(), if the caller has already walked it"
+        return suite_cache.memoize(
+            "evtcnt", self._cache_dir(), lambda: self._compute_evtcnt(fp), cached=cached, fp=fp
+        )
 
-        if evtcnt_file.exists():
-            os.remove(evtcnt_file)
-            logger.info(f"Removed cached event count file: {evtcnt_file}")
+    def _compute_evtcnt(self, fp: str | None = None) -> int:
+        evtcnt = -1
 
         if self.name == "07_or_tracetgt":
-            evtcnt = self._get_evtcnt_parquet()
+            evtcnt = self._get_evtcnt_parquet(fp)
         elif self.name == "10_tau_tracetgt" or self.name == "13_scorep":
             evtcnt = self._get_evtcount_otf2()
         elif self.name == "11_dftracer":
-            evtcnt = self._get_evtcnt_ascii_generic("*.pfw")
+            evtcnt = self._get_evtcnt_ascii_generic("*.pfw*")
         elif self.name == "17_caliper_tracetgt":
             evtcnt = self._get_evtcnt_ascii_generic("*.cali")
 
-        with open(evtcnt_file, "w") as f:
-            f.write(str(evtcnt))
-
         return evtcnt
 
-    def get_tracestats_df(self, cached: bool = True) -> pd.DataFrame:
+    def get_tracestats_df(self, cached: bool = True, fp: str | None = None) -> pd.DataFrame:
+        "fp: fingerprint of the orca_events dir, if the caller has already walked it"
         trace_dir = self.get_tracedir()
         oedf_glob = trace_dir / "orca_events" / "R*.parquet"
 
@@ -193,41 +325,34 @@ class Profile:
             logger.warning(f"No orca_events directory found in {trace_dir}")
             return pd.DataFrame()
 
-        flagg_cached = f"{trace_dir}/tracestats_cached.csv"
-        if cached and os.path.exists(flagg_cached):
-            return pd.read_csv(flagg_cached)
-
-        if os.path.exists(flagg_cached):
-            os.remove(flagg_cached)
-            logger.info(f"Removed cached tracestats file: {flagg_cached}")
-
-        cols = ["probe_name", "ts_ns", "timestep", "swid", "rank", "val"]
-        fldf = (
-            pl.scan_parquet(oedf_glob)
-            .filter(pl.col("probe_name").str.starts_with("fljob"))
-            .select(cols)
-            .collect()
+        fl_pdf = suite_cache.memoize(
+            "tracestats",
+            oedf_glob.parent,
+            lambda: self._compute_tracestats_df(trace_dir, fp),
+            cached=cached,
+            fp=fp,
         )
+        # not part of the cached frame: entries are shared by symlinked dirs
+        fl_pdf.insert(0, "tracedir", str(trace_dir))
+        return fl_pdf
+
+    def _compute_tracestats_df(self, trace_dir: Path, fp: str | None = None) -> pd.DataFrame:
+        lf = scan_fljob_rows(trace_dir / "orca_events", fp)
 
         # First check that all timesteps have the same number of rows
-        check_df = fldf.group_by("timestep").agg(pl.len())
+        check_df = lf.group_by("timestep").agg(pl.len()).collect(engine="streaming")
         assert check_df["len"].unique().len() == 1
 
         # Group by (timestep, probe_name), add val
         flagg_df = (
-            fldf.group_by(["timestep", "probe_name"])
+            lf.filter(pl.col("probe_name").str.starts_with("fljob.nrows"))
+            .group_by(["timestep", "probe_name"])
             .agg(pl.col("val").sum(), pl.mean("ts_ns"))
+            .collect(engine="streaming")
             .sort("timestep")
         )
-        flagg_df = flagg_df.filter(pl.col("probe_name").str.starts_with("fljob.nrows"))
         fl_pdf = flagg_df.pivot(on="probe_name", index="timestep", values=["val"])
-        fl_pdf = fl_pdf.to_pandas()
-        fl_pdf.insert(0, "tracedir", str(trace_dir))
-
-        logger.info(f"Writing cached tracestats to: {flagg_cached}")
-        fl_pdf.to_csv(flagg_cached, index=False)
-
-        return fl_pdf
+        return _to_pandas(fl_pdf, "tracestats")
 
 
 class Suite:
@@ -297,38 +422,6 @@ def pretty_size(size: float) -> str:
     return f"{size:.1f} TB"
 
 
-def get_dir_size(dir_path: Path) -> int:
-    "Get `du -sh` equivalent of directory"
-    total_size = 0
-    for fpath in dir_path.rglob("*"):
-        if fpath.is_file():
-            total_size += fpath.stat().st_size
-    return total_size
-
-
-def get_file_size(fpath: Path) -> int:
-    "Get the size of a file"
-    return fpath.stat().st_size
-
-
-def get_dir_size_cached(dir_path: Path, cache: bool = True) -> pd.DataFrame:
-    df_cache = f"{dir_path}/filesizes_cached.csv"
-    if cache and os.path.exists(df_cache):
-        return pd.read_csv(df_cache)
-
-    # get size as a dataframe fpath, fsize
-    all_fpaths = list(dir_path.rglob("*"))
-    # all_fsizes = [fpath.stat().st_size for fpath in all_fpaths]
-    # multiprocessing does not behave well with Panel
-    with ThreadPoolExecutor(max_workers=32) as ex:
-        all_fsizes = list(ex.map(get_file_size, all_fpaths))
-
-    df = pd.DataFrame({"fpath": all_fpaths, "fsize": all_fsizes})
-    df.to_csv(df_cache, index=False)
-
-    return df
-
-
 def get_tracedir(profile_dir: Path) -> Path:
     "Returns the dir containing trace data"
 
@@ -343,46 +436,30 @@ def get_tracedir(profile_dir: Path) -> Path:
         raise FileNotFoundError(f"No trace directory found in {profile_dir}")
 
 
+def get_profile_tracesize(profile: Profile) -> int:
+    "Bytes in the profile's trace dir; ORCA's own orca_events are excluded"
+    ptdf = dirscan.scan_dir(profile.get_tracedir(), skip=suite_cache.is_cache_artifact)
+
+    if re.match(r"^(\d+)_or_(.*)$", profile.name):
+        logger.debug(f"{profile.name}: excluding orca_events from tracesz calc")
+        ptdf = ptdf.filter(pl.col("table") != "orca_events")
+
+    return int(ptdf["size"].sum())
+
+
 def get_suite_tracesizes(suite: Suite) -> pd.DataFrame:
     "Get the size of the trace directories for all profiles in a suite"
     logger.info(f"Getting trace sizes for suite {suite}")
 
     df = get_suitedf(suite)
-    tracedirs = [get_tracedir(p.path) for p in suite.profiles]
-    trace_dfs = [get_dir_size_cached(td) for td in tracedirs]
-
-    tracesizes = []
-    for prof, ptdf in zip(suite.profiles, trace_dfs):
-        mobj = re.match(r"^(\d+)_or_(.*)$", prof.name)
-        if mobj:
-            # filter out orca_events
-            logger.warning(f"{prof.name}: excluding orca_events from tracesz calc")
-            ptdf = ptdf[~ptdf["fpath"].str.contains("orca_events", na=False)]
-            tracesizes.append(ptdf["fsize"].sum())
-        else:
-            tracesizes.append(ptdf["fsize"].sum())
-
-    df["trace_size"] = tracesizes
+    df["trace_size"] = [get_profile_tracesize(p) for p in suite.profiles]
     return df
 
 
 def get_profile_amr_runtime(profile_dir: Path) -> float:
+    "Walltime from the profile's mpi.log (0 if the run did not finish)"
     logger.debug(f"Getting runtime for profile {profile_dir}")
-    mpi_log = f"{profile_dir}/mpi.log"
-
-    with open(mpi_log, "r") as f:
-        lines = f.readlines()
-        lines = [l.strip() for l in lines if "walltime used" in l]
-
-    # print(lines)
-    if len(lines) == 0:
-        return 0
-
-    mobj = re.match(r"walltime used = (\d+\.\d+)$", lines[0])
-    if mobj is None:
-        return 0
-
-    return float(mobj.group(1))
+    return mpilog.get_walltime(Path(profile_dir) / "mpi.log")
 
 
 def get_suitedf(suite: Suite) -> pd.DataFrame:
@@ -447,6 +524,17 @@ def read_duckdb(duckdb_path: str) -> pd.DataFrame:
     return df
 
 
+def _list_subdirs(dir_path: Path) -> list[Path]:
+    with os.scandir(dir_path) as it:
+        return [Path(e.path) for e in it if e.is_dir()]
+
+
+def _list_subdirs_many(dir_paths: list[Path], nworkers: int = 16) -> dict[Path, list[Path]]:
+    "Profile dirs of many suites, listed concurrently (metadata latency-bound)"
+    with ThreadPoolExecutor(max_workers=nworkers) as ex:
+        return dict(zip(dir_paths, ex.map(_list_subdirs, dir_paths)))
+
+
 def read_suites(suites_yaml: Path) -> SuiteMap:
     with open(suites_yaml, "r") as f:
         yaml_data = yaml.load(f, Loader=yaml.FullLoader)
@@ -454,6 +542,9 @@ def read_suites(suites_yaml: Path) -> SuiteMap:
     # print(f"YAML data: {yaml_data}")
 
     rootdir = Path(yaml_data["root"])
+    suitedirs = [rootdir / yd["suitedir"] for yd in yaml_data["suites"]]
+    listings = _list_subdirs_many([d for d in suitedirs if d.exists()])
+
     suites: SuiteMap = {}
     for yd in yaml_data["suites"]:
         suitedir = rootdir / yd["suitedir"]
@@ -462,8 +553,7 @@ def read_suites(suites_yaml: Path) -> SuiteMap:
             logger.warning(f"No suite {yd['name']} in dir: {suitedir}")
             continue
 
-        prof_dirs = [d for d in suitedir.iterdir() if d.is_dir()]
-        prof_dirs = sorted(prof_dirs, key=lambda x: x.name)
+        prof_dirs = sorted(listings[suitedir], key=lambda x: x.name)
 
         # Override profiles if any specified
         prof_dict = {os.path.basename(d): d for d in prof_dirs}
@@ -486,9 +576,11 @@ def read_v2_suites(suite_rootdir: Path) -> list[Suite]:
     suite_dirs = [d for d in suite_rootdir.iterdir() if d.is_dir()]
     logger.info(f"Found {len(suite_dirs)} suites in {suite_rootdir}")
 
+    listings = _list_subdirs_many(suite_dirs)
+
     suites: list[Suite] = []
     for suite_rootdir in suite_dirs:
-        prof_dirs = [d for d in suite_rootdir.iterdir() if d.is_dir()]
+        prof_dirs = listings[suite_rootdir]
         logger.debug(f"Found {len(prof_dirs)} profiles in suite {suite_rootdir}")
 
         profiles = [Profile(path=d) for d in prof_dirs]
@@ -1,16 +1,35 @@
-from .common import QueryResult, QueryType, Range, func_micros, now_micros
+from .common import (
+    COLLECTIVES,
+    QueryResult,
+    QueryType,
+    Range,
+    collect,
+    func_micros,
+    now_micros,
+    phase,
+    record_phases,
+)
 from .caliper import CaliperQuery
 from .dftracer import DfTracerQuery
 from .orca import OrcaQuery
+from .adapters import CANONICAL_SCHEMA, TraceAdapter, get_adapter
+from .unified import UnifiedQuery
 
 __all__ = [
+    "COLLECTIVES",
     "QueryResult",
     "QueryType",
     "Range",
+    "collect",
     "func_micros",
     "now_micros",
+    "phase",
+    "record_phases",
     "CaliperQuery",
     "DfTracerQuery",
     "OrcaQuery",
+    "CANONICAL_SCHEMA",
+    "TraceAdapter",
+    "get_adapter",
+    "UnifiedQuery",
 ]
-
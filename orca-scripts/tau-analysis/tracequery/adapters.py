@@ -0,0 +1,339 @@
+"""Normalize each tracer's output into one canonical event schema.
+
+Every adapter exposes scan() -> pl.LazyFrame with the CANONICAL_SCHEMA columns:
+
+    rank      emitting rank (pid for DFTracer, which does not record MPI ranks)
+    ts_ns     event start, nanoseconds
+    dura_ns   event duration, nanoseconds
+    name      MPI function / probe / region name
+    category  one of CAT_COLLECTIVE, CAT_MESSAGE, CAT_REGION
+    seq       collective sequence id (ORCA swid, else per-rank ordinal)
+
+ORCA traces are already Parquet and are projected lazily. Caliper, DFTracer and
+OTF2 traces are converted once per source file into a Parquet cache next to
+the trace (in parallel), and later scans only read the cache.
+"""
+
+import gzip
+import logging
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable
+
+import polars as pl
+
+from .common import COLLECTIVES
+
+logger = logging.getLogger(__name__)
+
+CANONICAL_SCHEMA: dict[str, pl.DataType] = {
+    "rank": pl.Int32,
+    "ts_ns": pl.Int64,
+    "dura_ns": pl.Int64,
+    "name": pl.String,
+    "category": pl.String,
+    "seq": pl.Int64,
+}
+
+CAT_COLLECTIVE = "collective"
+CAT_MESSAGE = "message"
+CAT_REGION = "region"
+
+# ORCA table -> canonical category. orca_events holds ORCA's own counters.
+ORCA_TABLES = {
+    "mpi_collectives": CAT_COLLECTIVE,
+    "mpi_messages": CAT_MESSAGE,
+    "kokkos_events": CAT_REGION,
+}
+
+CACHE_DIRNAME = ".canonical"
+
+
+def _to_canonical(df: pl.DataFrame) -> pl.DataFrame:
+    """Derive category and seq from (rank, ts_ns, dura_ns, name) and cast."""
+    category = (
+        pl.when(pl.col("name").is_in(list(COLLECTIVES)))
+        .then(pl.lit(CAT_COLLECTIVE))
+        .when(pl.col("name").str.starts_with("MPI_"))
+        .then(pl.lit(CAT_MESSAGE))
+        .otherwise(pl.lit(CAT_REGION))
+    )
+    return (
+        df.with_columns(category=category)
+        .sort(["rank", "ts_ns"])
+        .with_columns(seq=pl.int_range(pl.len()).over(["rank", "category"]))
+        .select([pl.col(c).cast(t) for c, t in CANONICAL_SCHEMA.items()])
+    )
+
+
+# -----------------------------------------------------------------------------
+# Module-level converters for multiprocessing (must be picklable)
+# -----------------------------------------------------------------------------
+
+
+def _leaf(val) -> str:
+    """Caliper nested attributes come back as lists; keep the innermost."""
+    if isinstance(val, list):
+        return str(val[-1]) if val else ""
+    return "" if val is None else str(val)
+
+
+def convert_cali(src: Path) -> pl.DataFrame:
+    """Convert one mpi-<rank>.cali file."""
+    from caliperreader import CaliperReader
+
+    mobj = re.match(r"^mpi-(\d+)\.cali$", src.name)
+    assert mobj is not None, f"Unexpected caliper file name: {src}"
+
+    reader = CaliperReader()
+    reader.read(str(src))
+    rows = [
+        (
+            r.get("time.offset.ns"),
+            r.get("time.duration.ns"),
+            _leaf(r.get("mpi.function") or r.get("region")),
+        )
+        for r in reader.records
+    ]
+
+    df = pl.DataFrame(
+        rows, schema=["ts_ns", "dura_ns", "name"], orient="row", strict=False
+    )
+    df = df.select(
+        pl.lit(int(mobj.group(1))).alias("rank"),
+        pl.col("ts_ns").cast(pl.Float64, strict=False).cast(pl.Int64),
+        pl.col("dura_ns").cast(pl.Float64, strict=False).fill_null(0).cast(pl.Int64),
+        pl.col("name").cast(pl.String),
+    ).filter(pl.col("ts_ns").is_not_null())
+    return _to_canonical(df)
+
+
+PFW_FIELDS = pl.Struct(
+    {"name": pl.String, "pid": pl.Int64, "ts": pl.Float64, "dur": pl.Float64}
+)
+
+
+def convert_pfw(src: Path) -> pl.DataFrame:
+    """Convert one DFTracer .pfw/.pfw.gz file (one JSON event per line, in us)."""
+    opener = gzip.open if src.suffix == ".gz" else open
+    with opener(src, "rb") as f:
+        lines = pl.Series("line", f.read().decode("utf-8").splitlines())
+
+    lines = lines.str.strip_chars().str.strip_chars_end(",")
+    events = (
+        lines.filter(lines.str.starts_with("{"))
+        .str.json_decode(PFW_FIELDS)
+        .struct.unnest()
+    )
+    df = events.filter(pl.col("ts").is_not_null()).select(
+        pl.col("pid").alias("rank"),
+        (pl.col("ts") * 1e3).cast(pl.Int64).alias("ts_ns"),
+        (pl.col("dur").fill_null(0) * 1e3).cast(pl.Int64).alias("dura_ns"),
+        pl.col("name").fill_null(""),
+    )
+    return _to_canonical(df)
+
+
+def _otf2_rank(location) -> int | None:
+    """Parse the MPI rank out of a TAU/Score-P location or location group."""
+    for label in (location.group.name, location.name):
+        mobj = re.search(r"Rank (\d+)", label or "")
+        if mobj:
+            return int(mobj.group(1))
+    return None
+
+
+def convert_otf2(src: Path) -> pl.DataFrame:
+    """Convert one .otf2 archive by pairing Enter/Leave events per location."""
+    import otf2
+
+    ranks: list[int] = []
+    ts_ns: list[int] = []
+    dura_ns: list[int] = []
+    names: list[str] = []
+
+    with otf2.reader.open(str(src)) as reader:
+        clock = reader.definitions.clock_properties
+        scale = 1e9 / clock.timer_resolution
+        offset = clock.global_offset
+
+        stacks: dict = {}
+        loc_ranks: dict = {}
+        for location, event in reader.events:
+            if isinstance(event, otf2.events.Enter):
+                stacks.setdefault(location, []).append(event.time)
+            elif isinstance(event, otf2.events.Leave):
+                stack = stacks.get(location)
+                if not stack:
+                    continue
+                t_enter = stack.pop()
+                if location not in loc_ranks:
+                    rank = _otf2_rank(location)
+                    loc_ranks[location] = len(loc_ranks) if rank is None else rank
+                ranks.append(loc_ranks[location])
+                ts_ns.append(int((t_enter - offset) * scale))
+                dura_ns.append(int((event.time - t_enter) * scale))
+                names.append(event.region.name)
+
+    df = pl.DataFrame(
+        {"rank": ranks, "ts_ns": ts_ns, "dura_ns": dura_ns, "name": names},
+        schema={"rank": pl.Int64, "ts_ns": pl.Int64, "dura_ns": pl.Int64, "name": pl.String},
+    )
+    return _to_canonical(df)
+
+
+def _convert_worker(args: tuple[Callable[[Path], pl.DataFrame], Path, Path]) -> int:
+    """Convert src to dst via a temp file so readers never see partial output."""
+    convert_fn, src, dst = args
+    df = convert_fn(src)
+    tmp = dst.with_name(f".{dst.name}.{os.getpid()}.tmp")
+    df.write_parquet(tmp)
+    os.replace(tmp, dst)
+    return len(df)
+
+
+# -----------------------------------------------------------------------------
+# Adapters
+# -----------------------------------------------------------------------------
+
+
+class TraceAdapter:
+    """Maps one tracer's output directory to CANONICAL_SCHEMA."""
+
+    tracer = ""
+
+    def __init__(self, trace_dir: Path):
+        self.trace_dir = Path(trace_dir)
+
+    def scan(self) -> pl.LazyFrame:
+        raise NotImplementedError
+
+
+class OrcaAdapter(TraceAdapter):
+    """ORCA parquet root; tables are projected lazily, nothing is converted."""
+
+    tracer = "orca"
+
+    def scan(self) -> pl.LazyFrame:
+        frames = []
+        for table, category in ORCA_TABLES.items():
+            table_dir = self.trace_dir / table
+            if not table_dir.is_dir():
+                continue
+
+            lf = pl.scan_parquet(str(table_dir / "**/*.parquet")).select(
+                pl.col("rank").cast(pl.Int32),
+                pl.col("ts_ns").cast(pl.Int64),
+                pl.col("dura_ns").cast(pl.Int64),
+                pl.col("probe_name").alias("name").cast(pl.String),
+                pl.lit(category).alias("category"),
+                pl.col("swid").cast(pl.Int64).alias("seq"),
+            )
+            frames.append(lf)
+
+        if not frames:
+            raise FileNotFoundError(f"No ORCA tables found in {self.trace_dir}")
+
+        return pl.concat(frames, how="vertical")
+
+
+class ConvertingAdapter(TraceAdapter):
+    """Adapter for row-oriented formats, converted per file into a Parquet cache.
+
+    A cached file is reused while it is newer than its source.
+    """
+
+    glob_patt = ""
+    convert_fn: Callable[[Path], pl.DataFrame]
+
+    def __init__(self, trace_dir: Path, cache_dir: Path | None = None, nworkers: int = 1):
+        super().__init__(trace_dir)
+        self.cache_dir = Path(cache_dir) if cache_dir else self.trace_dir / CACHE_DIRNAME
+        self.nworkers = nworkers
+
+    def source_files(self) -> list[Path]:
+        return sorted(
+            f for f in self.trace_dir.glob(self.glob_patt) if CACHE_DIRNAME not in f.parts
+        )
+
+    def cache_path(self, src: Path) -> Path:
+        rel = src.relative_to(self.trace_dir).as_posix().replace("/", "__")
+        return self.cache_dir / f"{rel}.parquet"
+
+    def convert(self) -> list[Path]:
+        """Convert stale or missing sources; return all cached file paths."""
+        srcs = self.source_files()
+        if not srcs:
+            raise FileNotFoundError(f"No {self.glob_patt} files in {self.trace_dir}")
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        dsts = [self.cache_path(src) for src in srcs]
+        jobs = [
+            (type(self).convert_fn, src, dst)
+            for src, dst in zip(srcs, dsts)
+            if not dst.exists() or dst.stat().st_mtime < src.stat().st_mtime
+        ]
+
+        logger.info(
+            f"[{self.tracer}] {len(srcs)} files, {len(jobs)} to convert, "
+            f"cache: {self.cache_dir}"
+        )
+
+        if self.nworkers > 1 and len(jobs) > 1:
+            # Polars' thread pool does not survive fork(); spawn fresh workers
+            ctx = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=self.nworkers, mp_context=ctx) as ex:
+                list(ex.map(_convert_worker, jobs))
+        else:
+            for job in jobs:
+                _convert_worker(job)
+
+        return dsts
+
+    def scan(self) -> pl.LazyFrame:
+        return pl.scan_parquet(self.convert())
+
+
+class CaliperAdapter(ConvertingAdapter):
+    tracer = "caliper"
+    glob_patt = "mpi-*.cali"
+    convert_fn = staticmethod(convert_cali)
+
+
+class DfTracerAdapter(ConvertingAdapter):
+    tracer = "dftracer"
+    glob_patt = "*.pfw*"
+    convert_fn = staticmethod(convert_pfw)
+
+    def source_files(self) -> list[Path]:
+        return [f for f in super().source_files() if f.name.endswith((".pfw", ".pfw.gz"))]
+
+
+class Otf2Adapter(ConvertingAdapter):
+    """TAU and Score-P OTF2 archives (any *.otf2 anchor file below trace_dir)."""
+
+    tracer = "otf2"
+    glob_patt = "**/*.otf2"
+    convert_fn = staticmethod(convert_otf2)
+
+
+ADAPTERS: dict[str, type[TraceAdapter]] = {
+    "orca": OrcaAdapter,
+    "caliper": CaliperAdapter,
+    "dftracer": DfTracerAdapter,
+    "otf2": Otf2Adapter,
+}
+
+
+def get_adapter(tracer: str, trace_dir: Path, **kwargs) -> TraceAdapter:
+    """Construct the adapter for tracer; kwargs only apply to ConvertingAdapters."""
+    if tracer not in ADAPTERS:
+        raise ValueError(f"Unknown tracer {tracer}, expected one of {list(ADAPTERS)}")
+
+    adapter_cls = ADAPTERS[tracer]
+    if not issubclass(adapter_cls, ConvertingAdapter):
+        return adapter_cls(trace_dir)
+    return adapter_cls(trace_dir, **kwargs)
@@ -0,0 +1,381 @@
+"""Repeatable benchmark harness for the tracequery classes.
+
+Each (tracer, query) pair runs `warmup` untimed and `repeats` timed iterations
+per cache mode:
+
+- cold: every trace file is evicted from the page cache with
+  posix_fadvise(POSIX_FADV_DONTNEED) before each iteration (no sudo needed)
+- warm: files are left cached; warmup iterations populate the cache
+
+Every timed iteration becomes one tidy row: the QueryResult columns that
+plotsrc/query_suite.py reads, plus mode, iteration, per-phase timings
+(index/io/compute, see common.phase), peak RSS and /proc/<pid>/io deltas.
+
+Caliper reads in multiprocessing.Pool workers and DfTracer in Dask workers,
+so I/O counts the whole process tree (reaped children's counters are folded
+into the parent's by the kernel; live ones are summed), and the children's
+peak RSS is reported next to the parent's (see ChildRssMonitor).
+
+Usage:
+    python -m tracequery.bench -t orca -d <profile>/parquet -o results.csv
+"""
+
+import argparse
+import logging
+import os
+import resource
+import threading
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, Literal
+
+import pandas as pd
+
+from .common import QueryType, func_micros, record_phases
+
+logger = logging.getLogger(__name__)
+
+CacheMode = Literal["cold", "warm"]
+
+QUERY_TYPES: list[QueryType] = ["count_sync_maxdur", "count_mpi_wait_dur", "count_window"]
+
+
+@dataclass
+class BenchConfig:
+    warmup: int = 1
+    repeats: int = 5
+    modes: tuple[CacheMode, ...] = ("cold", "warm")
+    queries: list[QueryType] = field(default_factory=lambda: list(QUERY_TYPES))
+    sync_thresh_ms: float = 10.0
+    wait_thresh_ms: float = 1.0
+    window_s: float = 1.0
+
+
+@dataclass
+class BenchCase:
+    """A tracer's trace and a factory for fresh query objects.
+
+    make_query is called once per iteration and timed as part of the index
+    phase; evict_dirs are walked for cold-cache eviction (default: trace_dir).
+    """
+
+    run_type: str
+    trace_dir: Path
+    make_query: Callable[[], object]
+    evict_dirs: list[Path] = field(default_factory=list)
+
+
+@dataclass
+class BenchSample:
+    query_name: QueryType
+    trace_dir: Path
+    run_type: str
+    data: str
+    total_us: int
+    mode: CacheMode
+    iter: int
+    index_us: int
+    io_us: int
+    compute_us: int
+    peak_rss_kb: int
+    children_peak_rss_kb: int
+    read_bytes: int
+    rchar: int
+
+
+# -----------------------------------------------------------------------------
+# Process-level probes
+# -----------------------------------------------------------------------------
+
+
+def evict_tree(root: Path) -> int:
+    """Drop every file under root from the page cache. Returns files evicted."""
+    nfiles = 0
+    for dirpath, _, fnames in os.walk(root):
+        for fname in fnames:
+            fd = os.open(os.path.join(dirpath, fname), os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+                nfiles += 1
+            finally:
+                os.close(fd)
+    return nfiles
+
+
+def descendant_pids() -> list[int]:
+    """Live descendants of this process, from the ppid in /proc/<pid>/stat."""
+    children: dict[int, list[int]] = {}
+    for entry in os.scandir("/proc"):
+        if not entry.name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry.name}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # comm may contain spaces and parens; ppid is the 2nd field after it
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(entry.name))
+
+    pids: list[int] = []
+    stack = [os.getpid()]
+    while stack:
+        kids = children.get(stack.pop(), [])
+        pids.extend(kids)
+        stack.extend(kids)
+    return pids
+
+
+def read_proc_io(pid: int | str = "self") -> dict[str, int]:
+    """Counters from /proc/<pid>/io (read_bytes: storage, rchar: read syscalls)."""
+    with open(f"/proc/{pid}/io") as f:
+        return {k: int(v) for k, v in (line.split(":") for line in f)}
+
+
+def read_tree_io() -> dict[str, int]:
+    """read_proc_io() summed over this process and its live descendants.
+
+    Reaped children are already in /proc/self/io, so the difference of two
+    reads covers workers started, finished or still running in between.
+    """
+    total = read_proc_io()
+    for pid in descendant_pids():
+        try:
+            counters = read_proc_io(pid)
+        except OSError:  # exited since listed, or not ours
+            continue
+        for k, v in counters.items():
+            total[k] = total.get(k, 0) + v
+    return total
+
+
+def reset_peak_rss(pid: int | str = "self") -> None:
+    """Reset VmHWM so the next read_peak_rss_kb covers only what follows."""
+    try:
+        with open(f"/proc/{pid}/clear_refs", "w") as f:
+            f.write("5")
+    except OSError as e:
+        logger.warning(f"Could not reset peak RSS, values are process-lifetime: {e}")
+
+
+def read_peak_rss_kb(pid: int | str = "self") -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    return -1
+
+
+class ChildRssMonitor:
+    """Peak RSS of child processes over a block, in KiB.
+
+    A thread samples each live descendant's VmHWM every interval_s, keeping
+    the last value per pid. Children that start and exit between samples
+    are only seen through getrusage(RUSAGE_CHILDREN), which is counted only
+    if that lifetime maximum grew during the block. The result is the sum
+    of the per-child peaks: an upper bound on the children's RSS at any one
+    time, as concurrent workers peak together.
+    """
+
+    def __init__(self, interval_s: float = 0.02):
+        self.interval_s = interval_s
+        self.peaks: dict[int, int] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _sample(self) -> None:
+        for pid in descendant_pids():
+            try:
+                self.peaks[pid] = max(self.peaks.get(pid, 0), read_peak_rss_kb(pid))
+            except OSError:
+                continue
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            self._sample()
+
+    def __enter__(self) -> "ChildRssMonitor":
+        # long-lived workers (Dask) would otherwise report earlier iterations
+        for pid in descendant_pids():
+            reset_peak_rss(pid)
+        self._maxrss_beg = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+    @property
+    def peak_rss_kb(self) -> int:
+        peak = sum(self.peaks.values())
+        maxrss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        if maxrss > self._maxrss_beg:
+            peak = max(peak, maxrss)
+        return peak
+
+
+# -----------------------------------------------------------------------------
+# Runner
+# -----------------------------------------------------------------------------
+
+
+def _query_call(query, qtype: QueryType, cfg: BenchConfig, window) -> tuple[Callable, str]:
+    if qtype == "count_sync_maxdur":
+        return lambda: query.count_sync_maxdur(cfg.sync_thresh_ms), f"thresh_ms={cfg.sync_thresh_ms}"
+    if qtype == "count_mpi_wait_dur":
+        return lambda: query.count_mpi_wait_dur(cfg.wait_thresh_ms), f"thresh_ms={cfg.wait_thresh_ms}"
+    return lambda: query.count_window(window), f"window_s={cfg.window_s}"
+
+
+def _close(query) -> None:
+    if hasattr(query, "close"):
+        query.close()
+
+
+def run_once(case: BenchCase, qtype: QueryType, cfg: BenchConfig, window, mode: CacheMode, it: int) -> BenchSample:
+    if mode == "cold":
+        for d in case.evict_dirs or [case.trace_dir]:
+            evict_tree(d)
+
+    reset_peak_rss()
+    io_beg = read_tree_io()
+
+    with record_phases() as phases, ChildRssMonitor() as children:
+        def run():
+            # the query classes attribute their own discovery to phase("index")
+            query = case.make_query()
+            try:
+                fn, params = _query_call(query, qtype, cfg, window)
+                return fn(), params
+            finally:
+                _close(query)
+
+        (count, params), total_us = func_micros(run)
+
+    io_end = read_tree_io()
+
+    return BenchSample(
+        query_name=qtype,
+        trace_dir=case.trace_dir,
+        run_type=case.run_type,
+        data=f"{params},count={count}",
+        total_us=total_us,
+        mode=mode,
+        iter=it,
+        index_us=phases.get("index", 0),
+        io_us=phases.get("io", 0),
+        compute_us=phases.get("compute", 0),
+        peak_rss_kb=read_peak_rss_kb(),
+        children_peak_rss_kb=children.peak_rss_kb,
+        read_bytes=io_end["read_bytes"] - io_beg["read_bytes"],
+        rchar=io_end["rchar"] - io_beg["rchar"],
+    )
+
+
+def run_case(case: BenchCase, cfg: BenchConfig) -> list[BenchSample]:
+    """Run all configured queries and modes for one case."""
+    window = None
+    if "count_window" in cfg.queries:
+        query = case.make_query()
+        window = query.get_window_bounds(cfg.window_s)
+        _close(query)
+
+    samples: list[BenchSample] = []
+    for qtype in cfg.queries:
+        for mode in cfg.modes:
+            for it in range(cfg.warmup + cfg.repeats):
+                sample = run_once(case, qtype, cfg, window, mode, it - cfg.warmup)
+                tag = "warmup" if sample.iter < 0 else f"iter {sample.iter}"
+                print(
+                    f"-INFO- [{case.run_type}] {qtype} {mode} {tag}: "
+                    f"{sample.total_us/1e3:.1f} ms ({sample.data})"
+                )
+                if sample.iter >= 0:
+                    samples.append(sample)
+
+    return samples
+
+
+def summarize(samples: list[BenchSample]) -> pd.DataFrame:
+    """Mean/std/min/median of total_us per (run_type, trace_dir, query, mode)."""
+    df = pd.DataFrame([asdict(s) for s in samples])
+    keys = ["run_type", "trace_dir", "query_name", "mode"]
+    return (
+        df.groupby(keys)["total_us"]
+        .agg(["count", "mean", "std", "min", "median"])
+        .reset_index()
+    )
+
+
+def write_samples(samples: list[BenchSample], csv_path: Path) -> pd.DataFrame:
+    df = pd.DataFrame([asdict(s) for s in samples])
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(csv_path, index=False)
+    print(f"-INFO- Wrote {len(df)} samples to {csv_path}")
+    return df
+
+
+# -----------------------------------------------------------------------------
+# CLI
+# -----------------------------------------------------------------------------
+
+
+def make_case(tracer: str, trace_dir: Path, nworkers: int = 1, tmp_dir: Path | None = None) -> BenchCase:
+    """Build a case for orca/caliper/dftracer, or '<tracer>-unified'."""
+    from . import CaliperQuery, DfTracerQuery, OrcaQuery, UnifiedQuery
+
+    if tracer.endswith("-unified"):
+        base = tracer.removesuffix("-unified")
+        # convert once up front so timed runs measure the canonical layout
+        UnifiedQuery.for_tracer(base, trace_dir, nworkers=nworkers).adapter.scan()
+        make = lambda: UnifiedQuery.for_tracer(base, trace_dir, nworkers=nworkers)
+    elif tracer == "orca":
+        make = lambda: OrcaQuery(trace_dir)
+    elif tracer == "caliper":
+        make = lambda: CaliperQuery(trace_dir, nworkers=nworkers)
+    elif tracer == "dftracer":
+        assert tmp_dir is not None, "dftracer needs --tmp-dir"
+        make = lambda: DfTracerQuery(trace_dir, tmp_dir=tmp_dir)
+    else:
+        raise ValueError(f"Unknown tracer: {tracer}")
+
+    return BenchCase(run_type=tracer, trace_dir=trace_dir, make_query=make)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tracer", "-t", required=True)
+    parser.add_argument("--trace-dir", "-d", type=Path, required=True, nargs="+")
+    parser.add_argument("--out", "-o", type=Path, required=True)
+    parser.add_argument("--warmup", "-w", type=int, default=1)
+    parser.add_argument("--repeats", "-r", type=int, default=5)
+    parser.add_argument("--modes", "-m", nargs="+", choices=["cold", "warm"], default=["cold", "warm"])
+    parser.add_argument("--queries", "-q", nargs="+", choices=QUERY_TYPES, default=QUERY_TYPES)
+    parser.add_argument("--nworkers", "-n", type=int, default=1)
+    parser.add_argument("--tmp-dir", type=Path, default=None)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    cfg = BenchConfig(
+        warmup=args.warmup,
+        repeats=args.repeats,
+        modes=tuple(args.modes),
+        queries=args.queries,
+    )
+
+    samples: list[BenchSample] = []
+    for trace_dir in args.trace_dir:
+        case = make_case(args.tracer, trace_dir, nworkers=args.nworkers, tmp_dir=args.tmp_dir)
+        samples.extend(run_case(case, cfg))
+
+    write_samples(samples, args.out)
+    print(summarize(samples).to_string())
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -7,7 +7,7 @@ from pathlib import Path
 import pandas as pd
 from caliperreader import CaliperReader
 
-from .common import Range
+from .common import COLLECTIVES, Range, phase
 
 
 # -----------------------------------------------------------------------------
@@ -22,16 +22,6 @@ def _read_cali_df(trace_file: Path) -> pd.DataFrame:
     return pd.DataFrame(reader.records)
 
 
-COLLECTIVES = {
-    "MPI_Allgather",
-    "MPI_Allreduce",
-    "MPI_Alltoall",
-    "MPI_Barrier",
-    "MPI_Bcast",
-    "MPI_Reduce",
-}
-
-
 def _prep_sync_maxdur_worker(trace_file: Path) -> pd.DataFrame:
     """Worker for count_sync_maxdur."""
     df = _read_cali_df(trace_file)
@@ -66,14 +56,15 @@ class CaliperQuery:
 
         print(f"[Caliper] trace_dir: {trace_dir}, nranks: {nranks}, nworkers: {nworkers}")
 
-        if nranks == -1:
-            self.trace_files = [f for f in trace_dir.glob("mpi-*.cali")]
-        else:
-            all_fnames = [f"mpi-{i}.cali" for i in range(nranks)]
-            self.trace_files = [trace_dir / fname for fname in all_fnames]
+        with phase("index"):
+            if nranks == -1:
+                self.trace_files = [f for f in trace_dir.glob("mpi-*.cali")]
+            else:
+                all_fnames = [f"mpi-{i}.cali" for i in range(nranks)]
+                self.trace_files = [trace_dir / fname for fname in all_fnames]
 
-        for fname in self.trace_files:
-            assert fname.exists(), f"File {fname} does not exist"
+            for fname in self.trace_files:
+                assert fname.exists(), f"File {fname} does not exist"
 
         print(f"[Caliper] found {len(self.trace_files)} trace files")
 
@@ -83,16 +74,18 @@ class CaliperQuery:
 
     def count_sync_maxdur(self, thresh_ms: float = 10.0) -> int:
         """Count collectives where max duration across ranks exceeds threshold."""
-        if self.nworkers > 1:
-            with Pool(self.nworkers) as pool:
-                dfs = pool.map(_prep_sync_maxdur_worker, self.trace_files)
-        else:
-            dfs = [_prep_sync_maxdur_worker(f) for f in self.trace_files]
-
-        combined = pd.concat(dfs, ignore_index=True)
-        per_seq_max = combined.groupby("seq")["dura_ns"].max()
-        thresh_ns = thresh_ms * 1e6
-        count = (per_seq_max > thresh_ns).sum()
+        with phase("io"):
+            if self.nworkers > 1:
+                with Pool(self.nworkers) as pool:
+                    dfs = pool.map(_prep_sync_maxdur_worker, self.trace_files)
+            else:
+                dfs = [_prep_sync_maxdur_worker(f) for f in self.trace_files]
+
+        with phase("compute"):
+            combined = pd.concat(dfs, ignore_index=True)
+            per_seq_max = combined.groupby("seq")["dura_ns"].max()
+            thresh_ns = thresh_ms * 1e6
+            count = (per_seq_max > thresh_ns).sum()
 
         print(
             f"[Caliper] nranks={self.nranks}, collectives={len(per_seq_max)}, "
@@ -106,15 +99,17 @@ class CaliperQuery:
 
     def count_mpi_wait_dur(self, thresh_ms: float = 1.0) -> int:
         """Count MPI_Wait calls exceeding threshold across all ranks."""
-        if self.nworkers > 1:
-            with Pool(self.nworkers) as pool:
-                dfs = pool.map(_prep_mpi_wait_worker, self.trace_files)
-        else:
-            dfs = [_prep_mpi_wait_worker(f) for f in self.trace_files]
-
-        combined = pd.concat(dfs, ignore_index=True)
-        thresh_ns = thresh_ms * 1e6
-        count = (combined["time.duration.ns"] > thresh_ns).sum()
+        with phase("io"):
+            if self.nworkers > 1:
+                with Pool(self.nworkers) as pool:
+                    dfs = pool.map(_prep_mpi_wait_worker, self.trace_files)
+            else:
+                dfs = [_prep_mpi_wait_worker(f) for f in self.trace_files]
+
+        with phase("compute"):
+            combined = pd.concat(dfs, ignore_index=True)
+            thresh_ns = thresh_ms * 1e6
+            count = (combined["time.duration.ns"] > thresh_ns).sum()
 
         print(
             f"[Caliper] nranks={self.nranks}, waits={len(combined)}, "
@@ -137,12 +132,14 @@ class CaliperQuery:
         """Count events within a time window."""
         window_ns = time_range[1]  # time_range[0] is 0 for Caliper
         args = [(f, window_ns) for f in self.trace_files]
-        if self.nworkers > 1:
-            with Pool(self.nworkers) as pool:
-                counts = pool.map(_count_window_worker, args)
-        else:
-            counts = [_count_window_worker(a) for a in args]
-
-        total = sum(counts)
+        with phase("io"):
+            if self.nworkers > 1:
+                with Pool(self.nworkers) as pool:
+                    counts = pool.map(_count_window_worker, args)
+            else:
+                counts = [_count_window_worker(a) for a in args]
+
+        with phase("compute"):
+            total = sum(counts)
         print(f"[Caliper] events in window: {total}")
         return total
@@ -1,11 +1,28 @@
 import time
+from contextlib import contextmanager, nullcontext
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Literal
+from typing import Iterator, Literal
+
+import polars as pl
+
+try:
+    from orcareader import spans as _spans
+except ImportError:  # orcareader not on sys.path: span profiling stays off
+    _spans = None
 
 Range = tuple[float, float]
 QueryType = Literal["count_window", "count_sync_maxdur", "count_mpi_wait_dur"]
 
+COLLECTIVES = {
+    "MPI_Allgather",
+    "MPI_Allreduce",
+    "MPI_Alltoall",
+    "MPI_Barrier",
+    "MPI_Bcast",
+    "MPI_Reduce",
+}
+
 
 @dataclass
 class QueryResult:
@@ -27,3 +44,49 @@ def func_micros(fn):
     end = now_micros()
     return result, (end - start)
 
+
+
+# -----------------------------------------------------------------------------
+# Phase accounting: queries mark index/io/compute sections, a harness records
+# them. phase() is a no-op unless called under record_phases() or while
+# orcareader.spans is recording (then each phase is also a nested span).
+# -----------------------------------------------------------------------------
+
+PhaseTimes = dict[str, int]  # phase name -> microseconds
+
+_phase_times: PhaseTimes | None = None
+
+
+def _span(name: str):
+    return nullcontext() if _spans is None else _spans.span(name, "tracequery")
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Attribute the enclosed wall time to phase name, if recording."""
+    with _span(name):
+        if _phase_times is None:
+            yield
+            return
+
+        start = now_micros()
+        try:
+            yield
+        finally:
+            _phase_times[name] = _phase_times.get(name, 0) + now_micros() - start
+
+
+def collect(lf: pl.LazyFrame, name: str) -> pl.DataFrame:
+    """lf.collect(); under span profiling, also records Polars' node timings."""
+    return lf.collect() if _spans is None else _spans.collect(lf, name)
+
+
+@contextmanager
+def record_phases() -> Iterator[PhaseTimes]:
+    """Collect phase() timings from the enclosed block into a dict."""
+    global _phase_times
+    prev, _phase_times = _phase_times, {}
+    try:
+        yield _phase_times
+    finally:
+        _phase_times = prev
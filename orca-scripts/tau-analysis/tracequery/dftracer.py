@@ -3,16 +3,7 @@ from pathlib import Path
 import dask
 import dftracer.analyzer as analyzer
 
-from .common import Range
-
-COLLECTIVES = {
-    "MPI_Allgather",
-    "MPI_Allreduce",
-    "MPI_Alltoall",
-    "MPI_Barrier",
-    "MPI_Bcast",
-    "MPI_Reduce",
-}
+from .common import COLLECTIVES, Range, phase
 
 
 class DfTracerQuery:
@@ -43,7 +34,10 @@ class DfTracerQuery:
 
     def _load_traces(self):
         """Lazy load traces."""
-        if self._traces is None:
+        if self._traces is not None:
+            return self._traces
+
+        with phase("index"):
             self._dfa = analyzer.init_with_hydra(hydra_overrides=[
                 "analyzer=dftracer",
                 "cluster=local",
@@ -66,16 +60,18 @@ class DfTracerQuery:
 
         mpi_filtered = traces[(traces.cat == "mpi")
                               & (traces.func_name.isin(COLLECTIVES))]
-        mpi_pd = mpi_filtered[["pid", "time_start", "time"]].compute()
+        with phase("io"):
+            mpi_pd = mpi_filtered[["pid", "time_start", "time"]].compute()
 
         if mpi_pd.empty:
             return 0
 
-        mpi_pd = mpi_pd.sort_values(["pid", "time_start"])
-        mpi_pd["seq"] = mpi_pd.groupby("pid").cumcount()
-        per_seq_max = mpi_pd.groupby("seq")["time"].max()
-        # time is in seconds, thresh_ms in ms
-        count = int(((per_seq_max * 1e3) > thresh_ms).sum())
+        with phase("compute"):
+            mpi_pd = mpi_pd.sort_values(["pid", "time_start"])
+            mpi_pd["seq"] = mpi_pd.groupby("pid").cumcount()
+            per_seq_max = mpi_pd.groupby("seq")["time"].max()
+            # time is in seconds, thresh_ms in ms
+            count = int(((per_seq_max * 1e3) > thresh_ms).sum())
 
         print(f"[DfTracer] max_dur>{thresh_ms}ms: {count}")
         return count
@@ -90,8 +86,9 @@ class DfTracerQuery:
 
         mpi_wait = traces[(traces.cat == "mpi")
                           & (traces.func_name == "MPI_Wait")]
-        # time is in seconds
-        count = ((mpi_wait.time * 1e3) >= thresh_ms).sum().compute()
+        # time is in seconds; dask fuses read and filter, so this is all io
+        with phase("io"):
+            count = ((mpi_wait.time * 1e3) >= thresh_ms).sum().compute()
 
         print(f"[DfTracer] waits dur>{thresh_ms}ms: {count}")
         return int(count)
@@ -111,7 +108,8 @@ class DfTracerQuery:
     def count_window(self, time_range: Range) -> int:
         """Count events within a time window."""
         traces = self._load_traces()
-        count = traces.time_start.between(*time_range).count().compute()
+        with phase("io"):
+            count = traces.time_start.between(*time_range).count().compute()
 
         print(f"[DfTracer] events in window: {count}")
         return int(count)
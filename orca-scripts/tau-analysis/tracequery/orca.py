@@ -2,7 +2,7 @@ from pathlib import Path
 
 import polars as pl
 
-from .common import Range
+from .common import Range, collect, phase
 
 
 class OrcaQuery:
@@ -17,22 +17,29 @@ class OrcaQuery:
             if f.is_dir() and f.name != "orca_events" and f.name not in exclude
         ]
 
+    def _get_files(self, schema_dir: Path) -> list[Path]:
+        """Enumerate the parquet files of a schema (the index phase)."""
+        with phase("index"):
+            return sorted(schema_dir.glob("**/*.parquet"))
+
     # -------------------------------------------------------------------------
     # count_sync_maxdur: count collectives where max duration across ranks > threshold
     # -------------------------------------------------------------------------
 
     def count_sync_maxdur(self, thresh_ms: float = 10.0) -> int:
         """Count collectives where max duration across ranks exceeds threshold."""
-        patt = str(self.trace_dir / "mpi_collectives" / "**/*.parquet")
-        count = (
-            pl.scan_parquet(patt)
-            .group_by("swid")
-            .agg((pl.col("dura_ns") / 1e6).max().alias("max_dura_ms"))
-            .filter(pl.col("max_dura_ms") > thresh_ms)
-            .select(pl.len())
-            .collect()["len"]
-            .item()
-        )
+        files = self._get_files(self.trace_dir / "mpi_collectives")
+        # one pushed-down plan: Polars fuses the scan and aggregation, so it is
+        # all attributed to io (collect() spans split it under profiling)
+        with phase("io"):
+            lf = (
+                pl.scan_parquet(files)
+                .group_by("swid")
+                .agg((pl.col("dura_ns") / 1e6).max().alias("max_dura_ms"))
+                .filter(pl.col("max_dura_ms") > thresh_ms)
+                .select(pl.len())
+            )
+            count = collect(lf, "scan_collectives")["len"].item()
         print(f"[Orca] max_dur>{thresh_ms}ms: {count}")
         return count
 
@@ -42,15 +49,16 @@ class OrcaQuery:
 
     def count_mpi_wait_dur(self, thresh_ms: float = 1.0) -> int:
         """Count MPI_Wait calls exceeding threshold."""
-        patt = str(self.trace_dir / "mpi_messages" / "**/*.parquet")
-        count = (
-            pl.scan_parquet(patt)
-            .filter(pl.col("probe_name") == "MPI_Wait")
-            .filter((pl.col("dura_ns") / 1e6) > thresh_ms)
-            .select(pl.len())
-            .collect()["len"]
-            .item()
-        )
+        files = self._get_files(self.trace_dir / "mpi_messages")
+        # pushed-down filter and count, all io as in count_sync_maxdur
+        with phase("io"):
+            lf = (
+                pl.scan_parquet(files)
+                .filter(pl.col("probe_name") == "MPI_Wait")
+                .filter((pl.col("dura_ns") / 1e6) > thresh_ms)
+                .select(pl.len())
+            )
+            count = collect(lf, "scan_waits")["len"].item()
         print(f"[Orca] waits dur>{thresh_ms}ms: {count}")
         return count
 
@@ -71,19 +79,18 @@ class OrcaQuery:
 
     def count_window(self, time_range: Range) -> int:
         """Count events within a time window across all schemas (except mpi_messages)."""
-        schemas = self._get_schemas(exclude=["mpi_messages"])
+        with phase("index"):
+            schemas = self._get_schemas(exclude=["mpi_messages"])
         total = 0
         for schema_dir in schemas:
-            patt = str(schema_dir / "**/*.parquet")
-            cnt = (
-                pl.scan_parquet(patt)
-                .filter(pl.col("ts_ns").is_between(*time_range))
-                .select(pl.len())
-                .collect()["len"]
-                .item()
-            )
-            total += cnt
+            files = self._get_files(schema_dir)
+            with phase("io"):
+                lf = (
+                    pl.scan_parquet(files)
+                    .filter(pl.col("ts_ns").is_between(*time_range))
+                    .select(pl.len())
+                )
+                total += collect(lf, f"scan_{schema_dir.name}")["len"].item()
 
         print(f"[Orca] events in window: {total}")
         return total
-
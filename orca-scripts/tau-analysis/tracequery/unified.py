@@ -0,0 +1,92 @@
+from pathlib import Path
+
+import polars as pl
+
+from .adapters import CAT_COLLECTIVE, CAT_MESSAGE, TraceAdapter, get_adapter
+from .common import Range, collect, phase
+
+
+class UnifiedQuery:
+    """The benchmark queries, written once against the canonical schema.
+
+    Any tracer with an adapter is queried by the same Polars plans, so
+    differences in latency come from format and layout, not query code.
+    """
+
+    def __init__(self, adapter: TraceAdapter):
+        self.adapter = adapter
+        self.trace_dir = adapter.trace_dir
+        self._tag = f"[{adapter.tracer}/unified]"
+
+    @classmethod
+    def for_tracer(cls, tracer: str, trace_dir: Path, **kwargs) -> "UnifiedQuery":
+        return cls(get_adapter(tracer, trace_dir, **kwargs))
+
+    def _scan(self) -> pl.LazyFrame:
+        """Resolve the adapter's inputs (converting if needed) -- the index phase."""
+        with phase("index"):
+            return self.adapter.scan()
+
+    def _count(self, lf: pl.LazyFrame, name: str) -> int:
+        """Rows of lf, as one pushed-down plan attributed to io (as in OrcaQuery)."""
+        with phase("io"):
+            return collect(lf.select(pl.len()), name)["len"].item()
+
+    # -------------------------------------------------------------------------
+    # count_sync_maxdur: count collectives where max duration across ranks > threshold
+    # -------------------------------------------------------------------------
+
+    def count_sync_maxdur(self, thresh_ms: float = 10.0) -> int:
+        """Count collectives where max duration across ranks exceeds threshold."""
+        count = self._count(
+            self._scan()
+            .filter(pl.col("category") == CAT_COLLECTIVE)
+            .group_by("seq")
+            .agg(pl.col("dura_ns").max())
+            .filter(pl.col("dura_ns") > thresh_ms * 1e6),
+            "scan_collectives",
+        )
+        print(f"{self._tag} max_dur>{thresh_ms}ms: {count}")
+        return count
+
+    # -------------------------------------------------------------------------
+    # count_mpi_wait_dur: count MPI_Wait calls exceeding threshold
+    # -------------------------------------------------------------------------
+
+    def count_mpi_wait_dur(self, thresh_ms: float = 1.0) -> int:
+        """Count MPI_Wait calls exceeding threshold."""
+        count = self._count(
+            self._scan().filter(
+                (pl.col("name") == "MPI_Wait") & (pl.col("dura_ns") > thresh_ms * 1e6)
+            ),
+            "scan_waits",
+        )
+        print(f"{self._tag} waits dur>{thresh_ms}ms: {count}")
+        return count
+
+    # -------------------------------------------------------------------------
+    # count_window: count events within a time window from trace start
+    # -------------------------------------------------------------------------
+
+    def get_window_bounds(self, window_s: float = 1.0) -> Range:
+        """Window of window_s seconds starting at the first collective."""
+        ts_min = (
+            self.adapter.scan()
+            .filter(pl.col("category") == CAT_COLLECTIVE)
+            .select(pl.col("ts_ns").min())
+            .collect()["ts_ns"]
+            .item()
+        )
+        return (ts_min, ts_min + window_s * 1e9)
+
+    def count_window(self, time_range: Range) -> int:
+        """Count non-p2p events within a time window (as OrcaQuery does)."""
+        count = self._count(
+            self._scan().filter(
+                (pl.col("category") != CAT_MESSAGE)
+                & pl.col("ts_ns").is_between(*time_range)
+            ),
+            "scan_window",
+        )
+        print(f"{self._tag} events in window: {count}")
+        return count